@@ -0,0 +1,91 @@
+"""
+Benchmark fingerprinting of large atom inputs for the workflow cache.
+
+Compares Fingerprinter (column buffer hashing, memoized per execution) with
+the previous pickle + SHA-256 of every input value.
+
+Usage:
+    python benchmarks/bench_fingerprint.py [--rows 5000000] [--repeat 3]
+"""
+
+import argparse
+import hashlib
+import logging
+import pickle
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from preswald.engine.fingerprint import Fingerprinter
+
+
+def pickle_sha256(value) -> str:
+    """The previous hashing, kept here as the baseline."""
+    return hashlib.sha256(pickle.dumps(value)).hexdigest()
+
+
+def build_frames(rows: int, seed: int = 0) -> dict[str, object]:
+    rng = np.random.default_rng(seed)
+    numeric = pd.DataFrame(
+        {f"f{i}": rng.random(rows) for i in range(8)}
+        | {f"i{i}": rng.integers(0, 1 << 40, rows) for i in range(4)}
+        | {"ts": pd.date_range("2020-01-01", periods=rows, freq="s")}
+    )
+    mixed = numeric.iloc[:, :4].copy()
+    mixed["category"] = pd.Categorical(rng.choice(["a", "b", "c", "d"], rows))
+    mixed["label"] = rng.choice(["north", "south", "east", "west"], rows).astype(object)
+    return {
+        "numeric frame": numeric,
+        "mixed frame": mixed,
+        "float array": rng.random((rows, 4)),
+    }
+
+
+def time_call(fn, *args, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    print(
+        f"{'value':<16}{'MB':>8}{'pickle ms':>12}{'fingerprint ms':>16}"
+        f"{'memo hit ms':>14}{'speedup':>10}"
+    )
+    for label, value in build_frames(args.rows).items():
+        if isinstance(value, pd.DataFrame):
+            size = value.memory_usage(deep=True).sum()
+        else:
+            size = value.nbytes
+
+        def cold(value=value):
+            fingerprinter = Fingerprinter()
+            assert fingerprinter.fingerprint(value) is not None
+
+        warm = Fingerprinter()
+        warm.fingerprint(value)
+
+        baseline = time_call(pickle_sha256, value, repeat=args.repeat)
+        fingerprint = time_call(cold, repeat=args.repeat)
+        memo = time_call(warm.fingerprint, value, repeat=args.repeat)
+        print(
+            f"{label:<16}{size / 1e6:>8.0f}{baseline * 1000:>12.1f}"
+            f"{fingerprint * 1000:>16.1f}{memo * 1000:>14.3f}"
+            f"{baseline / fingerprint:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark affected-atom computation on large synthetic workflow DAGs.
+
+Compares Workflow._get_affected_atoms (a BFS over the reverse dependency
+index) with the previous fixpoint scan over every atom and dependency.
+
+Usage:
+    python benchmarks/bench_workflow.py [--atoms 5000] [--repeat 20]
+"""
+
+import argparse
+import logging
+import random
+import statistics
+import time
+
+from preswald.interfaces.workflow import Workflow
+
+
+def fixpoint_affected(workflow: Workflow, changed_atoms: set[str]) -> set[str]:
+    """The pre-index algorithm, kept here as the baseline."""
+    affected = set(changed_atoms)
+    while True:
+        new_affected = {
+            name
+            for name, atom in workflow.atoms.items()
+            if name not in affected
+            and any(dep in affected for dep in atom.dependencies)
+        }
+        if not new_affected:
+            return affected
+        affected.update(new_affected)
+
+
+def build_workflow(shape: str, n_atoms: int, seed: int = 0) -> Workflow:
+    rng = random.Random(seed)
+    workflow = Workflow()
+
+    for i in range(n_atoms):
+        if shape == "chain":
+            deps = [f"a{i - 1}"] if i else []
+        elif shape == "layered":
+            # 50 layers; each atom reads up to three atoms from the layer above
+            width = max(n_atoms // 50, 1)
+            layer = i // width
+            above = range((layer - 1) * width, layer * width) if layer else range(0)
+            deps = [f"a{j}" for j in rng.sample(above, min(3, len(above)))]
+        else:  # random sparse DAG, edges only point to earlier atoms
+            deps = [f"a{rng.randrange(i)}" for _ in range(min(i, 2))]
+
+        def func(**kwargs):
+            return None
+
+        func.__name__ = f"a{i}"
+        workflow.atom(dependencies=deps)(func)
+
+    return workflow
+
+
+def time_call(fn, *args, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--atoms", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    print(
+        f"{'shape':<10}{'changed':<10}{'affected':>10}{'bfs ms':>12}{'fixpoint ms':>14}"
+    )
+    for shape in ("chain", "layered", "random"):
+        workflow = build_workflow(shape, args.atoms)
+        for label, changed in (("root", {"a0"}), ("middle", {f"a{args.atoms // 2}"})):
+            affected = workflow._get_affected_atoms(changed)
+            assert affected == fixpoint_affected(workflow, changed)
+
+            # The fixpoint scan is quadratic on deep graphs, so time it fewer times
+            bfs = time_call(workflow._get_affected_atoms, changed, repeat=args.repeat)
+            fixpoint = time_call(fixpoint_affected, workflow, changed, repeat=1)
+            print(
+                f"{shape:<10}{label:<10}{len(affected):>10}"
+                f"{bfs * 1000:>12.3f}{fixpoint * 1000:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import React, { memo, useEffect } from 'react';
+import React, { memo, useEffect, useRef } from 'react';
 
 // UI components
 import { Alert, AlertDescription } from '@/components/ui/alert';
@@ -336,11 +336,48 @@ const MemoizedComponent = memo(
   }
 );
 
+// Reports which components are on screen, so the server can defer atoms
+// whose output is hidden (collapsed sidebar, unselected view, scrolled away)
+const useVisibilityReporting = (containerRef, components) => {
+  useEffect(() => {
+    const container = containerRef.current;
+    if (!container || typeof IntersectionObserver === 'undefined') return undefined;
+
+    const visible = new Set();
+    let timer = null;
+    const report = () => {
+      timer = null;
+      comm.updateVisibleComponents?.([...visible]);
+    };
+
+    const observer = new IntersectionObserver((entries) => {
+      entries.forEach((entry) => {
+        const { componentId } = entry.target.dataset;
+        if (entry.isIntersecting) visible.add(componentId);
+        else visible.delete(componentId);
+      });
+      if (!timer) timer = setTimeout(report, 200);
+    });
+    container
+      .querySelectorAll('[data-component-id]')
+      .forEach((element) => observer.observe(element));
+
+    return () => {
+      observer.disconnect();
+      if (timer) clearTimeout(timer);
+    };
+  }, [containerRef, components]);
+};
+
 const DynamicComponents = ({ components, onComponentUpdate }) => {
+  const containerRef = useRef(null);
+
   useEffect(() => {
     extractKeyProps.reset();
   }, []);
 
+  useVisibilityReporting(containerRef, components);
+
   console.log('[DynamicComponents] Rendering with components:', components);
 
   if (!components?.rows) {
@@ -374,6 +411,7 @@ const DynamicComponents = ({ components, onComponentUpdate }) => {
           return (
             <React.Fragment key={componentKey}>
               <div
+                data-component-id={component.id || undefined}
                 className={cn(isSeparator ? 'w-full' : 'dynamiccomponent-component')}
                 style={!isSeparator ? { flex: component.flex || 1 } : undefined}
               >
@@ -397,7 +435,7 @@ const DynamicComponents = ({ components, onComponentUpdate }) => {
   };
 
   return (
-    <div className="dynamiccomponent-container">
+    <div ref={containerRef} className="dynamiccomponent-container">
       {components.rows.map((row, index) => renderRow(row, index))}
     </div>
   );
@@ -226,6 +226,18 @@ class WebSocketClient {
     }
   }
 
+  updateVisibleComponents(componentIds) {
+    if (!this.socket || this.socket.readyState !== WebSocket.OPEN) {
+      return;
+    }
+    const message = { type: 'visibility_update', visible: componentIds };
+    try {
+      this.socket.send(JSON.stringify(message));
+    } catch (error) {
+      console.error('[WebSocket] Error sending visibility update:', error);
+    }
+  }
+
   getConnections() {
     return this.connections;
   }
@@ -368,6 +380,10 @@ class PostMessageClient {
     }
   }
 
+  updateVisibleComponents() {
+    // The in-browser engine evaluates every atom
+  }
+
   getConnections() {
     return [];
   }
@@ -170,7 +170,14 @@ def init(name, template):
     default=False,
     help="Disable automatically opening a new browser tab",
 )
-def run(port, log_level, disable_new_tab):
+@click.option(
+    "--trace",
+    "trace_path",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Trace script runs and reruns, and write the trace to this file on exit.",
+)
+def run(port, log_level, disable_new_tab, trace_path):
     """
     Run a Preswald app from the current directory.
 
@@ -207,6 +214,9 @@ def run(port, log_level, disable_new_tab):
 
     log_level = configure_logging(config_path=config_path, level=log_level)
     port = read_port_from_config(config_path=config_path, port=port)
+    trace = trace_path is not None or bool(
+        config.get("tracing", {}).get("enabled", False)
+    )
 
     # Track run command
     telemetry.track_command(
@@ -216,6 +226,7 @@ def run(port, log_level, disable_new_tab):
             "port": port,
             "log_level": log_level,
             "disable_new_tab": disable_new_tab,
+            "trace": trace,
         },
     )
 
@@ -228,7 +239,7 @@ def run(port, log_level, disable_new_tab):
 
             webbrowser.open(url)
 
-        start_server(script=script, port=port)
+        start_server(script=script, port=port, trace_path=trace_path, trace=trace)
 
     except Exception as e:
         click.echo(f"Error: {e}")
@@ -395,6 +406,160 @@ def stop(target):
         sys.exit(1)
 
 
+@cli.group()
+def store():
+    """
+    Build and inspect the shared data store.
+
+    Requires a [data_store] path in preswald.toml.
+    """
+    pass
+
+
+@store.command("build")
+@click.option(
+    "--keep",
+    default=2,
+    show_default=True,
+    help="Number of store generations to keep on disk.",
+)
+def store_build(keep):
+    """
+    Load every data source into a new store generation and publish it.
+
+    Running workers switch to the new generation on their next rerun.
+    """
+    config_path = "preswald.toml"
+    if not os.path.exists(config_path):
+        click.echo("Error: preswald.toml not found in current directory. ❌")
+        click.echo("Make sure you're in a Preswald project directory.")
+        return
+
+    from preswald.engine.managers.data import DataManager
+    from preswald.utils import configure_logging
+
+    configure_logging(config_path=config_path)
+    telemetry.track_command("store build", {"keep": keep})
+
+    manager = DataManager(preswald_path=config_path, secrets_path="secrets.toml")
+    try:
+        generation = manager.build_store(keep=keep)
+    except Exception as e:
+        click.echo(click.style(f"❌ Store build failed: {e!s}", fg="red"))
+        sys.exit(1)
+
+    manifest = manager.store.read_manifest(generation)
+    click.echo(
+        click.style(
+            f"✅ Published store generation {generation} "
+            f"with {len(manifest['sources'])} sources",
+            fg="green",
+        )
+    )
+
+
+@store.command("status")
+def store_status():
+    """
+    Show the published store generation and the sources it serves.
+    """
+    config_path = "preswald.toml"
+    if not os.path.exists(config_path):
+        click.echo("Error: preswald.toml not found in current directory. ❌")
+        click.echo("Make sure you're in a Preswald project directory.")
+        return
+
+    import tomli
+
+    from preswald.engine.managers.store import DataStore
+
+    with open(config_path, "rb") as f:
+        path = tomli.load(f).get("data_store", {}).get("path")
+    if not path:
+        click.echo("Error: no [data_store] path configured in preswald.toml. ❌")
+        return
+
+    data_store = DataStore(path)
+    generation = data_store.current_generation()
+    if generation is None:
+        click.echo(f"No store generation published in {path} yet.")
+        return
+
+    manifest = data_store.read_manifest(generation)
+    click.echo(f"Generation: {generation}")
+    for name, entry in manifest["sources"].items():
+        indexes = [kind for kind in ("spatial", "time", "text") if kind in entry]
+        click.echo(
+            f"  {name} ({entry['type']}) -> {entry['table']}"
+            + (f" [{', '.join(indexes)}]" if indexes else "")
+        )
+
+
+def _disk_cache_from_config(config_path: str):
+    import tomli
+
+    from preswald.engine.disk_cache import DiskCache
+    from preswald.interfaces.workflow import DEFAULT_DISK_CACHE_PATH
+
+    with open(config_path, "rb") as f:
+        cache_config = tomli.load(f).get("cache", {})
+    disk_max_mb = cache_config.get("disk_max_mb")
+    return DiskCache(
+        cache_config.get("disk_path", DEFAULT_DISK_CACHE_PATH),
+        max_bytes=None if disk_max_mb is None else int(disk_max_mb * 2**20),
+    )
+
+
+@cli.group()
+def cache():
+    """
+    Inspect and clear the disk cache of atoms declared with persist=True.
+    """
+    pass
+
+
+@cache.command("stats")
+def cache_stats():
+    """
+    Show how many results the disk cache holds, per atom.
+    """
+    config_path = "preswald.toml"
+    if not os.path.exists(config_path):
+        click.echo("Error: preswald.toml not found in current directory. ❌")
+        click.echo("Make sure you're in a Preswald project directory.")
+        return
+
+    stats = _disk_cache_from_config(config_path).stats()
+    budget = (
+        f" of {stats['max_bytes'] / 2**20:.1f} MB"
+        if stats["max_bytes"] is not None
+        else ""
+    )
+    click.echo(f"Disk cache: {stats['path']}")
+    click.echo(f"{stats['entries']} results, {stats['bytes'] / 2**20:.1f} MB{budget}")
+    for name, atom in sorted(stats["atoms"].items()):
+        click.echo(
+            f"  {name}: {atom['entries']} results, {atom['bytes'] / 2**20:.1f} MB"
+        )
+
+
+@cache.command("clear")
+@click.option("--atom", default=None, help="Only clear the results of this atom.")
+def cache_clear(atom):
+    """
+    Remove persisted atom results from the disk cache.
+    """
+    config_path = "preswald.toml"
+    if not os.path.exists(config_path):
+        click.echo("Error: preswald.toml not found in current directory. ❌")
+        click.echo("Make sure you're in a Preswald project directory.")
+        return
+
+    telemetry.track_command("cache clear", {"atom": atom is not None})
+    removed = _disk_cache_from_config(config_path).clear(atom)
+    click.echo(click.style(f"✅ Removed {removed} cached results", fg="green"))
+
+
 @cli.command()
 @click.pass_context
 def tutorial(ctx):
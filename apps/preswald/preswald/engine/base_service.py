@@ -1,20 +1,33 @@
+import json
 import logging
 import os
 import time
 from collections.abc import Callable
-from threading import Lock
-from typing import Any, Callable, Dict, Optional
 from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Callable, Dict
+
+import toml
 
 from preswald.engine.runner import ScriptRunner
+from preswald.engine.tracing import span, trace_session
 from preswald.engine.utils import (
     RenderBuffer,
     clean_nan_values,
     compress_data,
     optimize_plotly_data,
 )
-from preswald.interfaces.workflow import Workflow, Atom
 from preswald.interfaces.component_return import ComponentReturn
+from preswald.interfaces.workflow import (
+    DEFAULT_DISK_CACHE_PATH,
+    Atom,
+    Workflow,
+    record_widget_read,
+    widget_overrides,
+)
+
+from .disk_cache import DiskCache
 from .managers.data import DataManager
 from .managers.layout import LayoutManager
 
@@ -44,7 +57,15 @@ class BasePreswaldService:
 
         # DAG workflow engine
         self._workflow = Workflow(service=self)
-        self._current_atom: Optional[str] = None
+        # Context-local, so atoms running on parallel threads each see their own
+        self._current_atom_var: ContextVar[str | None] = ContextVar(
+            "preswald_service_atom", default=None
+        )
+        # Set while an atom runs on a worker thread: components collect here and
+        # the workflow adds them to the layout in execution order
+        self._component_buffer: ContextVar[list | None] = ContextVar(
+            "preswald_component_buffer", default=None
+        )
 
         # Initialize session tracking
         self.script_runners: dict[str, ScriptRunner] = {}
@@ -52,6 +73,24 @@ class BasePreswaldService:
         # Layout management
         self._layout_manager = LayoutManager()
 
+    @property
+    def _current_atom(self) -> str | None:
+        return self._current_atom_var.get()
+
+    @_current_atom.setter
+    def _current_atom(self, atom_name: str | None):
+        self._current_atom_var.set(atom_name)
+
+    @contextmanager
+    def buffer_components(self):
+        """Collect appended components in a list instead of the layout."""
+        buffer: list = []
+        token = self._component_buffer.set(buffer)
+        try:
+            yield buffer
+        finally:
+            self._component_buffer.reset(token)
+
     @contextmanager
     def active_atom(self, atom_name: str):
         previous_atom = self._current_atom
@@ -74,6 +113,7 @@ class BasePreswaldService:
             if script_path:
                 cls._instance._script_path = script_path
                 cls._instance._initialize_data_manager(script_path)
+                cls._instance._configure_workflow(script_path)
         return cls._instance
 
     @property
@@ -88,6 +128,7 @@ class BasePreswaldService:
 
         self._script_path = path
         self._initialize_data_manager(path)
+        self._configure_workflow(path)
 
     def _ensure_dummy_atom(self, atom_name: str):
         """Helper to ensure a dummy atom is registered if it doesn’t already exist and isn’t the current atom."""
@@ -100,15 +141,19 @@ class BasePreswaldService:
         if atom_name not in self._workflow.atoms:
             logger.warning(f"[DAG] (fallback) Registering dummy atom for '{atom_name}'")
             dummy_func = lambda **kwargs: None
-            self._workflow.atoms[atom_name] = Atom(
+            self._workflow.register_atom(Atom(
                 name=atom_name,
                 func=dummy_func,
                 original_func=dummy_func,
-            )
+            ))
 
     def append_component(self, component):
         """Add a component to the layout manager"""
         try:
+            if (buffer := self._component_buffer.get()) is not None:
+                buffer.append(component)
+                return
+
             # Unwrap ComponentReturn if present
             if hasattr(component, "_preswald_component"):
                 component = component._preswald_component
@@ -130,41 +175,7 @@ class BasePreswaldService:
             logger.debug(f"NaN cleanup took {time.time() - clean_start:.3f}s")
 
             if "id" in cleaned_component:
-                component_id = cleaned_component["id"]
-                logger.info(f"[TEST] append_component() called with id: {component_id}")
-
-                # Try to patch instead of re-adding if already exists
-                if not self._layout_manager.patch_component(cleaned_component):
-                    # Update value if we have previous state
-                    if "value" in cleaned_component:
-                        current_state = self.get_component_state(component_id)
-                        if current_state is not None:
-                            cleaned_component["value"] = clean_nan_values(current_state)
-                            if logger.isEnabledFor(logging.DEBUG):
-                                logger.debug(f"Updated component {component_id} with state: {current_state}")
-
-                    with self.active_atom(self._workflow._current_atom):
-                        current_atom = self._workflow._current_atom
-                        logger.info(f"[DEBUG] Current atom before register: {current_atom}")
-
-                        # Register the producer relationship
-                        self._workflow.register_component_producer(component_id)
-
-                        # Avoid circular fallback: component shouldn't self-register
-                        producer = self._workflow.get_component_producer(component_id)
-                        if current_atom and component_id != current_atom and producer != current_atom:
-                            self._ensure_dummy_atom(component_id)
-
-                        # Store return value in workflow context (if present)
-                        if "value" in cleaned_component:
-                            producer = self._workflow.get_component_producer(component_id)
-                            if producer:
-                                self._workflow.context.set_variable(producer, cleaned_component["value"])
-                                logger.info(f"[DAG] Stored return value of {component_id} in context under {producer}")
-
-                        self._layout_manager.add_component(cleaned_component)
-                        if logger.isEnabledFor(logging.DEBUG):
-                            logger.debug(f"Added component with state: {cleaned_component}")
+                self._add_or_patch_component(cleaned_component)
             else:
                 # Components without IDs are added as-is
                 self._layout_manager.add_component(cleaned_component)
@@ -173,6 +184,54 @@ class BasePreswaldService:
         except Exception as e:
             logger.error(f"Error adding component: {e}", exc_info=True)
 
+    def _add_or_patch_component(self, cleaned_component: dict) -> None:
+        """Patch a component already on the page, else add it with its state"""
+        component_id = cleaned_component["id"]
+        logger.info(f"[TEST] append_component() called with id: {component_id}")
+
+        # Try to patch instead of re-adding if already exists
+        if self._layout_manager.patch_component(cleaned_component):
+            return
+
+        # Update value if we have previous state
+        if "value" in cleaned_component:
+            current_state = self.get_component_state(component_id)
+            if current_state is not None:
+                cleaned_component["value"] = clean_nan_values(current_state)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Updated component {component_id} with state: {current_state}")
+
+        with self.active_atom(self._workflow._current_atom):
+            current_atom = self._workflow._current_atom
+            logger.info(f"[DEBUG] Current atom before register: {current_atom}")
+
+            # Register the producer relationship
+            self._workflow.register_component_producer(component_id)
+
+            # Avoid circular fallback: component shouldn't self-register
+            producer = self._workflow.get_component_producer(component_id)
+            if current_atom and component_id != current_atom and producer != current_atom:
+                self._ensure_dummy_atom(component_id)
+
+            # Store return value in workflow context (if present)
+            if "value" in cleaned_component:
+                producer = self._workflow.get_component_producer(component_id)
+                if producer:
+                    self._workflow.context.set_variable(producer, cleaned_component["value"])
+                    logger.info(f"[DAG] Stored return value of {component_id} in context under {producer}")
+
+            self._layout_manager.add_component(cleaned_component)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Added component with state: {cleaned_component}")
+
+    def patch_component(self, component) -> bool:
+        """Replace a component already on the page; False if it isn't there yet"""
+        if hasattr(component, "_preswald_component"):
+            component = component._preswald_component
+        if not isinstance(component, dict) or "id" not in component:
+            return False
+        return self._layout_manager.patch_component(clean_nan_values(component))
+
     def clear_components(self):
         """Clear all components from the layout manager"""
         self._layout_manager.clear_layout()
@@ -180,9 +239,7 @@ class BasePreswaldService:
     def force_recompute(self, component_ids: set[str]) -> None:
         """Mark components as needing recomputation."""
         logger.debug(f"[DAG] Forcing recompute for: {component_ids}")
-        for cid in component_ids:
-            if cid in self._workflow.atoms:
-                self._workflow.atoms[cid].force_recompute = True
+        self._workflow.mark_for_recompute(component_ids)
 
     def get_affected_components(self, changed_components: set[str]) -> set[str]:
         """Compute all components affected by the updated component state."""
@@ -191,8 +248,12 @@ class BasePreswaldService:
         return affected
 
     def get_component_state(self, component_id: str, default: Any = None) -> Any:
+        overrides = widget_overrides()
         with self._lock:
-            value = self._component_states.get(component_id, default)
+            if component_id in overrides:
+                value = overrides[component_id]
+            else:
+                value = self._component_states.get(component_id, default)
             if logger.isEnabledFor(logging.DEBUG):
                 logger.debug(f"[STATE] Getting state for {component_id}: {value}")
             logger.info(f"[STATE] Getting state for {component_id}: {value}")
@@ -201,6 +262,13 @@ class BasePreswaldService:
                 logger.warning(f"[STATE] Got unexpected ComponentReturn in state for {component_id}")
                 value = value.value  # unwrap
 
+            record_widget_read(
+                component_id,
+                value
+                if component_id in self._component_states or component_id in overrides
+                else None,
+            )
+
             if self._current_atom:
                 producer = self._workflow.get_component_producer(component_id)
 
@@ -211,16 +279,28 @@ class BasePreswaldService:
 
                     if producer:
                         logger.info(f"[DAG] {self._current_atom} also depends on producer atom {producer}")
-                        self._workflow.atoms[self._current_atom].dependencies.add(producer)
+                        self._workflow.add_dependency(self._current_atom, producer)
 
                     # Register fallback only if atom not declared
                     self._ensure_dummy_atom(self._current_atom)
 
             return value
 
+    def peek_component_state(self, component_id: str, default: Any = None) -> Any:
+        """Read a component's state without logging it or recording a dependency."""
+        overrides = widget_overrides()
+        if component_id in overrides:
+            return overrides[component_id]
+        with self._lock:
+            value = self._component_states.get(component_id, default)
+        if isinstance(value, ComponentReturn):
+            value = value.value
+        return value
+
     def get_rendered_components(self):
         """Get all rendered components"""
-        rows = self._layout_manager.get_layout()
+        with span("layout", "render"):
+            rows = self._layout_manager.get_layout()
         return {"rows": rows}
 
     def get_workflow(self) -> Workflow:
@@ -229,13 +309,15 @@ class BasePreswaldService:
     async def handle_client_message(self, client_id: str, message: Dict[str, Any]):
         """Process incoming messages from clients"""
         start_time = time.time()
+        msg_type = message.get("type")
         try:
-            msg_type = message.get("type")
-
-            if msg_type == "component_update":
-                await self._handle_component_update(client_id, message)
-            else:
-                logger.warning(f"Unknown message type: {msg_type}")
+            with trace_session(client_id), span("receive", "websocket", type=msg_type):
+                if msg_type == "component_update":
+                    await self._handle_component_update(client_id, message)
+                elif msg_type == "visibility_update":
+                    await self._handle_visibility_update(client_id, message)
+                else:
+                    logger.warning(f"Unknown message type: {msg_type}")
 
         except Exception as e:
             logger.error(f"Error handling message from {client_id}: {e}")
@@ -278,6 +360,7 @@ class BasePreswaldService:
             # Clean up script runner
             if runner := self.script_runners.pop(client_id, None):
                 await runner.stop()
+            self._workflow.drop_session(client_id)
 
         except Exception as e:
             logger.error(f"Error unregistering client {client_id}: {e}")
@@ -288,7 +371,12 @@ class BasePreswaldService:
         async def send_message(msg: dict[str, Any]):
             if not self._is_shutting_down:
                 try:
-                    await websocket.send_json(msg)
+                    # Serialized as send_json would, timed apart from sending
+                    with span("serialize", "websocket", type=msg.get("type")) as args:
+                        text = json.dumps(msg, separators=(",", ":"), ensure_ascii=False)
+                        args["chars"] = len(text)
+                    with span("send", "websocket", type=msg.get("type")):
+                        await websocket.send_text(text)
                 except Exception as e:
                     logger.error(f"Error sending message: {e}")
 
@@ -345,10 +433,27 @@ class BasePreswaldService:
         # Broadcast updates to other clients
         await self._broadcast_state_updates(changed_states, exclude_client=client_id)
 
+    async def _handle_visibility_update(self, client_id: str, message: dict[str, Any]):
+        """Handle the list of component IDs a client currently shows"""
+        visible = message.get("visible")
+        if not isinstance(visible, list):
+            await self._send_error(client_id, "Visibility update missing visible list")
+            raise ValueError("Visibility update missing visible list")
+
+        # Tracked per client: a rerun evaluates what that client shows
+        runner = self.script_runners.get(client_id)
+        if runner:
+            await runner.update_visibility(set(visible))
+
     def connect_data_manager(self):
         """Connect the data manager"""
         self.data_manager.connect()
 
+    def refresh_data_manager(self):
+        """Pick up a data store generation published since the last run"""
+        if self.data_manager is not None:
+            self.data_manager.refresh_store()
+
     def _initialize_data_manager(self, script_path: str) -> None:
         script_dir = os.path.dirname(script_path)
         preswald_path = os.path.join(script_dir, "preswald.toml")
@@ -358,6 +463,30 @@ class BasePreswaldService:
             preswald_path=preswald_path, secrets_path=secrets_path
         )
 
+    def _configure_workflow(self, script_path: str) -> None:
+        """Apply the [cache] section of preswald.toml to the workflow caches"""
+        preswald_path = os.path.join(os.path.dirname(script_path), "preswald.toml")
+        if not os.path.exists(preswald_path):
+            return
+        try:
+            cache_config = toml.load(preswald_path).get("cache", {})
+            max_memory_mb = cache_config.get("max_memory_mb")
+            self._workflow.configure_cache(
+                max_bytes=None if max_memory_mb is None else int(max_memory_mb * 2**20),
+                policy=cache_config.get("policy", "lru"),
+            )
+            disk_max_mb = cache_config.get("disk_max_mb")
+            self._workflow.disk_cache = DiskCache(
+                os.path.join(
+                    os.path.dirname(preswald_path),
+                    cache_config.get("disk_path", DEFAULT_DISK_CACHE_PATH),
+                ),
+                max_bytes=None if disk_max_mb is None else int(disk_max_mb * 2**20),
+            )
+            self._workflow.configure_release(cache_config.get("release_values"))
+        except Exception as e:
+            logger.error(f"Error loading [cache] config from {preswald_path}: {e}")
+
     async def _register_common_client_setup(
         self, client_id: str, websocket: Any
     ) -> ScriptRunner:
@@ -391,11 +520,11 @@ class BasePreswaldService:
         if atom_name not in self._workflow.atoms:
             logger.warning(f"[DAG] (fallback) Registering dummy atom for '{atom_name}'")
             dummy_func = lambda **kwargs: None
-            self._workflow.atoms[atom_name] = Atom(
+            self._workflow.register_atom(Atom(
                 name=atom_name,
                 func=dummy_func,
                 original_func=dummy_func,
-            )
+            ))
 
     async def _send_error(self, client_id: str, message: str):
         """Send error message to a client"""
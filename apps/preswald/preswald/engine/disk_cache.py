@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import pickle
+import re
+import shutil
+import time
+import uuid
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """
+    On-disk results of atoms declared with ``persist=True``, kept across restarts.
+
+    Every result is stored in its own entry directory::
+
+        <root>/
+            <atom>/
+                <input hash>/
+                    meta.json        # format, size and compute time
+                    value.npy        # or value.parquet / value.pkl
+                    trace.pkl        # components and widget reads to replay
+
+    The input hash already covers the atom's code hash and the content
+    fingerprints of its inputs, so an entry is only found again for the same
+    code and inputs. Entries are written to a temporary directory and renamed
+    into place, so a crash never leaves a half-written one. The meta file's
+    mtime marks the last use, for least-recently-used eviction.
+    """
+
+    META = "meta.json"
+    TRACE = "trace.pkl"
+
+    def __init__(self, root: str, max_bytes: int | None = None):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def load(self, atom_name: str, input_hash: str) -> tuple[Any, Any, dict] | None:
+        """Return (value, trace, meta) for a stored result, or None"""
+        entry_dir = self._entry_dir(atom_name, input_hash)
+        try:
+            with open(os.path.join(entry_dir, self.META), encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(os.path.join(entry_dir, self.TRACE), "rb") as f:
+                trace = pickle.load(f)
+            value = self._read_value(entry_dir, meta["format"])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {entry_dir}: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        try:
+            os.utime(os.path.join(entry_dir, self.META))
+        except OSError:
+            pass  # evicted meanwhile; the value is already loaded
+        return value, trace, meta
+
+    def store(
+        self, atom_name: str, input_hash: str, value: Any, trace: Any, cost: float
+    ) -> bool:
+        """Write a result; returns False if it was already stored by someone else"""
+        entry_dir = self._entry_dir(atom_name, input_hash)
+        if os.path.exists(entry_dir):
+            return False
+
+        tmp_dir = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        try:
+            with open(os.path.join(tmp_dir, self.TRACE), "wb") as f:
+                pickle.dump(trace, f, protocol=pickle.HIGHEST_PROTOCOL)
+            value_format = self._write_value(tmp_dir, value)
+            meta = {
+                "atom": atom_name,
+                "format": value_format,
+                "size": _dir_size(tmp_dir),
+                "cost": cost,
+                "created": time.time(),
+            }
+            with open(os.path.join(tmp_dir, self.META), "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another worker stored the same result first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+
+        self.evict()
+        return True
+
+    def entries(self) -> list[dict]:
+        """Metadata of every stored result, with its path and last use"""
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for atom_dir in os.scandir(self.root):
+            if not atom_dir.is_dir() or atom_dir.name.startswith(".tmp-"):
+                continue
+            for entry_dir in os.scandir(atom_dir.path):
+                meta_path = os.path.join(entry_dir.path, self.META)
+                try:
+                    with open(meta_path, encoding="utf-8") as f:
+                        meta = json.load(f)
+                    meta["last_used"] = os.path.getmtime(meta_path)
+                except (OSError, ValueError):
+                    continue
+                meta["path"] = entry_dir.path
+                entries.append(meta)
+        return entries
+
+    def stats(self) -> dict[str, Any]:
+        entries = self.entries()
+        per_atom: dict[str, dict[str, int]] = {}
+        for meta in entries:
+            atom = per_atom.setdefault(meta["atom"], {"entries": 0, "bytes": 0})
+            atom["entries"] += 1
+            atom["bytes"] += meta["size"]
+        return {
+            "path": self.root,
+            "max_bytes": self.max_bytes,
+            "entries": len(entries),
+            "bytes": sum(meta["size"] for meta in entries),
+            "atoms": per_atom,
+        }
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits its budget"""
+        if self.max_bytes is None:
+            return 0
+        entries = sorted(self.entries(), key=lambda meta: meta["last_used"])
+        total = sum(meta["size"] for meta in entries)
+        removed = 0
+        for meta in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(meta["path"], ignore_errors=True)
+            total -= meta["size"]
+            removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} entries from the disk cache at {self.root}")
+        return removed
+
+    def clear(self, atom_name: str | None = None) -> int:
+        """Remove all stored results, or those of one atom; returns the count"""
+        entries = [
+            meta
+            for meta in self.entries()
+            if atom_name is None or meta["atom"] == atom_name
+        ]
+        for meta in entries:
+            shutil.rmtree(meta["path"], ignore_errors=True)
+        return len(entries)
+
+    def _entry_dir(self, atom_name: str, input_hash: str) -> str:
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", atom_name)
+        return os.path.join(self.root, safe_name, input_hash)
+
+    @staticmethod
+    def _write_value(entry_dir: str, value: Any) -> str:
+        if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+            np.save(os.path.join(entry_dir, "value.npy"), value, allow_pickle=False)
+            return "npy"
+        if isinstance(value, pd.DataFrame):
+            path = os.path.join(entry_dir, "value.parquet")
+            try:
+                value.to_parquet(path)
+                return "parquet"
+            except Exception as e:
+                # No parquet engine installed, or columns Arrow can't represent
+                logger.debug(f"Storing DataFrame as pickle instead of parquet: {e}")
+                if os.path.exists(path):
+                    os.remove(path)
+        with open(os.path.join(entry_dir, "value.pkl"), "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return "pickle"
+
+    @staticmethod
+    def _read_value(entry_dir: str, value_format: str) -> Any:
+        if value_format == "npy":
+            # Copy-on-write mapping: pages load lazily, writes stay private
+            return np.load(os.path.join(entry_dir, "value.npy"), mmap_mode="c")
+        if value_format == "parquet":
+            return pd.read_parquet(os.path.join(entry_dir, "value.parquet"))
+        with open(os.path.join(entry_dir, "value.pkl"), "rb") as f:
+            return pickle.load(f)
+
+
+def _dir_size(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
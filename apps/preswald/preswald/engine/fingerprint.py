@@ -0,0 +1,238 @@
+import hashlib
+import logging
+import pickle
+import threading
+import weakref
+from collections.abc import Callable
+from functools import singledispatch
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from preswald.engine.managers.data import data_version_key
+
+
+try:
+    import xxhash
+
+    def _new_hasher():
+        return xxhash.xxh3_128()
+
+except ImportError:
+
+    def _new_hasher():
+        # Fastest of hashlib's in practice, on CPUs with and without SHA
+        # instructions; collisions only need to be unlikely, not hard to find
+        return hashlib.sha1(usedforsecurity=False)
+
+
+logger = logging.getLogger(__name__)
+
+
+class UnhashableError(Exception):
+    """Raised by a fingerprint function for values it can't fingerprint."""
+
+
+@singledispatch
+def _fingerprint(value: Any, hasher) -> None:
+    """Feed a stable description of ``value`` into ``hasher``.
+
+    Types without a registered function fall back to their pickled bytes.
+    """
+    try:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        raise UnhashableError(f"{type(value).__name__} can't be pickled: {e}") from e
+    hasher.update(data)
+
+
+def register_fingerprint(cls: type, func: Callable | None = None):
+    """
+    Register how values of ``cls`` (and subclasses) are fingerprinted.
+
+    ``func(value, hasher)`` feeds bytes describing the value into ``hasher``
+    with ``hasher.update(...)``, and raises UnhashableError if it can't. Can be
+    used as a decorator::
+
+        @register_fingerprint(MyModel)
+        def _(model, hasher):
+            hasher.update(model.checksum.encode())
+    """
+    if func is None:
+        return lambda f: register_fingerprint(cls, f)
+    return _fingerprint.register(cls, func)
+
+
+def _update(value: Any, hasher) -> None:
+    """Fingerprint a nested value, prefixed by its type to keep 1 and "1" apart."""
+    hasher.update(type(value).__qualname__.encode())
+    _fingerprint(value, hasher)
+
+
+@_fingerprint.register(type(None))
+@_fingerprint.register(bool)
+@_fingerprint.register(int)
+@_fingerprint.register(float)
+@_fingerprint.register(complex)
+def _(value, hasher):
+    hasher.update(repr(value).encode())
+
+
+@_fingerprint.register(str)
+def _(value, hasher):
+    hasher.update(value.encode("utf-8", "surrogatepass"))
+
+
+@_fingerprint.register(bytes)
+@_fingerprint.register(bytearray)
+def _(value, hasher):
+    hasher.update(value)
+
+
+@_fingerprint.register(list)
+@_fingerprint.register(tuple)
+def _(value, hasher):
+    hasher.update(f"[{len(value)}]".encode())
+    for item in value:
+        _update(item, hasher)
+
+
+@_fingerprint.register(set)
+@_fingerprint.register(frozenset)
+def _(value, hasher):
+    # Order-independent: combine the items' own fingerprints sorted
+    hasher.update(f"{{{len(value)}}}".encode())
+    for digest in sorted(_digest(item) for item in value):
+        hasher.update(digest.encode())
+
+
+@_fingerprint.register(dict)
+def _(value, hasher):
+    hasher.update(f"{{{len(value)}}}".encode())
+    for key, item in value.items():
+        _update(key, hasher)
+        _update(item, hasher)
+
+
+@_fingerprint.register(np.ndarray)
+def _(value, hasher):
+    hasher.update(f"{value.dtype.str}{value.shape}".encode())
+    if value.dtype.hasobject:
+        # Elements are Python objects; hash them via pandas row hashing
+        _update(pd.Series(value.ravel()), hasher)
+        return
+    hasher.update(_raw_bytes(value))
+
+
+@_fingerprint.register(np.generic)
+def _(value, hasher):
+    hasher.update(f"{value.dtype.str}{value!r}".encode())
+
+
+@_fingerprint.register(pd.Index)
+def _(value, hasher):
+    if isinstance(value, pd.RangeIndex):
+        hasher.update(f"{value.start}:{value.stop}:{value.step}".encode())
+    else:
+        _update(pd.Series(value, copy=False), hasher)
+    _update(value.name, hasher)
+
+
+@_fingerprint.register(pd.Series)
+def _(value, hasher):
+    hasher.update(f"{value.dtype}{len(value)}".encode())
+    _update(value.name, hasher)
+    _update(value.index, hasher)
+    _hash_column(value, hasher)
+
+
+@_fingerprint.register(pd.DataFrame)
+def _(value, hasher):
+    hasher.update(f"{value.shape}".encode())
+    _update(value.index, hasher)
+    _update(list(value.columns), hasher)
+    for _, column in value.items():
+        hasher.update(str(column.dtype).encode())
+        _hash_column(column, hasher)
+
+
+def _raw_bytes(array: np.ndarray) -> np.ndarray:
+    # A flat uint8 view exposes any non-object dtype, datetimes included,
+    # through the buffer protocol without copying contiguous data
+    return np.ascontiguousarray(array).reshape(-1).view(np.uint8)
+
+
+def _hash_column(column: pd.Series, hasher) -> None:
+    # Numeric and datetime columns are hashed straight from their buffer;
+    # anything else (objects, strings, categoricals, extension arrays) goes
+    # through pandas' vectorized row hashing
+    if isinstance(column.dtype, np.dtype) and not column.dtype.hasobject:
+        hasher.update(_raw_bytes(column.to_numpy(copy=False)))
+        return
+    try:
+        hashed = pd.util.hash_pandas_object(column, index=False)
+    except TypeError:  # e.g. lists or dicts inside an object column
+        _update(column.to_list(), hasher)
+        return
+    hasher.update(hashed.to_numpy().data)
+
+
+def _digest(value: Any) -> str:
+    hasher = _new_hasher()
+    _update(value, hasher)
+    return hasher.hexdigest()
+
+
+class Fingerprinter:
+    """
+    Content fingerprints of atom inputs, used as workflow cache keys.
+
+    DataFrames returned as-is by the DataManager are identified by their
+    source and version, without reading their contents. Frames and arrays are
+    hashed column by column from their buffers; other values by type through
+    functions registered with register_fingerprint.
+
+    Fingerprints are memoized by object id, guarded by a weak reference so a
+    reused id never hits. The memo is cleared by reset(), at the start of
+    every workflow execution: objects may be mutated between runs.
+    """
+
+    def __init__(self):
+        self._memo: dict[int, tuple[weakref.ref, str | None]] = {}
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._memo.clear()
+
+    def fingerprint(self, value: Any, portable: bool = False) -> str | None:
+        """Fingerprint of ``value``, or None if it can't be fingerprinted.
+
+        Portable fingerprints hash data source frames by content too, for
+        keys that must hold across processes.
+        """
+        version_key = None if portable else data_version_key(value)
+        if version_key is not None:
+            return f"source:{version_key!r}"
+
+        value_id = id(value)
+        entry = self._memo.get(value_id)
+        if entry is not None and entry[0]() is value:
+            return entry[1]
+
+        try:
+            digest = _digest(value)
+        except UnhashableError as e:
+            logger.debug(f"Can't fingerprint {type(value).__name__}: {e}")
+            digest = None
+        except RecursionError:
+            digest = None
+
+        try:
+            ref = weakref.ref(value)
+        except TypeError:  # builtins like dict and list can't be weakly referenced
+            return digest
+        with self._lock:
+            self._memo[value_id] = (ref, digest)
+        return digest
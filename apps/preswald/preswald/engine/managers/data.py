@@ -1,16 +1,27 @@
+import hashlib
+import itertools
 import json
 import logging
 import os
+import time
 import uuid
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
 from typing import Any
 
 import duckdb
+import numpy as np
 import pandas as pd
 import requests
 import toml
 from requests.auth import HTTPBasicAuth
 
+from ..tracing import span
+from .indexes import SpatialIndex, TextIndex, TimeIndex
+from .store import DataStore
+
 
 logger = logging.getLogger(__name__)
 
@@ -82,12 +93,106 @@ class S3CSVConfig:
     s3_url_style: str = "path"
 
 
+# Data Versions ###############################################################
+# Every (re)load of a source draws a new version from one process-wide counter,
+# so versions only ever grow and never repeat across sources or managers.
+_version_counter = itertools.count(1)
+_store_alias_counter = itertools.count(1)
+
+# id(frame) -> (weakref to frame, (source, version, query), shallow copy, layout).
+# The weakref is what ties a key to one exact DataFrame: attrs are copied onto
+# derived frames by pandas, so they cannot tell a filtered copy from the frame
+# that was read. The shallow copy shares the frame's data, so under
+# copy-on-write a change to the frame in place copies the data it changes
+# first, which shows in its layout.
+_tagged_frames: dict[int, tuple[weakref.ref, tuple, pd.DataFrame, tuple]] = {}
+
+
+def _copy_on_write() -> bool:
+    # Always on from pandas 3, where reading the option warns
+    return int(pd.__version__.split(".")[0]) >= 3 or (
+        getattr(pd.options.mode, "copy_on_write", False) is True
+    )
+
+
+def _layout(df: pd.DataFrame) -> tuple:
+    """Identities of a frame's arrays and axes"""
+    return (
+        tuple(id(block.values) for block in df._mgr.blocks),
+        id(df.columns),
+        id(df.index),
+    )
+
+
+def tag_frame(
+    df: pd.DataFrame, source_name: str, version: int, query: str | None = None
+) -> pd.DataFrame:
+    """Record the source version a DataFrame was read from"""
+    df.attrs["preswald_source"] = {
+        "name": source_name,
+        "version": version,
+        "query": query,
+    }
+    if not _copy_on_write():
+        # Changes in place would go unnoticed; the frame is hashed instead
+        return df
+    frame_id = id(df)
+
+    def _forget(ref, frame_id=frame_id):
+        if _tagged_frames.get(frame_id, (None,))[0] is ref:
+            del _tagged_frames[frame_id]
+
+    _tagged_frames[frame_id] = (
+        weakref.ref(df, _forget),
+        (source_name, version, query),
+        df.copy(deep=False),
+        _layout(df),
+    )
+    return df
+
+
+# Source name -> version read, collected while a workflow atom runs so its cached
+# result can be dropped once one of those sources is reloaded. Live sources are
+# recorded with version None: their results can change without a reload.
+_source_reads: ContextVar[dict[str, int | None] | None] = ContextVar(
+    "preswald_source_reads", default=None
+)
+
+
+@contextmanager
+def record_source_reads(reads: dict[str, int | None]):
+    """Collect the versions of all sources read inside the block into ``reads``"""
+    token = _source_reads.set(reads)
+    try:
+        yield reads
+    finally:
+        _source_reads.reset(token)
+
+
+def data_version_key(value: Any) -> tuple | None:
+    """
+    Return (source, version, query) if value is a DataFrame exactly as returned
+    by the DataManager, or None for anything else, including frames derived
+    from one and frames changed in place since. Caches can key on this instead
+    of hashing the frame contents.
+    """
+    entry = _tagged_frames.get(id(value))
+    if entry is None or entry[0]() is not value:
+        return None
+    if _layout(value) != entry[3]:
+        # Changed in place: forget the version, and the data it shared
+        _tagged_frames.pop(id(value), None)
+        return None
+    return entry[1]
+
+
 class DataSource:
     """Base class for all data sources"""
 
     def __init__(self, name: str, duckdb_conn: duckdb.DuckDBPyConnection):
         self.name = name
         self._duckdb = duckdb_conn
+        self.version = next(_version_counter)
 
     def query(self, sql: str) -> pd.DataFrame:
         raise NotImplementedError
@@ -384,15 +489,58 @@ class ParquetSource(DataSource):
         return self._duckdb.execute(f"SELECT * FROM {self._table_name}").df()
 
 
+class StoredTableSource(DataSource):
+    """A source served from a table in an attached, read-only data store
+
+    Queries name the source itself: a temporary view of that name points at
+    the store table, so the SQL runs as written.
+    """
+
+    def __init__(
+        self, name: str, table_name: str, duckdb_conn: duckdb.DuckDBPyConnection
+    ):
+        super().__init__(name, duckdb_conn)
+        self._table_name = table_name
+        self._view_name = '"' + name.replace('"', '""') + '"'
+        self._duckdb.execute(
+            f"CREATE OR REPLACE TEMP VIEW {self._view_name} AS "
+            f"SELECT * FROM {table_name}"
+        )
+
+    def query(self, sql: str) -> pd.DataFrame:
+        return self._duckdb.execute(sql).df()
+
+    def drop_view(self) -> None:
+        self._duckdb.execute(f"DROP VIEW IF EXISTS {self._view_name}")
+
+    def to_df(self) -> pd.DataFrame:
+        return self._duckdb.execute(f"SELECT * FROM {self._table_name}").df()
+
+
 class DataManager:
-    def __init__(self, preswald_path: str, secrets_path: str | None = None):
+    def __init__(
+        self,
+        preswald_path: str,
+        secrets_path: str | None = None,
+        database: str = ":memory:",
+        use_store: bool = True,
+    ):
         self.preswald_path = preswald_path
         self.secrets_path = secrets_path
+        self.use_store = use_store
+        self.store: DataStore | None = None
+        self._store_generation: str | None = None
+        self._store_alias: str | None = None
+        self._store_manifest: dict[str, dict] = {}
+        self._stored_names: set[str] = set()
         self.sources: dict[str, DataSource] = {}
         self.sources_cache: dict[str, dict] = {}  # Cache of source configurations
-        self.duckdb_conn = duckdb.connect(":memory:")
+        self.spatial_indexes: dict[str, SpatialIndex] = {}
+        self.time_indexes: dict[str, TimeIndex] = {}
+        self.text_indexes: dict[str, TextIndex] = {}
+        self.duckdb_conn = duckdb.connect(database)
 
-    def connect(self):  # noqa: C901
+    def connect(self):
         """Initialize all data sources from config"""
         # Useful debugging query - Log final DuckDB state
         # tables_df = self.duckdb_conn.execute("""
@@ -410,10 +558,11 @@ class DataManager:
         #     )
 
         config = self._load_sources()
+        stored = self._sync_store(config)
 
         # Only process sources that are new or have changed
         for name, source_config in config.items():
-            if "type" not in source_config:
+            if "type" not in source_config or name in stored:
                 continue
 
             if not self._has_source_changed(name, source_config):
@@ -421,75 +570,17 @@ class DataManager:
                 continue
 
             if name in self.sources:
+                self._drop_indexes(name)
                 self._drop_source_table(self.sources[name])
 
             source_type = source_config["type"]
             logger.info(f"Initializing/updating source: {name} ({source_type})")
 
             try:
-                if source_type == "csv":
-                    cfg = CSVConfig(path=source_config["path"])
-                    self.sources[name] = CSVSource(name, cfg, self.duckdb_conn)
-
-                elif source_type == "json":
-                    cfg = JSONConfig(
-                        path=source_config["path"],
-                        record_path=source_config.get("record_path"),
-                        flatten=source_config.get("flatten", True),
-                    )
-                    self.sources[name] = JSONSource(name, cfg, self.duckdb_conn)
-
-                elif source_type == "postgres":
-                    cfg = PostgresConfig(
-                        host=source_config["host"],
-                        port=source_config["port"],
-                        dbname=source_config["dbname"],
-                        user=source_config["user"],
-                        password=source_config["password"],
-                    )
-                    self.sources[name] = PostgresSource(name, cfg, self.duckdb_conn)
-
-                elif source_type == "clickhouse":
-                    cfg = ClickhouseConfig(
-                        host=source_config["host"],
-                        port=source_config["port"],
-                        database=source_config["database"],
-                        user=source_config["user"],
-                        password=source_config["password"],
-                        secure=source_config.get("secure", False),
-                        verify=source_config.get("verify", True),
-                    )
-                    self.sources[name] = ClickhouseSource(name, cfg, self.duckdb_conn)
-
-                elif source_type == "api":
-                    cfg = APIConfig(
-                        url=source_config["url"],
-                        method=source_config.get("method", "GET"),
-                        headers=source_config.get("headers"),
-                        params=source_config.get("params"),
-                        auth=source_config.get("auth"),
-                        pagination=source_config.get("pagination"),
-                    )
-                    self.sources[name] = APISource(name, cfg, self.duckdb_conn)
-
-                elif source_type == "s3csv":
-                    cfg = S3CSVConfig(
-                        s3_endpoint=source_config["s3_endpoint"],
-                        s3_region=source_config["s3_region"],
-                        s3_access_key_id=source_config["s3_access_key_id"],
-                        s3_secret_access_key=source_config["s3_secret_access_key"],
-                        path=source_config["path"],
-                        s3_use_ssl=source_config.get("s3_use_ssl", False),
-                        s3_url_style=source_config.get("s3_url_style", "path"),
-                    )
-                    self.sources[name] = S3CSVSource(name, cfg, self.duckdb_conn)
-
-                elif source_type == "parquet":
-                    cfg = ParquetConfig(
-                        path=source_config["path"],
-                        columns=source_config.get("columns"),
-                    )
-                    self.sources[name] = ParquetSource(name, cfg, self.duckdb_conn)
+                source = self._create_source(name, source_config)
+                if source is not None:
+                    self.sources[name] = source
+                    self._build_indexes(name, source_config)
 
                 # Cache the config after successful initialization
                 self.sources_cache[name] = source_config
@@ -499,20 +590,177 @@ class DataManager:
                 continue
         return self.sources.keys(), self.duckdb_conn
 
+    def refresh_store(self) -> bool:
+        """Switch to a newly published data store generation, if there is one.
+
+        Only reads the store's ``CURRENT`` pointer when nothing was published
+        since the last check, so it is cheap enough to call on every rerun.
+        """
+        if self.store is None:
+            return False
+        generation = self.store.current_generation()
+        if generation is None or generation == self._store_generation:
+            return False
+        self.connect()
+        return True
+
     def query(self, sql: str, source_name: str) -> pd.DataFrame:
         """Query a specific data source"""
-        source = self._get_or_create_source(source_name)
-        return source.query(sql)
+        with span("query", "data", source=source_name, sql=sql) as args:
+            source = self._get_or_create_source(source_name)
+            df = source.query(sql)
+            args["rows"] = len(df)
+        return self._tag(df, source_name, sql)
+
+    def get_version(self, source_name: str) -> int | None:
+        """Current version of a loaded source, bumped every time it is (re)loaded"""
+        source = self.sources.get(source_name)
+        return source.version if source else None
+
+    def query_bbox(
+        self,
+        source_name: str,
+        bbox: tuple[float, float, float, float],
+        max_points: int = 5000,
+    ) -> pd.DataFrame:
+        """Query the points of a spatially indexed source inside a bounding box"""
+        index = self.spatial_indexes.get(source_name)
+        if index is None:
+            raise ValueError(
+                f"Source '{source_name}' has no spatial index. "
+                "Set lat_column and lon_column for it in preswald.toml"
+            )
+        return self._tag(
+            index.query_bbox(bbox, max_points=max_points),
+            source_name,
+            f"query_bbox({tuple(bbox)!r}, max_points={max_points})",
+        )
+
+    def time_range(
+        self,
+        source_name: str,
+        start: Any = None,
+        end: Any = None,
+        bucket: str | None = None,
+    ) -> pd.DataFrame:
+        """Query a time indexed source over [start, end), optionally resampled"""
+        index = self.time_indexes.get(source_name)
+        if index is None:
+            raise ValueError(
+                f"Source '{source_name}' has no time index. "
+                "Set time_column for it in preswald.toml"
+            )
+        return self._tag(
+            index.time_range(start, end, bucket=bucket),
+            source_name,
+            f"time_range({start!r}, {end!r}, bucket={bucket!r})",
+        )
+
+    def search(
+        self,
+        source_name: str,
+        query: str,
+        limit: int | None = 100,
+        ids_only: bool = False,
+    ) -> pd.DataFrame | np.ndarray:
+        """Full-text search over the indexed columns of a source"""
+        index = self.text_indexes.get(source_name)
+        if index is None:
+            raise ValueError(
+                f"Source '{source_name}' has no text index. "
+                f"Add a [data.{source_name}.search] section to preswald.toml"
+            )
+        if ids_only:
+            return self._tag(index.search_ids(query, limit), source_name, None)
+        return self._tag(
+            index.search(query, limit),
+            source_name,
+            f"search({query!r}, limit={limit})",
+        )
 
     def get_df(self, source_name: str, table_name: str | None = None) -> pd.DataFrame:
         """Get entire source as DataFrame"""
-        source = self._get_or_create_source(source_name)
+        with span("get_df", "data", source=source_name, table=table_name) as args:
+            source = self._get_or_create_source(source_name)
+
+            if isinstance(source, PostgresSource):
+                if table_name is None:
+                    raise ValueError("table_name is required for Postgres sources")
+                df = source.to_df(table_name)
+            else:
+                df = source.to_df()
+            args["rows"] = len(df)
+        return self._tag(df, source_name, table_name)
 
-        if isinstance(source, PostgresSource):
-            if table_name is None:
-                raise ValueError("table_name is required for Postgres sources")
-            return source.to_df(table_name)
-        return source.to_df()
+    def build_store(self, keep: int = 2) -> str:
+        """Load every source into a new data store generation and publish it.
+
+        Run this from a single loader process. Workers pick the new generation
+        up on their next run or rerun without loading anything themselves.
+        """
+        config = self._load_sources()
+        if self.store is None:
+            raise ValueError("No [data_store] path configured in preswald.toml")
+
+        generation = self.store.new_generation()
+        builder = DataManager(
+            self.preswald_path,
+            self.secrets_path,
+            database=self.store.database_path(generation),
+            use_store=False,
+        )
+        builder.connect()
+
+        sources = {}
+        for name, source in builder.sources.items():
+            if not hasattr(source, "_table_name") or name not in config:
+                continue
+            entry = {
+                "type": config[name]["type"],
+                "table": source._table_name,
+                "config_hash": _config_hash(config[name]),
+            }
+            if index := builder.spatial_indexes.get(name):
+                entry["spatial"] = {
+                    "lat_column": index.lat_column,
+                    "lon_column": index.lon_column,
+                    "grid_size": index.grid_size,
+                }
+            if index := builder.time_indexes.get(name):
+                entry["time"] = {
+                    "time_column": index.time_column,
+                    "rollups": index.rollups,
+                    "value_columns": index.value_columns,
+                }
+            if index := builder.text_indexes.get(name):
+                index.save(self.store.text_index_prefix(generation, name))
+                entry["text"] = {"columns": index.columns}
+            sources[name] = entry
+
+        builder.duckdb_conn.execute("CHECKPOINT")
+        builder.duckdb_conn.close()
+
+        self.store.write_manifest(
+            generation, {"created_at": time.time(), "sources": sources}
+        )
+        self.store.publish(generation, keep=keep)
+        return generation
+
+    def _tag(
+        self, df: pd.DataFrame, source_name: str, query: str | None
+    ) -> pd.DataFrame:
+        """Tag a result with its source version if the source is a loaded snapshot.
+
+        Live database sources can change between two reads of the same version,
+        so their results are left untagged and get hashed like any other frame.
+        """
+        source = self.sources[source_name]
+        is_snapshot = hasattr(source, "_table_name")
+        if (reads := _source_reads.get()) is not None:
+            reads[source_name] = source.version if is_snapshot else None
+        if isinstance(df, pd.DataFrame) and is_snapshot:
+            tag_frame(df, source_name, source.version, query)
+        return df
 
     def _get_or_create_source(self, source_name: str) -> DataSource:
         """Get an existing source or create a new one from a file path."""
@@ -541,6 +789,76 @@ class DataManager:
 
         return self.sources[source_name]
 
+    def _create_source(self, name: str, config: dict) -> DataSource | None:
+        """Create the source described by a ``[data.<name>]`` config section"""
+        source_type = config["type"]
+        if source_type == "csv":
+            cfg = CSVConfig(path=config["path"])
+            return CSVSource(name, cfg, self.duckdb_conn)
+
+        elif source_type == "json":
+            cfg = JSONConfig(
+                path=config["path"],
+                record_path=config.get("record_path"),
+                flatten=config.get("flatten", True),
+            )
+            return JSONSource(name, cfg, self.duckdb_conn)
+
+        elif source_type == "postgres":
+            cfg = PostgresConfig(
+                host=config["host"],
+                port=config["port"],
+                dbname=config["dbname"],
+                user=config["user"],
+                password=config["password"],
+            )
+            return PostgresSource(name, cfg, self.duckdb_conn)
+
+        elif source_type == "clickhouse":
+            cfg = ClickhouseConfig(
+                host=config["host"],
+                port=config["port"],
+                database=config["database"],
+                user=config["user"],
+                password=config["password"],
+                secure=config.get("secure", False),
+                verify=config.get("verify", True),
+            )
+            return ClickhouseSource(name, cfg, self.duckdb_conn)
+
+        elif source_type == "api":
+            cfg = APIConfig(
+                url=config["url"],
+                method=config.get("method", "GET"),
+                headers=config.get("headers"),
+                params=config.get("params"),
+                auth=config.get("auth"),
+                pagination=config.get("pagination"),
+            )
+            return APISource(name, cfg, self.duckdb_conn)
+
+        elif source_type == "s3csv":
+            cfg = S3CSVConfig(
+                s3_endpoint=config["s3_endpoint"],
+                s3_region=config["s3_region"],
+                s3_access_key_id=config["s3_access_key_id"],
+                s3_secret_access_key=config["s3_secret_access_key"],
+                path=config["path"],
+                s3_use_ssl=config.get("s3_use_ssl", False),
+                s3_url_style=config.get("s3_url_style", "path"),
+            )
+            return S3CSVSource(name, cfg, self.duckdb_conn)
+
+        elif source_type == "parquet":
+            cfg = ParquetConfig(
+                path=config["path"],
+                columns=config.get("columns"),
+            )
+            return ParquetSource(name, cfg, self.duckdb_conn)
+
+        logger.warning(f"Unsupported source type '{source_type}' for source '{name}'")
+        return None
+
     def _has_source_changed(self, name: str, config: dict) -> bool:
         """Check if a source's configuration has changed"""
         if name not in self.sources_cache:
@@ -555,6 +873,165 @@ class DataManager:
             logger.info(f"Dropping table {source._table_name}")
             self.duckdb_conn.execute(f"DROP TABLE IF EXISTS {source._table_name}")
 
+    def _build_indexes(self, name: str, config: dict) -> None:
+        """Build the optional indexes declared for a source in preswald.toml"""
+        source = self.sources[name]
+        wants_spatial = "lat_column" in config or "lon_column" in config
+        wants_time = "time_column" in config
+        wants_text = "search" in config
+
+        if not (wants_spatial or wants_time or wants_text):
+            return
+
+        if not hasattr(source, "_table_name"):
+            logger.warning(
+                f"Indexes are not supported for {config['type']} source '{name}'"
+            )
+            return
+
+        if wants_spatial:
+            if "lat_column" not in config or "lon_column" not in config:
+                logger.warning(
+                    f"Spatial index for '{name}' needs both lat_column and lon_column"
+                )
+            else:
+                try:
+                    index = SpatialIndex(
+                        self.duckdb_conn,
+                        source._table_name,
+                        lat_column=config["lat_column"],
+                        lon_column=config["lon_column"],
+                        grid_size=config.get("grid_size", 1.0),
+                    )
+                    index.build()
+                    self.spatial_indexes[name] = index
+                except Exception as e:
+                    logger.error(f"Error building spatial index for '{name}': {e}")
+
+        if wants_time:
+            try:
+                index = TimeIndex(
+                    self.duckdb_conn,
+                    source._table_name,
+                    time_column=config["time_column"],
+                    rollups=config.get("time_rollups"),
+                )
+                index.build()
+                self.time_indexes[name] = index
+            except Exception as e:
+                logger.error(f"Error building time index for '{name}': {e}")
+
+        if wants_text:
+            try:
+                index = TextIndex(
+                    self.duckdb_conn,
+                    source._table_name,
+                    columns=config["search"].get("columns", []),
+                )
+                index.build()
+                self.text_indexes[name] = index
+            except Exception as e:
+                logger.error(f"Error building text index for '{name}': {e}")
+
+    def _drop_indexes(self, name: str) -> None:
+        """Drop any index tables built for a source"""
+        for indexes in (self.spatial_indexes, self.time_indexes, self.text_indexes):
+            if index := indexes.pop(name, None):
+                index.drop()
+
+    def _sync_store(self, config: dict[str, Any]) -> set[str]:
+        """Serve sources from the published data store where possible.
+
+        Returns the names served from the store. A source whose config no
+        longer matches the one the store was built from is loaded in memory
+        instead, as is everything when no store has been published yet.
+        """
+        if self.store is None:
+            return set()
+
+        generation = self.store.current_generation()
+        if generation is None:
+            # Keep serving an already attached generation rather than reloading
+            return set(self._stored_names)
+
+        if generation != self._store_generation:
+            try:
+                self._attach_generation(generation)
+            except Exception as e:
+                logger.error(f"Error attaching data store generation {generation}: {e}")
+                return set(self._stored_names)
+
+        for name, entry in self._store_manifest.items():
+            matches = (
+                name in config and _config_hash(config[name]) == entry["config_hash"]
+            )
+            if matches and name not in self._stored_names:
+                self._register_stored_source(name, entry, config[name])
+            elif not matches and name in self._stored_names:
+                logger.info(f"Config for '{name}' changed, loading it in memory")
+                self._unregister_stored_source(name)
+
+        return set(self._stored_names)
+
+    def _attach_generation(self, generation: str) -> None:
+        """Attach a store generation read-only and switch stored sources to it"""
+        manifest = self.store.read_manifest(generation)
+        alias = f"preswald_store_{next(_store_alias_counter)}"
+        database = self.store.database_path(generation).replace("'", "''")
+        self.duckdb_conn.execute(f"ATTACH '{database}' AS {alias} (READ_ONLY)")
+
+        old_alias = self._store_alias
+        for name in list(self._stored_names):
+            self._unregister_stored_source(name)
+
+        self._store_generation = generation
+        self._store_alias = alias
+        self._store_manifest = manifest.get("sources", {})
+        logger.info(f"Attached data store generation {generation} as {alias}")
+
+        if old_alias:
+            self.duckdb_conn.execute(f"DETACH {old_alias}")
+
+    def _register_stored_source(self, name: str, entry: dict, config: dict) -> None:
+        """Serve a source and its indexes from the attached store generation"""
+        if name in self.sources and name not in self._stored_names:
+            self._drop_indexes(name)
+            self._drop_source_table(self.sources[name])
+
+        table = f"{self._store_alias}.{entry['table']}"
+        self.sources[name] = StoredTableSource(name, table, self.duckdb_conn)
+        self._stored_names.add(name)
+        self.sources_cache[name] = config
+
+        if spatial := entry.get("spatial"):
+            self.spatial_indexes[name] = SpatialIndex(
+                self.duckdb_conn, table, **spatial
+            )
+        if time_config := entry.get("time"):
+            index = TimeIndex(
+                self.duckdb_conn,
+                table,
+                time_column=time_config["time_column"],
+                rollups=time_config["rollups"],
+            )
+            index.value_columns = time_config["value_columns"]
+            self.time_indexes[name] = index
+        if text := entry.get("text"):
+            index = TextIndex(self.duckdb_conn, table, columns=text["columns"])
+            index.load(self.store.text_index_prefix(self._store_generation, name))
+            self.text_indexes[name] = index
+
+        logger.info(f"Serving source '{name}' from data store table {table}")
+
+    def _unregister_stored_source(self, name: str) -> None:
+        """Forget a store-backed source so the next connect() reloads it"""
+        self._stored_names.discard(name)
+        if isinstance(source := self.sources.pop(name, None), StoredTableSource):
+            source.drop_view()
+        self.sources_cache.pop(name, None)
+        for indexes in (self.spatial_indexes, self.time_indexes, self.text_indexes):
+            indexes.pop(name, None)
+
     def _load_sources(self) -> dict[str, Any]:
         """Load data sources from preswald config and secrets files."""
         try:
@@ -567,6 +1044,12 @@ class DataManager:
             data_config = config.get("data", {})
             logger.info("Successfully loaded preswald.toml")
 
+            store_path = config.get("data_store", {}).get("path")
+            if self.use_store and store_path:
+                root = os.path.join(os.path.dirname(self.preswald_path), store_path)
+                if self.store is None or self.store.root != root:
+                    self.store = DataStore(root)
+
             if self.secrets_path and os.path.exists(self.secrets_path):
                 secrets = toml.load(self.secrets_path)
                 logger.info("Successfully loaded secrets.toml")
@@ -585,6 +1068,13 @@ class DataManager:
             raise
 
 
+def _config_hash(config: dict[str, Any]) -> str:
+    """Stable digest of a source config; stored instead of the config itself
+    because it carries secrets merged in from secrets.toml"""
+    encoded = json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
 def _load_json_source(config: dict[str, Any]) -> pd.DataFrame:
     path = config["path"]
     record_path = config.get("record_path")
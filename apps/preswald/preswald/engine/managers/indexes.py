@@ -0,0 +1,531 @@
+import logging
+import math
+import re
+from typing import Any, ClassVar
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+
+class SpatialIndex:
+    """
+    Fixed-grid index over the lat/lon columns of a DuckDB table.
+
+    At build time the source rows are copied into a companion table with a
+    ``__cell`` bucket column and sorted by it. DuckDB keeps min/max zone maps
+    per row group, so a viewport query only scans the row groups whose cells
+    can intersect the bounding box.
+    """
+
+    def __init__(
+        self,
+        duckdb_conn: duckdb.DuckDBPyConnection,
+        table_name: str,
+        lat_column: str,
+        lon_column: str,
+        grid_size: float = 1.0,
+    ):
+        if grid_size <= 0:
+            raise ValueError(f"grid_size must be positive, got {grid_size}")
+
+        self._duckdb = duckdb_conn
+        self.table_name = table_name
+        self.lat_column = lat_column
+        self.lon_column = lon_column
+        self.grid_size = float(grid_size)
+        self.index_table = f"{table_name}_geo"
+        self._cols = math.ceil(360 / self.grid_size)
+
+    def build(self) -> None:
+        """Materialize the grid-sorted companion table"""
+        self._duckdb.execute(f"""
+            CREATE OR REPLACE TABLE {self.index_table} AS
+            SELECT
+                *,
+                CAST(FLOOR((__lat + 90) / {self.grid_size}) AS BIGINT) * {self._cols}
+                    + LEAST(
+                        CAST(FLOOR((__lon + 180) / {self.grid_size}) AS BIGINT),
+                        {self._cols - 1}
+                    ) AS __cell
+            FROM (
+                SELECT
+                    *,
+                    TRY_CAST("{self.lat_column}" AS DOUBLE) AS __lat,
+                    TRY_CAST("{self.lon_column}" AS DOUBLE) AS __lon
+                FROM {self.table_name}
+            )
+            WHERE __lat BETWEEN -90 AND 90 AND __lon BETWEEN -180 AND 180
+            ORDER BY __cell
+        """)
+        logger.info(
+            f"Built spatial index {self.index_table} "
+            f"({self.lat_column}, {self.lon_column}, grid={self.grid_size})"
+        )
+
+    def drop(self) -> None:
+        self._duckdb.execute(f"DROP TABLE IF EXISTS {self.index_table}")
+
+    def query_bbox(
+        self, bbox: tuple[float, float, float, float], max_points: int = 5000
+    ) -> pd.DataFrame:
+        """
+        Return the rows inside ``bbox`` given as (west, south, east, north).
+
+        If more than ``max_points`` rows fall inside the box, the box is split
+        into at most ``max_points`` cells and one row per non-empty cell is
+        returned instead, with the centroid of its points in the lat/lon
+        columns and the number of points in a ``count`` column. A ``west``
+        greater than ``east`` selects a box crossing the antimeridian.
+        """
+        west, south, east, north = (float(v) for v in bbox)
+        if south > north:
+            raise ValueError(f"Invalid bbox {bbox}: south is greater than north")
+        if max_points <= 0:
+            raise ValueError(f"max_points must be positive, got {max_points}")
+        south, north = max(south, -90.0), min(north, 90.0)
+
+        where, params = self._bbox_predicate(west, south, east, north)
+
+        count = self._duckdb.execute(
+            f"SELECT COUNT(*) FROM {self.index_table} WHERE {where}", params
+        ).fetchone()[0]
+
+        if count <= max_points:
+            return self._duckdb.execute(
+                f"""
+                SELECT * EXCLUDE (__lat, __lon, __cell)
+                FROM {self.index_table}
+                WHERE {where}
+                """,
+                params,
+            ).df()
+
+        return self._aggregate(west, south, east, north, max_points, where, params)
+
+    def _bbox_predicate(
+        self, west: float, south: float, east: float, north: float
+    ) -> tuple[str, list[float]]:
+        # Cells are numbered row-major by latitude band, so a band range maps
+        # to one contiguous __cell range that the zone maps can prune on.
+        first_row = math.floor((south + 90) / self.grid_size)
+        last_row = math.floor((north + 90) / self.grid_size)
+        cell_lo = first_row * self._cols
+        cell_hi = (last_row + 1) * self._cols - 1
+
+        if west <= east:
+            lon_clause = "__lon BETWEEN ? AND ?"
+        else:
+            lon_clause = "(__lon >= ? OR __lon <= ?)"
+
+        where = f"__cell BETWEEN ? AND ? AND __lat BETWEEN ? AND ? AND {lon_clause}"
+        return where, [cell_lo, cell_hi, south, north, west, east]
+
+    def _aggregate(
+        self,
+        west: float,
+        south: float,
+        east: float,
+        north: float,
+        max_points: int,
+        where: str,
+        params: list[float],
+    ) -> pd.DataFrame:
+        width = east - west if west <= east else east - west + 360
+        height = north - south
+
+        # Pick a cell shape close to square that keeps the cell count in budget
+        side = math.sqrt(max(width * height, 1e-12) / max_points)
+        nx = max(1, min(max_points, math.ceil(width / side) if width else 1))
+        ny = max(1, max_points // nx)
+        cell_w = (width or 1e-9) / nx
+        cell_h = (height or 1e-9) / ny
+
+        if west <= east:
+            lon_avg, lon_params = "AVG(__lon)", []
+        else:
+            # Average the offsets east of ``west`` so a cell straddling the
+            # antimeridian doesn't get a centroid on the far side of the globe
+            lon_avg = "(AVG((__lon - ? + 360) % 360) + ? + 180) % 360 - 180"
+            lon_params = [west, west]
+
+        return self._duckdb.execute(
+            f"""
+            SELECT
+                AVG(__lat) AS "{self.lat_column}",
+                {lon_avg} AS "{self.lon_column}",
+                COUNT(*) AS count
+            FROM {self.index_table}
+            WHERE {where}
+            GROUP BY
+                LEAST(CAST(FLOOR((__lat - ?) / ?) AS BIGINT), {ny - 1}),
+                LEAST(CAST(FLOOR(((__lon - ?) + 360) % 360 / ?) AS BIGINT), {nx - 1})
+            """,
+            [*lon_params, *params, south, cell_h, west, cell_w],
+        ).df()
+
+
+class TimeIndex:
+    """
+    Time-sorted copy of a DuckDB table plus precomputed rollups.
+
+    The companion table is ordered by the parsed timestamp, so DuckDB's
+    per-row-group min/max zone maps turn range filters into a scan of only
+    the matching row groups. Each rollup table holds, per time bucket, the
+    row count and the count/sum/min/max of every numeric column, which is
+    enough to answer coarser resample queries without touching the rows.
+    """
+
+    ROLLUP_GRAINS = ("minute", "hour", "day")
+    BUCKETS = ("minute", "hour", "day", "week", "month", "quarter", "year")
+    _PANDAS_FREQ: ClassVar[dict[str, str]] = {"minute": "min", "hour": "h", "day": "D"}
+
+    def __init__(
+        self,
+        duckdb_conn: duckdb.DuckDBPyConnection,
+        table_name: str,
+        time_column: str,
+        rollups: list[str] | None = None,
+    ):
+        rollups = list(self.ROLLUP_GRAINS if rollups is None else rollups)
+        for grain in rollups:
+            if grain not in self.ROLLUP_GRAINS:
+                raise ValueError(
+                    f"Unsupported rollup '{grain}', expected one of {self.ROLLUP_GRAINS}"
+                )
+
+        self._duckdb = duckdb_conn
+        self.table_name = table_name
+        self.time_column = time_column
+        # Finest first, so the coarsest usable rollup is the last match
+        self.rollups = [g for g in self.ROLLUP_GRAINS if g in rollups]
+        self.index_table = f"{table_name}_time"
+        self.value_columns: list[str] = []
+
+    def rollup_table(self, grain: str) -> str:
+        return f"{self.index_table}_{grain}"
+
+    def build(self) -> None:
+        """Materialize the time-sorted table and its rollups"""
+        self._duckdb.execute(f"""
+            CREATE OR REPLACE TABLE {self.index_table} AS
+            SELECT * FROM (
+                SELECT *, TRY_CAST("{self.time_column}" AS TIMESTAMP) AS __ts
+                FROM {self.table_name}
+            )
+            WHERE __ts IS NOT NULL
+            ORDER BY __ts
+        """)
+        self.value_columns = self._detect_value_columns()
+
+        for grain in self.rollups:
+            self._duckdb.execute(f"""
+                CREATE OR REPLACE TABLE {self.rollup_table(grain)} AS
+                SELECT
+                    date_trunc('{grain}', __ts) AS bucket,
+                    COUNT(*) AS count
+                    {self._rollup_aggregates()}
+                FROM {self.index_table}
+                GROUP BY bucket
+                ORDER BY bucket
+            """)
+
+        logger.info(
+            f"Built time index {self.index_table} on '{self.time_column}' "
+            f"with rollups {self.rollups} over {self.value_columns}"
+        )
+
+    def drop(self) -> None:
+        for grain in self.rollups:
+            self._duckdb.execute(f"DROP TABLE IF EXISTS {self.rollup_table(grain)}")
+        self._duckdb.execute(f"DROP TABLE IF EXISTS {self.index_table}")
+
+    def time_range(
+        self,
+        start: Any = None,
+        end: Any = None,
+        bucket: str | None = None,
+    ) -> pd.DataFrame:
+        """
+        Answer a range query over [start, end), optionally resampled.
+
+        Without a bucket, the matching rows are returned in time order. With a
+        bucket, one row per bucket is returned with ``count`` and, for every
+        numeric column, ``<col>_sum``, ``<col>_min``, ``<col>_max`` and
+        ``<col>_mean``. Either bound may be None to leave that side open.
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+
+        if bucket is None:
+            where, params = self._range_predicate("__ts", start, end)
+            return self._duckdb.execute(
+                f"""
+                SELECT * EXCLUDE (__ts)
+                FROM {self.index_table}
+                WHERE {where}
+                ORDER BY __ts
+                """,
+                params,
+            ).df()
+
+        if bucket not in self.BUCKETS:
+            raise ValueError(
+                f"Unsupported bucket '{bucket}', expected one of {self.BUCKETS}"
+            )
+
+        grain = self._pick_rollup(bucket, start, end)
+        if grain is None:
+            return self._resample_rows(bucket, start, end)
+        return self._resample_rollup(grain, bucket, start, end)
+
+    def _pick_rollup(
+        self, bucket: str, start: pd.Timestamp | None, end: pd.Timestamp | None
+    ) -> str | None:
+        """Pick the coarsest rollup that is no coarser than the bucket and whose
+        buckets line up with the range bounds."""
+        max_grain = self.BUCKETS.index(bucket)
+        chosen = None
+        for grain in self.rollups:
+            if self.BUCKETS.index(grain) > max_grain:
+                break
+            freq = self._PANDAS_FREQ[grain]
+            if all(ts is None or ts.floor(freq) == ts for ts in (start, end)):
+                chosen = grain
+        return chosen
+
+    def _resample_rollup(
+        self,
+        grain: str,
+        bucket: str,
+        start: pd.Timestamp | None,
+        end: pd.Timestamp | None,
+    ) -> pd.DataFrame:
+        columns = ["CAST(SUM(count) AS BIGINT) AS count"]
+        for col in self.value_columns:
+            columns += [
+                f'SUM("{col}__sum") AS "{col}_sum"',
+                f'MIN("{col}__min") AS "{col}_min"',
+                f'MAX("{col}__max") AS "{col}_max"',
+                f'SUM("{col}__sum") / NULLIF(SUM("{col}__count"), 0) AS "{col}_mean"',
+            ]
+        where, params = self._range_predicate("bucket", start, end)
+        return self._duckdb.execute(
+            f"""
+            SELECT date_trunc('{bucket}', bucket) AS bucket, {", ".join(columns)}
+            FROM {self.rollup_table(grain)}
+            WHERE {where}
+            GROUP BY 1
+            ORDER BY 1
+            """,
+            params,
+        ).df()
+
+    def _resample_rows(
+        self, bucket: str, start: pd.Timestamp | None, end: pd.Timestamp | None
+    ) -> pd.DataFrame:
+        columns = ["COUNT(*) AS count"]
+        for col in self.value_columns:
+            value = f'TRY_CAST("{col}" AS DOUBLE)'
+            columns += [
+                f'SUM({value}) AS "{col}_sum"',
+                f'MIN({value}) AS "{col}_min"',
+                f'MAX({value}) AS "{col}_max"',
+                f'AVG({value}) AS "{col}_mean"',
+            ]
+        where, params = self._range_predicate("__ts", start, end)
+        return self._duckdb.execute(
+            f"""
+            SELECT date_trunc('{bucket}', __ts) AS bucket, {", ".join(columns)}
+            FROM {self.index_table}
+            WHERE {where}
+            GROUP BY 1
+            ORDER BY 1
+            """,
+            params,
+        ).df()
+
+    def _rollup_aggregates(self) -> str:
+        aggregates = []
+        for col in self.value_columns:
+            value = f'TRY_CAST("{col}" AS DOUBLE)'
+            aggregates += [
+                f'COUNT({value}) AS "{col}__count"',
+                f'SUM({value}) AS "{col}__sum"',
+                f'MIN({value}) AS "{col}__min"',
+                f'MAX({value}) AS "{col}__max"',
+            ]
+        return "".join(f",\n{agg}" for agg in aggregates)
+
+    def _detect_value_columns(self) -> list[str]:
+        """Find the columns whose non-null values all parse as numbers"""
+        columns = [
+            row[0]
+            for row in self._duckdb.execute(f"DESCRIBE {self.index_table}").fetchall()
+            if row[0] not in (self.time_column, "__ts")
+        ]
+        if not columns:
+            return []
+
+        checks = ", ".join(
+            f'COUNT("{col}"), COUNT(TRY_CAST("{col}" AS DOUBLE))' for col in columns
+        )
+        counts = self._duckdb.execute(
+            f"SELECT {checks} FROM {self.index_table}"
+        ).fetchone()
+        return [
+            col
+            for i, col in enumerate(columns)
+            if counts[2 * i] > 0 and counts[2 * i] == counts[2 * i + 1]
+        ]
+
+    @staticmethod
+    def _range_predicate(
+        column: str, start: pd.Timestamp | None, end: pd.Timestamp | None
+    ) -> tuple[str, list]:
+        clauses, params = [], []
+        if start is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(start.to_pydatetime())
+        if end is not None:
+            clauses.append(f"{column} < ?")
+            params.append(end.to_pydatetime())
+        return " AND ".join(clauses) or "TRUE", params
+
+
+class TextIndex:
+    """
+    In-process inverted index over the text columns of a DuckDB table.
+
+    Postings are stored CSR style: ``offsets[i]:offsets[i + 1]`` slices the
+    sorted DuckDB row ids containing ``vocabulary[i]`` out of one flat
+    ``postings`` array. The vocabulary is sorted, so every token sharing a
+    prefix maps to one contiguous slice, which is what makes type-ahead
+    matching on the last query token cheap. All three are plain NumPy arrays,
+    so a built index can be saved and memory-mapped back by other processes.
+    """
+
+    _ARRAYS = ("vocabulary", "offsets", "postings")
+
+    TOKEN_PATTERN = r"\w+"
+
+    def __init__(
+        self,
+        duckdb_conn: duckdb.DuckDBPyConnection,
+        table_name: str,
+        columns: list[str],
+    ):
+        if not columns:
+            raise ValueError("Text index needs at least one column")
+
+        self._duckdb = duckdb_conn
+        self.table_name = table_name
+        self.columns = list(columns)
+        self.vocabulary = np.zeros(0, dtype=str)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.postings = np.zeros(0, dtype=np.int64)
+
+    def build(self) -> None:
+        """Tokenize the indexed columns and build the posting lists"""
+        select = ", ".join(f'"{col}"' for col in self.columns)
+        df = self._duckdb.execute(
+            f"SELECT rowid AS __rowid, {select} FROM {self.table_name}"
+        ).df()
+
+        parts = []
+        for col in self.columns:
+            tokens = (
+                df[col]
+                .dropna()
+                .astype(str)
+                .str.lower()
+                .str.findall(self.TOKEN_PATTERN)
+                .explode()
+                .dropna()
+            )
+            parts.append(
+                pd.DataFrame(
+                    {"token": tokens.values, "row": df["__rowid"].values[tokens.index]}
+                )
+            )
+        pairs = pd.concat(parts, ignore_index=True).drop_duplicates()
+
+        codes, vocabulary = pd.factorize(pairs["token"], sort=True)
+        rows = pairs["row"].to_numpy(dtype=np.int64)
+        order = np.lexsort((rows, codes))
+
+        self.vocabulary = np.asarray(vocabulary, dtype=str)
+        self.postings = rows[order]
+        self.offsets = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(codes, minlength=len(self.vocabulary)), out=self.offsets[1:]
+        )
+
+        logger.info(
+            f"Built text index on {self.table_name} {self.columns}: "
+            f"{len(self.vocabulary)} tokens, {len(self.postings)} postings"
+        )
+
+    def save(self, path_prefix: str) -> None:
+        """Write the index arrays to ``<path_prefix>.<array>.npy``"""
+        for attr in self._ARRAYS:
+            np.save(f"{path_prefix}.{attr}.npy", getattr(self, attr))
+
+    def load(self, path_prefix: str, mmap: bool = True) -> None:
+        """Read arrays written by save(), memory-mapped read-only by default"""
+        mode = "r" if mmap else None
+        for attr in self._ARRAYS:
+            setattr(self, attr, np.load(f"{path_prefix}.{attr}.npy", mmap_mode=mode))
+
+    def drop(self) -> None:
+        self.vocabulary = np.zeros(0, dtype=str)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.postings = np.zeros(0, dtype=np.int64)
+
+    def search_ids(self, query: str, limit: int | None = 100) -> np.ndarray:
+        """
+        Return the sorted row ids matching every token of ``query``.
+
+        All tokens but the last must match exactly; the last one matches as a
+        prefix so results update while the user is still typing a word.
+        """
+        tokens = re.findall(self.TOKEN_PATTERN, query.lower())
+        if not tokens:
+            return np.zeros(0, dtype=np.int64)
+
+        candidates = [self._exact(token) for token in tokens[:-1]]
+        candidates.append(self._prefix(tokens[-1]))
+        candidates.sort(key=len)
+
+        result = candidates[0]
+        for postings in candidates[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, postings, assume_unique=True)
+
+        return result if limit is None else result[:limit]
+
+    def search(self, query: str, limit: int | None = 100) -> pd.DataFrame:
+        """Return the matching rows of the indexed table in row id order"""
+        ids = self.search_ids(query, limit)
+        if not len(ids):
+            return self._duckdb.execute(f"SELECT * FROM {self.table_name} LIMIT 0").df()
+        id_list = ", ".join(str(int(i)) for i in ids)
+        return self._duckdb.execute(
+            f"SELECT * FROM {self.table_name} WHERE rowid IN ({id_list}) ORDER BY rowid"
+        ).df()
+
+    def _exact(self, token: str) -> np.ndarray:
+        i = int(np.searchsorted(self.vocabulary, token))
+        if i == len(self.vocabulary) or self.vocabulary[i] != token:
+            return np.zeros(0, dtype=np.int64)
+        return self.postings[self.offsets[i] : self.offsets[i + 1]]
+
+    def _prefix(self, prefix: str) -> np.ndarray:
+        lo, hi = np.searchsorted(self.vocabulary, [prefix, prefix + "\U0010ffff"])
+        if hi - lo == 1:
+            return self.postings[self.offsets[lo] : self.offsets[hi]]
+        return np.unique(self.postings[self.offsets[lo] : self.offsets[hi]])
@@ -0,0 +1,94 @@
+import json
+import logging
+import os
+import re
+import shutil
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class DataStore:
+    """
+    On-disk layout of a prebuilt, read-only data store shared by workers.
+
+    A loader process writes every build into its own generation directory::
+
+        <root>/
+            CURRENT                  # name of the live generation
+            gen-<ms>-<pid>/
+                store.duckdb         # materialized sources and index tables
+                manifest.json        # source -> table and index metadata
+                text/<source>.*.npy  # text index arrays, memory-mapped by workers
+
+    Publishing a build is a single atomic rename of ``CURRENT``. Workers
+    attach the generation it names read-only, and notice a new one by
+    re-reading the pointer, so a reload never exposes a half-written store.
+    """
+
+    CURRENT = "CURRENT"
+    DATABASE = "store.duckdb"
+    MANIFEST = "manifest.json"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def current_generation(self) -> str | None:
+        """Name of the published generation, or None if nothing is published"""
+        try:
+            with open(os.path.join(self.root, self.CURRENT), encoding="utf-8") as f:
+                generation = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return generation or None
+
+    def generation_dir(self, generation: str) -> str:
+        return os.path.join(self.root, generation)
+
+    def database_path(self, generation: str) -> str:
+        return os.path.join(self.root, generation, self.DATABASE)
+
+    def text_index_prefix(self, generation: str, source_name: str) -> str:
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", source_name)
+        return os.path.join(self.root, generation, "text", safe_name)
+
+    def new_generation(self) -> str:
+        """Create an empty generation directory for a build"""
+        generation = f"gen-{int(time.time() * 1000)}-{os.getpid()}"
+        os.makedirs(os.path.join(self.root, generation, "text"), exist_ok=False)
+        return generation
+
+    def read_manifest(self, generation: str) -> dict:
+        path = os.path.join(self.root, generation, self.MANIFEST)
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_manifest(self, generation: str, manifest: dict) -> None:
+        path = os.path.join(self.root, generation, self.MANIFEST)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    def publish(self, generation: str, keep: int = 2) -> None:
+        """Atomically make ``generation`` the live one and prune old builds.
+
+        The previous ``keep - 1`` generations are left in place because
+        workers may still have them attached until their next reload check.
+        """
+        tmp_path = os.path.join(self.root, f"{self.CURRENT}.tmp-{os.getpid()}")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(generation)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.root, self.CURRENT))
+        logger.info(f"Published data store generation {generation}")
+
+        generations = sorted(
+            (name for name in os.listdir(self.root) if name.startswith("gen-")),
+            key=lambda name: int(name.split("-")[1]),
+            reverse=True,
+        )
+        for stale in generations[max(keep, 1) :]:
+            if stale != generation:
+                shutil.rmtree(os.path.join(self.root, stale), ignore_errors=True)
+                logger.info(f"Removed old data store generation {stale}")
@@ -0,0 +1,197 @@
+import logging
+import os
+import pickle
+import threading
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+# Buffers smaller than this are pickled inline; a shared memory segment
+# costs a few syscalls, which only pays off for large arrays
+SHARED_MEMORY_THRESHOLD = 1 << 20
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+class HandoffError(Exception):
+    """Raised when an atom's arguments can't be sent to a worker process."""
+
+
+class Packed:
+    """
+    A value pickled with protocol 5, with its large buffers moved out of band.
+
+    NumPy arrays, pandas frames and Arrow tables expose their memory to
+    pickle as out-of-band buffers. Those above the threshold are copied once
+    into a single shared memory segment instead of being written through the
+    pool's pipe; only the small pickle stream travels with the task.
+    """
+
+    def __init__(self, data: bytes, segment: str | None, spans: list[tuple[int, int]]):
+        self.data = data
+        self.segment = segment
+        self.spans = spans
+
+    @classmethod
+    def pack(cls, value: Any) -> "Packed":
+        buffers: list[pickle.PickleBuffer] = []
+
+        def out_of_band(buffer: pickle.PickleBuffer) -> bool:
+            # Returning True keeps the buffer inside the pickle stream
+            if buffer.raw().nbytes < SHARED_MEMORY_THRESHOLD:
+                return True
+            buffers.append(buffer)
+            return False
+
+        data = pickle.dumps(value, protocol=5, buffer_callback=out_of_band)
+        if not buffers:
+            return cls(data, None, [])
+
+        views = [buffer.raw() for buffer in buffers]
+        spans, offset = [], 0
+        for view in views:
+            spans.append((offset, view.nbytes))
+            offset += view.nbytes
+
+        segment = shared_memory.SharedMemory(create=True, size=offset)
+        try:
+            for view, (start, size) in zip(views, spans, strict=True):
+                segment.buf[start : start + size] = view
+        except BaseException:
+            segment.close()
+            segment.unlink()
+            raise
+        segment.close()
+        return cls(data, segment.name, spans)
+
+    def unpack(self) -> Any:
+        """Rebuild the value; buffers are copied out so the segment can go."""
+        if self.segment is None:
+            return pickle.loads(self.data)
+
+        segment = shared_memory.SharedMemory(name=self.segment)
+        try:
+            buffers = [
+                bytearray(segment.buf[start : start + size])
+                for start, size in self.spans
+            ]
+        finally:
+            segment.close()
+        return pickle.loads(self.data, buffers=buffers)
+
+    def release(self) -> None:
+        """Free the shared memory segment, if any. Safe to call twice."""
+        if self.segment is None:
+            return
+        try:
+            segment = shared_memory.SharedMemory(name=self.segment)
+        except FileNotFoundError:
+            return
+        segment.close()
+        segment.unlink()
+
+
+def _warm_worker() -> None:
+    # Pay for the heavy imports once per worker, not on the first atom
+    for module in ("numpy", "pandas", "pyarrow"):
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _run_packed(func: Callable, packed_kwargs: Packed) -> Packed:
+    try:
+        kwargs = packed_kwargs.unpack()
+    finally:
+        packed_kwargs.release()
+    return Packed.pack(func(**kwargs))
+
+
+def get_process_pool(max_workers: int | None = None) -> ProcessPoolExecutor:
+    """
+    Process-wide worker pool shared by every workflow.
+
+    The first call creates the pool, with ``max_workers`` processes
+    (default: CPU count); later calls return the same pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Workers must share the parent's tracker, or each one would try
+            # to clean up the segments it created for results on exit
+            resource_tracker.ensure_running()
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers, initializer=_warm_worker
+            )
+        return _pool
+
+
+def prewarm(max_workers: int | None = None) -> None:
+    """Start the pool's worker processes in the background."""
+    pool = get_process_pool(max_workers)
+    workers = pool._max_workers
+
+    def start():
+        try:
+            pids = {f.result() for f in [pool.submit(_ping) for _ in range(workers)]}
+            logger.info(f"Started {len(pids)} atom worker processes")
+        except Exception as e:
+            logger.warning(f"Could not start atom worker processes: {e}")
+
+    threading.Thread(target=start, name="preswald-pool-prewarm", daemon=True).start()
+
+
+def run_in_process(
+    func: Callable, kwargs: dict[str, Any], max_workers: int | None = None
+) -> Any:
+    """
+    Call ``func(**kwargs)`` in a pooled worker process and return its result.
+
+    Large array buffers in the arguments and the result travel through shared
+    memory. Raises HandoffError if the arguments can't be pickled, and
+    otherwise whatever ``func`` raised.
+    """
+    try:
+        packed_kwargs = Packed.pack(kwargs)
+    except Exception as e:
+        raise HandoffError(str(e)) from e
+    pool = get_process_pool(max_workers)
+    try:
+        packed_result = pool.submit(_run_packed, func, packed_kwargs).result()
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool for the next atom
+        logger.error("Atom worker process exited abruptly, restarting the pool")
+        _discard(pool)
+        raise
+    finally:
+        # The worker normally frees it; this covers a worker that died first
+        packed_kwargs.release()
+    try:
+        return packed_result.unpack()
+    finally:
+        packed_result.release()
+
+
+def _discard(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown() -> None:
+    """Stop the worker processes; the next atom starts a new pool."""
+    if _pool is not None:
+        _discard(_pool)
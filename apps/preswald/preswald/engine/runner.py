@@ -3,17 +3,116 @@ import logging
 import os
 import sys
 import threading
-import time
 import traceback
 from collections.abc import Callable
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
 from enum import Enum
 from pathlib import Path
 from typing import Any
 
+from preswald.engine.script_graph import ScriptGraph, analyze_script
+from preswald.engine.tracing import span, trace_session
+from preswald.interfaces.workflow import (
+    Atom,
+    AtomStatus,
+    RetryPolicy,
+    RunCancelledError,
+    _in_thread,
+    active_session,
+)
+
 
 logger = logging.getLogger(__name__)
 
+# The working directory is process-wide, so scripts that run in it take turns
+_working_dir_lock = threading.RLock()
+
+
+@contextmanager
+def _working_directory(path: str):
+    """Run the block in ``path``, one script or statement at a time."""
+    with _working_dir_lock:
+        previous = os.getcwd()
+        os.chdir(path)
+        try:
+            yield
+        finally:
+            os.chdir(previous)
+
+
+# Runner of the session running in this context. The statement atoms of a
+# plain script are shared by every session, so they look up the globals of
+# the session they run for here, see ScriptRunner._run_statements
+_active_runner: ContextVar["ScriptRunner | None"] = ContextVar(
+    "preswald_active_runner", default=None
+)
+
+# Where prints made for the session running in this context go, see
+# ScriptRunner._redirect_stdout
+_session_output: ContextVar[Any] = ContextVar("preswald_session_output", default=None)
+
+
+class _StdoutRouter:
+    """
+    Stands in for sys.stdout, sending each print to the output stream of the
+    session it was made for, and anything else to the real stdout. Sessions
+    run concurrently, so swapping sys.stdout per run would mix them up.
+    """
+
+    def __init__(self, stdout):
+        self._stdout = stdout
+
+    def write(self, text):
+        return (_session_output.get() or self._stdout).write(text)
+
+    def flush(self):
+        (_session_output.get() or self._stdout).flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stdout, name)
+
+
+class PreswaldOutputStream:
+    """Sends what a session prints to its client, line by line."""
+
+    def __init__(self, callback, loop):
+        self.callback = callback
+        self.loop = loop
+        self.buffer = ""
+        self._lock = threading.Lock()
+
+    def _send(self, content):
+        message = self.callback({"type": "output", "content": content})
+        try:
+            on_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            asyncio.create_task(message)  # noqa: RUF006
+        else:
+            # Scripts and atoms print from worker threads too
+            asyncio.run_coroutine_threadsafe(message, self.loop)
+
+    def write(self, text):
+        with self._lock:
+            self.buffer += text
+            if "\n" in self.buffer:
+                lines = self.buffer.split("\n")
+                for line in lines[:-1]:
+                    if line.strip():
+                        logger.debug(f"[ScriptRunner] Captured output: {line}")
+                        self._send(line + "\n")
+                self.buffer = lines[-1]
+
+    def flush(self):
+        with self._lock:
+            if self.buffer:
+                if self.buffer.strip():
+                    logger.debug(f"[ScriptRunner] Flushing output: {self.buffer}")
+                    self._send(self.buffer)
+                self.buffer = ""
+
 
 class ScriptState(Enum):
     """Manages the state of a running script."""
@@ -43,10 +142,19 @@ class ScriptRunner:
         self.script_path: str | None = None
         self.widget_states = initial_states or {}
         self._state = ScriptState.INITIAL
-        self._last_run_time = 0
         self._run_count = 0
+        # Bumped by every widget update; a run whose generation is no longer
+        # current is cancelled and the latest state runs next
+        self._generation = 0
+        # Changed widget IDs not yet rendered by a completed run
+        self._unapplied_changes: set[str] = set()
+        self._rerun_task: asyncio.Task | None = None
         self._lock = threading.Lock()
         self._script_globals = {}
+        # Components on this client's screen, None until it reports them, and
+        # the components it was last sent
+        self.visible_components: set[str] | None = None
+        self._rendered_components: set[str] = set()
 
         from .service import (
             PreswaldService,  # deferred import to avoid cyclic dependency
@@ -59,6 +167,14 @@ class ScriptRunner:
 
     async def send_message(self, msg: dict):
         """Send a message to the frontend."""
+        if msg.get("type") == "components":
+            # Every components message carries the whole page
+            self._rendered_components = {
+                component["id"]
+                for row in msg["components"].get("rows", [])
+                for component in row
+                if component.get("id")
+            }
         try:
             await self._send_message_callback(msg)
         except Exception as e:
@@ -90,7 +206,8 @@ class ScriptRunner:
             self._run_count = 0
 
         try:
-            await self.run_script()
+            with self._session():
+                await self.run_script()
         except Exception as e:
             await self._send_error(f"Failed to start script: {e!s}")
             self._state = ScriptState.ERROR
@@ -100,14 +217,21 @@ class ScriptRunner:
         try:
             logger.info(f"[ScriptRunner] Stopping script for session {self.session_id}")
 
-            self._state = ScriptState.STOPPED
+            with self._lock:
+                self._state = ScriptState.STOPPED
+                self._generation += 1  # cancel a run in progress
             logger.info(f"[ScriptRunner] Script stopped for session {self.session_id}")
         except Exception as e:
             logger.error(f"[ScriptRunner] Error stopping script: {e}")
             raise
 
     async def rerun(self, new_widget_states: dict[str, Any] | None = None):
-        """Rerun the script with new widget values and debouncing.
+        """Rerun the workflow with new widget values.
+
+        Returns right away: the run happens on a background task. A newer
+        update supersedes a run in progress, which stops at its next atom or
+        checkpoint, and the latest state is executed next, with every change
+        the superseded runs didn't get to render.
 
         Args:
             new_widget_states: Dictionary of widget ID to new value
@@ -116,65 +240,232 @@ class ScriptRunner:
             logger.debug("[ScriptRunner] No new states for rerun")
             return
 
-        # Basic debouncing - skip if last run was too recent
-        current_time = time.time()
-        if current_time - self._last_run_time < 0.1:  # 100ms debounce
-            logger.debug("[ScriptRunner] Skipping rerun due to debounce")
-            return
-
         logger.info(f"[ScriptRunner] Rerunning with new states: {new_widget_states}")
 
-        try:
-            # Update states atomically
+        # Update states atomically
+        with self._lock:
+            for component_id, value in new_widget_states.items():
+                old_value = self.widget_states.get(component_id)
+                self.widget_states[component_id] = value
+                logger.debug(f"[ScriptRunner] Updated state: {component_id} = {value} (was {old_value})")
+            self._run_count += 1
+            self._generation += 1
+            self._unapplied_changes.update(new_widget_states)
+
+        if self._rerun_task is None or self._rerun_task.done():
+            self._rerun_task = asyncio.create_task(self._run_latest())
+
+    async def _run_latest(self):
+        """Run the workflow until a run completes for the latest generation."""
+        while self.is_running:
             with self._lock:
-                for component_id, value in new_widget_states.items():
-                    old_value = self.widget_states.get(component_id)
-                    self.widget_states[component_id] = value
-                    logger.debug(f"[ScriptRunner] Updated state: {component_id} = {value} (was {old_value})")
-                self._run_count += 1
-                self._last_run_time = current_time
-
-            # determine affected components and force recomputation
-            changed_component_ids = set(new_widget_states.keys())
-            changed_atoms = {
-                self._service.get_workflow().get_component_producer(cid)
-                for cid in changed_component_ids
-                if self._service.get_workflow().get_component_producer(cid)
-            }
+                generation = self._generation
+                changed_component_ids = set(self._unapplied_changes)
+
+            try:
+                with self._session(), span(
+                    "rerun", "runner", generation=generation
+                ):
+                    await self._rerun_workflow(
+                        changed_component_ids,
+                        lambda generation=generation: self._generation != generation,
+                    )
+            except RunCancelledError:
+                logger.info(f"[ScriptRunner] Run #{generation} superseded")
+                continue
+            except Exception as e:
+                error_msg = f"Error updating widget states: {e!s}"
+                logger.error(f"[ScriptRunner] {error_msg}", exc_info=True)
+                await self._send_error(error_msg)
+                self._state = ScriptState.ERROR
+                return
 
-            affected = self._service.get_affected_components(changed_atoms)
+            with self._lock:
+                self._unapplied_changes -= changed_component_ids
+                if self._generation == generation:
+                    return
 
-            if not changed_atoms and not affected:
-                logger.warning("[ScriptRunner] No atoms affected — falling back to full script rerun")
-                await self.run_script()
-                return
+    async def _rerun_workflow(
+        self, changed_component_ids: set[str], is_cancelled: Callable[[], bool]
+    ):
+        # determine affected components and force recomputation
+        workflow = self._service.get_workflow()
+        changed_atoms = {
+            workflow.get_component_producer(cid)
+            for cid in changed_component_ids
+            if workflow.get_component_producer(cid)
+        }
+
+        affected = self._service.get_affected_components(changed_atoms)
+
+        if not changed_atoms and not affected:
+            logger.warning("[ScriptRunner] No atoms affected — falling back to full script rerun")
+            await self.run_script()
+            return
 
-            self._service.force_recompute(affected)
+        self._service.force_recompute(changed_atoms)
+        # Atoms that read a source of a newer store generation see a new
+        # source version, so their cached results are not reused
+        self._service.refresh_data_manager()
 
-            # Execute workflow with selective recompute
-            workflow = self._service.get_workflow()
-            results = workflow.execute(recompute_atoms=affected)
+        async def send_partial():
+            # A generator atom showed a partial result; skip if superseded
+            if not is_cancelled():
+                components = self._service.get_rendered_components()
+                await self.send_message({"type": "components", "components": components})
 
-            # Ensure layout rendering happens for all atoms
-            for atom_name, result in results.items():
-                with self._service.active_atom(atom_name):
-                    if result is not None:
-                        value = result.value if hasattr(result, 'value') else None
-                        if value is not None:
-                            self._service.append_component({"id": atom_name, "value": value})
+        # Execute workflow with selective recompute: the widgets' atoms are
+        # forced, their dependents run unless their result is in the cache.
+        # Statements of a plain script print to the page, as in a full run.
+        with self._redirect_stdout() if self._statement_atoms else nullcontext():
+            results = await workflow.execute_async(
+                recompute_atoms=changed_atoms,
+                is_cancelled=is_cancelled,
+                on_update=send_partial,
+                visible_components=self.visible_components,
+                rendered_components=self._rendered_components,
+            )
+        self._raise_statement_error(results)
+
+        # Ensure layout rendering happens for all atoms
+        for atom_name, result in results.items():
+            with self._service.active_atom(atom_name):
+                if result is not None:
+                    value = result.value if hasattr(result, 'value') else None
+                    if value is not None:
+                        self._service.append_component({"id": atom_name, "value": value})
+
+        components = self._service.get_rendered_components()
+        logger.info(f"[ScriptRunner] Rendered {len(components)} components (rerun)")
+
+        if components and not is_cancelled():
+            await self.send_message({"type": "components", "components": components})
+            logger.info("[ScriptRunner] Sent components to frontend")
+
+    def _execute_script(self, source: str, script_dir: str):
+        """Run the script, as workflow atoms per statement group if it splits."""
+        graph = analyze_script(source, self.script_path)
+        if graph is not None and graph.splittable:
+            self._run_statements(graph, script_dir)
+            return
 
-            components = self._service.get_rendered_components()
-            logger.info(f"[ScriptRunner] Rendered {len(components)} components (rerun)")
+        if graph is not None and graph.reason:
+            logger.debug(f"[ScriptRunner] Running script as a whole: {graph.reason}")
+        workflow = self._service.get_workflow()
+        for atom_name in self._statement_atoms:
+            workflow.unregister_atom(atom_name)
+        code = compile(source, self.script_path, "exec")
+        logger.debug("[ScriptRunner] Script compiled")
+        # Execute script with script directory set as cwd
+        with _working_directory(script_dir):
+            exec(code, self._script_globals)
+
+    def _run_statements(self, graph: ScriptGraph, script_dir: str):
+        """Run a plain script as one workflow atom per group of statements.
+
+        The atoms depend on each other as the statements' variables do, so a
+        widget update reruns only the statements downstream of the widget;
+        the others keep their variables from the previous run. The atoms are
+        shared by every session on the service's workflow, and run in the
+        script globals of the session they run for.
+        """
+        workflow = self._service.get_workflow()
+        prefix = self._statement_prefix()
+        names = [f"{prefix}{group.lineno}" for group in graph.groups]
+        registered = self._statement_atoms
+        unchanged = registered == names and all(
+            workflow.atoms[atom_name].func.codes == group.codes
+            for atom_name, group in zip(names, graph.groups, strict=True)
+        )
+        if not unchanged:
+            # Line numbers change with the script, so start from a clean slate
+            for atom_name in registered:
+                workflow.unregister_atom(atom_name)
+            for group, atom_name in zip(graph.groups, names, strict=True):
+                func = self._statements_func(group.codes, script_dir)
+                workflow.register_atom(
+                    Atom(
+                        name=atom_name,
+                        func=func,
+                        original_func=func,
+                        dependencies={names[i] for i in group.dependencies},
+                        # Affected statements always run again, exactly once
+                        retry_policy=RetryPolicy(max_attempts=1),
+                        cache=False,
+                    )
+                )
+        logger.info(
+            f"[ScriptRunner] Running {len(names)} statement groups as workflow atoms"
+        )
+        self._raise_statement_error(workflow.execute())
+
+    @staticmethod
+    def _statements_func(codes: list, script_dir: str) -> Callable:
+        def run_statements(**_):
+            runner = _active_runner.get()
+            if runner is None:
+                raise RuntimeError("Script statements can only run for a session")
+            # One at a time, in the script's directory, as in a full run
+            with _working_directory(script_dir):
+                for code in codes:
+                    exec(code, runner._script_globals)
 
+        run_statements.codes = codes
+        return run_statements
+
+    def _statement_prefix(self) -> str:
+        return f"{os.path.basename(self.script_path)}:"
+
+    @property
+    def _statement_atoms(self) -> list[str]:
+        """Atoms running the statements of the script, in registration order"""
+        if not self.script_path:
+            return []
+        prefix = self._statement_prefix()
+        return [
+            atom_name
+            for atom_name in self._service.get_workflow().atoms
+            if atom_name.startswith(prefix)
+        ]
+
+    def _raise_statement_error(self, results: dict):
+        """Report the first failed statement like a failing script."""
+        for atom_name in self._statement_atoms:
+            result = results.get(atom_name)
+            if result is not None and result.status == AtomStatus.FAILED:
+                raise result.error
+
+    async def update_visibility(self, visible_components: set[str]):
+        """Record the components on screen and render deferred ones now on it."""
+        self.visible_components = set(visible_components)
+        with self._session():
+            ready = self._service.get_workflow().deferred_atoms(
+                self.visible_components, self._rendered_components
+            )
+        if ready:
+            logger.info(f"[ScriptRunner] Evaluating deferred atoms now visible: {ready}")
+            await self.render_deferred()
+
+    async def render_deferred(self):
+        """Evaluate deferred atoms that became visible and send the layout."""
+        if not self.is_running:
+            return
+
+        try:
+            workflow = self._service.get_workflow()
+            with self._session(), span("deferred", "runner"):
+                await workflow.execute_deferred_async(
+                    self.visible_components, self._rendered_components
+                )
+
+            components = self._service.get_rendered_components()
             if components:
                 await self.send_message({"type": "components", "components": components})
-                logger.info("[ScriptRunner] Sent components to frontend")
-
+                logger.info("[ScriptRunner] Sent components to frontend (deferred)")
         except Exception as e:
-            error_msg = f"Error updating widget states: {e!s}"
+            error_msg = f"Error evaluating deferred atoms: {e!s}"
             logger.error(f"[ScriptRunner] {error_msg}", exc_info=True)
             await self._send_error(error_msg)
-            self._state = ScriptState.ERROR
 
     async def _send_error(self, message: str, include_traceback: bool = True):
         """Send error message to frontend.
@@ -192,54 +483,33 @@ class ScriptRunner:
         except Exception as e:
             logger.error(f"[ScriptRunner] Failed to send error message: {e}")
 
+    @contextmanager
+    def _session(self):
+        """Run the block for this session: its spans, shared=False results and
+        script globals"""
+        token = _active_runner.set(self)
+        try:
+            with trace_session(self.session_id), active_session(self.session_id):
+                yield
+        finally:
+            _active_runner.reset(token)
+
     @contextmanager
     def _redirect_stdout(self):
         """Capture and redirect stdout with improved buffering."""
         logger.debug("[ScriptRunner] Setting up stdout redirection")
 
-        class PreswaldOutputStream:
-            def __init__(self, callback):
-                self.callback = callback
-                self.buffer = ""
-                self._lock = threading.Lock()
-
-            def write(self, text):
-                with self._lock:
-                    self.buffer += text
-                    if "\n" in self.buffer:
-                        lines = self.buffer.split("\n")
-                        for line in lines[:-1]:
-                            if line.strip():
-                                logger.debug(f"[ScriptRunner] Captured output: {line}")
-                                asyncio.create_task(  # noqa: RUF006
-                                    self.callback(
-                                        {"type": "output", "content": line + "\n"}
-                                    )
-                                )
-                        self.buffer = lines[-1]
-
-            def flush(self):
-                with self._lock:
-                    if self.buffer:
-                        if self.buffer.strip():
-                            logger.debug(
-                                f"[ScriptRunner] Flushing output: {self.buffer}"
-                            )
-                            asyncio.create_task(  # noqa: RUF006
-                                self.callback(
-                                    {"type": "output", "content": self.buffer}
-                                )
-                            )
-                        self.buffer = ""
-
-        old_stdout = sys.stdout
-        output_stream = PreswaldOutputStream(self.send_message)
-        sys.stdout = output_stream
+        output_stream = PreswaldOutputStream(
+            self.send_message, asyncio.get_running_loop()
+        )
+        if not isinstance(sys.stdout, _StdoutRouter):
+            sys.stdout = _StdoutRouter(sys.stdout)
+        token = _session_output.set(output_stream)
         try:
             yield
         finally:
             output_stream.flush()
-            sys.stdout = old_stdout
+            _session_output.reset(token)
             logger.debug("[ScriptRunner] Restored stdout")
 
     async def run_script(self):
@@ -264,17 +534,15 @@ class ScriptRunner:
             with self._redirect_stdout():
                 # Execute script
                 with open(self.script_path, encoding="utf-8") as f:
-                    # Save current cwd
-                    current_working_dir = os.getcwd()
-                    # Execute script with script directory set as cwd
-                    script_dir = os.path.dirname(os.path.realpath(self.script_path))
-                    os.chdir(script_dir)
-                    code = compile(f.read(), self.script_path, "exec")
-                    logger.debug("[ScriptRunner] Script compiled")
-                    exec(code, self._script_globals)
-                    logger.debug("[ScriptRunner] Script executed")
-                    # Change back to original working dir
-                    os.chdir(current_working_dir)
+                    source = f.read()
+                script_dir = os.path.dirname(os.path.realpath(self.script_path))
+                # On a worker thread, so slow atoms, or atoms waiting to retry,
+                # don't stall the event loop and every other session with it
+                with self._session(), span(
+                    "script", "runner", script=self.script_path, run=self._run_count
+                ):
+                    await _in_thread(self._execute_script, source, script_dir)
+                logger.debug("[ScriptRunner] Script executed")
 
                 # Process rendered components
                 components = self._service.get_rendered_components()
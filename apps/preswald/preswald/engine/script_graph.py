@@ -0,0 +1,318 @@
+import ast
+import logging
+import types
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+# Calls that read or write variables by name at runtime, hiding them from the
+# analysis; scripts using them are always rerun from top to bottom
+_DYNAMIC_NAMES = frozenset({"globals", "locals", "vars", "exec", "eval"})
+
+# Names through which a script declares its own atoms
+_WORKFLOW_NAMES = frozenset({"Workflow", "get_workflow"})
+
+_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+
+
+@dataclass
+class StatementGroup:
+    """
+    Consecutive top-level statements of a script, rerun together.
+
+    ``dependencies`` are the indices of earlier groups binding names that
+    these statements read.
+    """
+
+    index: int
+    lineno: int  # First line of the first statement
+    codes: list[types.CodeType]
+    reads: set[str] = field(default_factory=set)
+    binds: set[str] = field(default_factory=set)
+    dependencies: set[int] = field(default_factory=set)
+
+
+@dataclass
+class ScriptGraph:
+    """Statement-level dependencies of a script."""
+
+    groups: list[StatementGroup]
+    # Why the script can't be split into statements, if it can't
+    reason: str | None = None
+
+    @property
+    def splittable(self) -> bool:
+        return self.reason is None and len(self.groups) > 1
+
+
+class _NameCollector(ast.NodeVisitor):
+    """Names a top-level statement reads and binds, and calls it makes."""
+
+    def __init__(self):
+        self.reads: set[str] = set()
+        self.binds: set[str] = set()
+        # Read when a function defined here is called, not when it's defined
+        self.deferred_reads: set[str] = set()
+        self.imports: set[str] = set()
+        # Objects whose methods are called without using the result
+        self.called: set[str] = set()
+        self.star_import = False
+        self.dynamic = False
+        self.uses_workflow = False
+        self._depth = 0  # nesting in function bodies
+
+    def visit_Name(self, node: ast.Name):
+        if node.id in _DYNAMIC_NAMES:
+            self.dynamic = True
+        if node.id in _WORKFLOW_NAMES:
+            self.uses_workflow = True
+        if isinstance(node.ctx, ast.Load):
+            (self.deferred_reads if self._depth else self.reads).add(node.id)
+        elif not self._depth:
+            self.binds.add(node.id)
+
+    def visit_Attribute(self, node: ast.Attribute):
+        if node.attr == "atom" or node.attr in _WORKFLOW_NAMES:
+            self.uses_workflow = True
+        if not isinstance(node.ctx, ast.Load):
+            self._mutates(node.value)
+        self.generic_visit(node)
+
+    def visit_Subscript(self, node: ast.Subscript):
+        if not isinstance(node.ctx, ast.Load):
+            self._mutates(node.value)
+        self.generic_visit(node)
+
+    def visit_Expr(self, node: ast.Expr):
+        # Methods may modify their object in place; assume so for calls whose
+        # result is unused, like items.append(x), unless called on a module
+        if isinstance(node.value, ast.Call) and isinstance(
+            node.value.func, ast.Attribute
+        ):
+            target = node.value.func.value
+            while isinstance(target, ast.Attribute | ast.Subscript):
+                target = target.value
+            if isinstance(target, ast.Name) and not self._depth:
+                self.called.add(target.id)
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call):
+        if isinstance(node.func, ast.Attribute) and any(
+            keyword.arg == "inplace" for keyword in node.keywords
+        ):
+            self._mutates(node.func.value)
+        self.generic_visit(node)
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler):
+        if node.name:
+            self._bind(node.name)
+        self.generic_visit(node)
+
+    def visit_Global(self, node: ast.Global):
+        self.dynamic = True
+
+    def visit_Nonlocal(self, node: ast.Nonlocal):
+        self.dynamic = True
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            self._bind(alias.asname or alias.name.split(".")[0])
+            self.imports.add(alias.asname or alias.name.split(".")[0])
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        for alias in node.names:
+            if alias.name == "*":
+                self.star_import = True
+            elif alias.name in _WORKFLOW_NAMES:
+                self.uses_workflow = True
+            self._bind(alias.asname or alias.name)
+            self.imports.add(alias.asname or alias.name)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        self._bind(node.name)
+        self._visit_scope(node.decorator_list, node.args, node.returns, node.body)
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef):
+        self.visit_FunctionDef(node)
+
+    def visit_Lambda(self, node: ast.Lambda):
+        self._visit_scope([], node.args, None, [node.body])
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        self._bind(node.name)
+        for child in (*node.decorator_list, *node.bases, *node.keywords):
+            self.visit(child)
+        # A class body runs at definition; its methods' bodies don't
+        for statement in node.body:
+            if isinstance(statement, _SCOPES):
+                self._visit_scope(
+                    statement.decorator_list,
+                    statement.args,
+                    statement.returns,
+                    statement.body,
+                )
+            else:
+                # Names bound here are class attributes, not variables
+                self._visit_reads(statement)
+
+    def visit_comprehension(self, node: ast.comprehension):
+        # Comprehension variables are local to the comprehension
+        self._depth += 1
+        self.visit(node.target)
+        self._depth -= 1
+        self.visit(node.iter)
+        for condition in node.ifs:
+            self.visit(condition)
+
+    def _visit_scope(self, decorators, args, returns, body):
+        # Decorators and defaults are evaluated at definition
+        for child in (*decorators, *args.defaults, *args.kw_defaults):
+            if child is not None:
+                self.visit(child)
+        if returns is not None:
+            self.visit(returns)
+        self._depth += 1
+        for statement in body:
+            self.visit(statement)
+        self._depth -= 1
+
+    def _visit_reads(self, node: ast.AST):
+        """Collect reads in a class body statement, read at definition."""
+        collector = _NameCollector()
+        collector.visit(node)
+        self.reads |= collector.reads
+        self.deferred_reads |= collector.deferred_reads
+        self.dynamic |= collector.dynamic
+        self.uses_workflow |= collector.uses_workflow
+
+    def _mutates(self, node: ast.AST):
+        while isinstance(node, ast.Attribute | ast.Subscript):
+            node = node.value
+        if isinstance(node, ast.Name):
+            self._bind(node.id)
+
+    def _bind(self, name: str):
+        if not self._depth:
+            self.binds.add(name)
+
+
+@lru_cache(maxsize=16)
+def analyze_script(source: str, filename: str) -> ScriptGraph | None:
+    """
+    Split a script into groups of top-level statements with the names they
+    read and bind, and the groups each depends on.
+
+    Statements are grouped so that rerunning a group and its dependents, in
+    script order, gives the same values as rerunning the whole script: a name
+    bound by several statements (assigned again, or changed in place by
+    ``df["x"] = ...``, ``items.append(...)``, ``inplace=True``) ties together
+    every statement from its first binding to its last. Reads inside function
+    bodies count where the function is used, not where it's defined.
+
+    The analysis runs once per version of the source. Returns None if the
+    script doesn't parse; compiling it reports the error.
+    """
+    try:
+        tree = ast.parse(source, filename)
+    except SyntaxError:
+        return None
+
+    collectors = []
+    for statement in tree.body:
+        collector = _NameCollector()
+        collector.visit(statement)
+        collectors.append(collector)
+
+    if any(collector.uses_workflow for collector in collectors):
+        return ScriptGraph([], "declares workflow atoms")
+    if any(collector.dynamic for collector in collectors):
+        return ScriptGraph([], "reads or writes variables dynamically")
+
+    modules = set().union(*(collector.imports for collector in collectors))
+    for collector in collectors:
+        collector.binds |= collector.called - modules
+
+    try:
+        groups, group_of = _group_statements(tree.body, collectors, filename)
+    except SyntaxError:  # e.g. "return" outside a function
+        return None
+    _resolve_dependencies(groups, group_of, collectors)
+    logger.debug(
+        f"Split {filename} into {len(groups)} groups of {len(collectors)} statements"
+    )
+    return ScriptGraph(groups)
+
+
+def _group_statements(
+    statements: list[ast.stmt], collectors: list[_NameCollector], filename: str
+) -> tuple[list[StatementGroup], list[int]]:
+    """Groups of statements, and the group of each statement."""
+    # Statements from the first to the last binding of a name are one group:
+    # merge the overlapping [first, last] ranges
+    first_binding: dict[str, int] = {}
+    reach = list(range(len(collectors)))  # statement -> last one it's tied to
+    for index, collector in enumerate(collectors):
+        for name in collector.binds:
+            first = first_binding.setdefault(name, index)
+            reach[first] = max(reach[first], index)
+
+    groups: list[StatementGroup] = []
+    group_of: list[int] = []
+    start = 0
+    while start < len(collectors):
+        end = i = start
+        while i <= end:
+            end = max(end, reach[i])
+            i += 1
+        group = StatementGroup(
+            index=len(groups),
+            lineno=statements[start].lineno,
+            codes=[
+                compile(ast.Module(body=[statement], type_ignores=[]), filename, "exec")
+                for statement in statements[start : end + 1]
+            ],
+        )
+        for collector in collectors[start : end + 1]:
+            group.reads |= collector.reads
+            group.binds |= collector.binds
+        groups.append(group)
+        group_of.extend([group.index] * (end - start + 1))
+        start = end + 1
+    return groups, group_of
+
+
+def _resolve_dependencies(
+    groups: list[StatementGroup],
+    group_of: list[int],
+    collectors: list[_NameCollector],
+) -> None:
+    """Point each group at the groups holding the latest binding of its reads."""
+    latest_binding: dict[str, int] = {}
+    # Names read by the bodies of the functions bound to a name; reading the
+    # function reads those too, where it's read
+    deferred_reads: dict[str, set[str]] = {}
+    star_imports: list[int] = []
+    for index, collector in enumerate(collectors):
+        group = groups[group_of[index]]
+        pending = list(collector.reads)
+        seen = set(pending)
+        while pending:
+            name = pending.pop()
+            binder = latest_binding.get(name)
+            if binder is None:
+                group.dependencies.update(star_imports)
+                continue
+            group.dependencies.add(binder)
+            for nested in deferred_reads.get(name, ()):
+                if nested not in seen:
+                    seen.add(nested)
+                    pending.append(nested)
+        for name in collector.binds:
+            latest_binding[name] = group.index
+            deferred_reads[name] = collector.deferred_reads
+        if collector.star_import:
+            star_imports.append(group.index)
+        group.dependencies.discard(group.index)
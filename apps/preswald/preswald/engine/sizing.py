@@ -0,0 +1,69 @@
+import sys
+from functools import singledispatch
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+# Containers are walked this deep; anything below counts as its shallow size
+_MAX_DEPTH = 4
+
+
+@singledispatch
+def _size(value: Any, depth: int, seen: set[int]) -> int:
+    # Objects with a __dict__ are sized by their attributes
+    attributes = getattr(value, "__dict__", None)
+    if isinstance(attributes, dict):
+        return sys.getsizeof(value) + _nested(attributes, depth, seen)
+    try:
+        return sys.getsizeof(value)
+    except TypeError:
+        return 0
+
+
+def _nested(value: Any, depth: int, seen: set[int]) -> int:
+    if depth >= _MAX_DEPTH or id(value) in seen:
+        return 0
+    seen.add(id(value))
+    return _size(value, depth + 1, seen)
+
+
+@_size.register(pd.DataFrame)
+@_size.register(pd.Series)
+@_size.register(pd.Index)
+def _(value, depth, seen):
+    usage = value.memory_usage(deep=True)
+    return int(usage.sum() if hasattr(usage, "sum") else usage)
+
+
+@_size.register(np.ndarray)
+def _(value, depth, seen):
+    return int(value.nbytes)
+
+
+@_size.register(list)
+@_size.register(tuple)
+@_size.register(set)
+@_size.register(frozenset)
+def _(value, depth, seen):
+    return sys.getsizeof(value) + sum(_nested(item, depth, seen) for item in value)
+
+
+@_size.register(dict)
+def _(value, depth, seen):
+    return sys.getsizeof(value) + sum(
+        _nested(key, depth, seen) + _nested(item, depth, seen)
+        for key, item in value.items()
+    )
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximate number of bytes held by ``value``.
+
+    Frames count their deep memory usage and arrays their buffer; containers
+    and plain objects are walked a few levels deep. Shared objects are counted
+    once. Good enough to budget a cache, not an exact measurement.
+    """
+    return _nested(value, 0, set())
@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+# Spans kept in memory; the oldest are dropped first
+DEFAULT_TRACE_CAPACITY = 100_000
+
+# Span args that may hold user data: query text, and who made the request
+REDACTED_ARGS = frozenset({"sql", "session_id"})
+
+_trace_session: ContextVar[str | None] = ContextVar(
+    "preswald_trace_session", default=None
+)
+
+
+class Tracer:
+    """
+    Timeline of what the server spends its time on: script runs, reruns,
+    atoms, data queries, and serializing and sending messages.
+
+    Spans are kept in a ring buffer of the last ``capacity`` spans, and
+    exported as Chrome trace events, which chrome://tracing and
+    https://ui.perfetto.dev open. Spans made on an asyncio task go on a track
+    of their own, so concurrent tasks of the event loop don't overlap.
+
+    Nothing is recorded until ``enabled`` is set, by ``preswald run --trace``
+    or ``enabled = true`` in the [tracing] section of preswald.toml.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_TRACE_CAPACITY, enabled: bool = False):
+        self.enabled = enabled
+        self._spans: deque[tuple] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, category: str, **args: Any) -> Iterator[dict]:
+        """
+        Record the time spent in the block.
+
+        Yields the span's arguments, which the block can add to, e.g. a
+        status known only at the end. The session of the current context and
+        the exception that ended the block, if any, are added too.
+        """
+        if not self.enabled:
+            yield args
+            return
+
+        track = _current_track()
+        start = time.perf_counter()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            session_id = _trace_session.get()
+            if session_id is not None:
+                args.setdefault("session_id", session_id)
+            with self._lock:
+                self._spans.append((name, category, start, duration, track, args))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    def events(
+        self, session_id: str | None = None, redact: bool = False
+    ) -> list[dict[str, Any]]:
+        """
+        Recorded spans as Chrome trace events, optionally of one session.
+
+        With ``redact``, the REDACTED_ARGS are replaced by a digest, so spans
+        of the same query or session can still be told apart.
+        """
+        with self._lock:
+            spans = list(self._spans)
+
+        pid = os.getpid()
+        tracks: dict[tuple[int, str], int] = {}
+        events = []
+        for name, category, start, duration, track, args in spans:
+            if session_id is not None and args.get("session_id") != session_id:
+                continue
+            events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": round((start - self._origin) * 1e6, 3),
+                    "dur": round(duration * 1e6, 3),
+                    "pid": pid,
+                    "tid": tracks.setdefault(track, len(tracks) + 1),
+                    "args": _redact(args) if redact else args,
+                }
+            )
+        names = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": track_name},
+            }
+            for (_, track_name), tid in tracks.items()
+        ]
+        return names + events
+
+    def export(
+        self,
+        path: str | None = None,
+        session_id: str | None = None,
+        redact: bool = False,
+    ) -> dict[str, Any]:
+        """The trace as a Chrome trace event document, also written to ``path``."""
+        trace = {
+            "traceEvents": self.events(session_id, redact),
+            "displayTimeUnit": "ms",
+        }
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(trace, f, default=str)
+            logger.info(f"Wrote {len(trace['traceEvents'])} trace events to {path}")
+        return trace
+
+
+def _redact(args: dict[str, Any]) -> dict[str, Any]:
+    return {
+        key: (
+            "sha256:" + hashlib.sha256(str(value).encode()).hexdigest()[:12]
+            if key in REDACTED_ARGS
+            else value
+        )
+        for key, value in args.items()
+    }
+
+
+def _current_track() -> tuple[int, str]:
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:  # no running event loop in this thread
+        task = None
+    if task is not None:
+        return id(task), f"task {task.get_name()}"
+    thread = threading.current_thread()
+    return thread.ident, thread.name
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """The process-wide tracer."""
+    return _tracer
+
+
+def span(name: str, category: str, **args: Any):
+    """Record a span on the process-wide tracer; see Tracer.span."""
+    return _tracer.span(name, category, **args)
+
+
+@contextmanager
+def trace_session(session_id: str | None) -> Iterator[None]:
+    """Tag the spans recorded in the block with a client session."""
+    token = _trace_session.set(session_id)
+    try:
+        yield
+    finally:
+        _trace_session.reset(token)
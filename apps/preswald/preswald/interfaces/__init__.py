@@ -27,8 +27,14 @@ from .components import (
     topbar,
     workflow_dag,
 )
-from .data import connect, get_df, query
-from .workflow import RetryPolicy, Workflow, WorkflowAnalyzer
+from .data import connect, get_df, query, query_bbox, search, time_range
+from .workflow import (
+    RetryPolicy,
+    RunCancelledError,
+    Workflow,
+    WorkflowAnalyzer,
+    checkpoint,
+)
 
 
 # Get all imported names (excluding special names like __name__)
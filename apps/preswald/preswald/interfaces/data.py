@@ -48,3 +48,65 @@ def get_df(source_name: str, table_name: str | None = None) -> pd.DataFrame:
         return df_result
     except Exception as e:
         logger.error(f"Error getting a dataframe from data source: {e}")
+
+
+def query_bbox(
+    source_name: str,
+    bbox: tuple[float, float, float, float],
+    max_points: int = 5000,
+) -> pd.DataFrame:
+    """
+    Get the points of a spatially indexed source that fall inside a bounding box.
+    The bbox is (west, south, east, north) in degrees. When more than max_points
+    points are inside, one aggregated row per grid cell is returned instead,
+    with a `count` column holding the number of points in that cell.
+    """
+    try:
+        service = PreswaldService.get_instance()
+        df_result = service.data_manager.query_bbox(source_name, bbox, max_points)
+        logger.info(f"Successfully queried bbox {bbox} from data source: {source_name}")
+        return df_result
+    except Exception as e:
+        logger.error(f"Error querying bbox from data source: {e}")
+
+
+def time_range(
+    source_name: str,
+    start=None,
+    end=None,
+    bucket: str | None = None,
+) -> pd.DataFrame:
+    """
+    Get the rows of a time indexed source with a timestamp in [start, end).
+    If a bucket ("minute", "hour", "day", "week", "month", "quarter", "year") is
+    given, the rows are resampled into one row per bucket instead, answered from
+    the smallest precomputed rollup that covers the request.
+    """
+    try:
+        service = PreswaldService.get_instance()
+        df_result = service.data_manager.time_range(source_name, start, end, bucket)
+        logger.info(f"Successfully queried time range from data source: {source_name}")
+        return df_result
+    except Exception as e:
+        logger.error(f"Error querying time range from data source: {e}")
+
+
+def search(
+    source_name: str,
+    query: str,
+    limit: int | None = 100,
+    ids_only: bool = False,
+):
+    """
+    Full-text search over the columns listed in [data.<name>.search] in preswald.toml.
+    Every word of the query must appear in a matching row; the last word also
+    matches as a prefix. Returns the matching rows as a DataFrame, or just their
+    row ids when ids_only is True.
+    """
+    try:
+        service = PreswaldService.get_instance()
+        result = service.data_manager.search(source_name, query, limit, ids_only)
+        logger.info(f"Successfully searched data source: {source_name}")
+        return result
+    except Exception as e:
+        logger.error(f"Error searching data source: {e}")
@@ -1,23 +1,70 @@
+import asyncio
+import dataclasses
 import hashlib
 import inspect
+import itertools
 import logging
+import math
+import os
 import pickle
+import random
+import shutil
+import sys
+import tempfile
+import threading
 import time
+import types
 import uuid
-from collections.abc import Callable
+import weakref
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar, copy_context
 from dataclasses import dataclass, field
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum
-from functools import wraps
-from typing import Any, Optional
+from functools import partial, wraps
+from typing import TYPE_CHECKING, Any, ClassVar, Optional
 
 import networkx as nx
 import plotly.graph_objects as go
 
+from preswald.engine import process_pool
+from preswald.engine.disk_cache import DiskCache
+from preswald.engine.fingerprint import Fingerprinter
+from preswald.engine.managers.data import record_source_reads
+from preswald.engine.sizing import estimate_size
+from preswald.engine.tracing import span
+
+
+if TYPE_CHECKING:
+    from preswald.engine.base_service import BasePreswaldService
+
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+IS_PYODIDE = "pyodide" in sys.modules
+
+DEFAULT_DISK_CACHE_PATH = ".preswald_cache"
+
+# How long an atom waits for an identical computation in flight elsewhere
+# before computing the result itself
+SINGLE_FLIGHT_TIMEOUT = 120.0
+
+# Seconds between sweeps of expired results out of the atom cache
+CACHE_SWEEP_INTERVAL = 30.0
+
+# Seconds a background precomputation waits while a session's run is going on
+PRECOMPUTE_PAUSE = 0.05
+
 
 class AtomStatus(Enum):
     """Represents the current status of an atom's execution."""
@@ -50,6 +97,105 @@ class AtomResult:
         return None
 
 
+class CircuitOpenError(Exception):
+    """Raised instead of calling an atom while its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing upstream for a while, for every session at once.
+
+    After ``failure_threshold`` consecutive failed attempts the breaker opens
+    and attempts fail immediately with CircuitOpenError. Once
+    ``reset_timeout`` seconds have passed, one trial attempt is let through:
+    success closes the breaker, failure opens it again.
+    """
+
+    _registry: ClassVar[dict[str, "CircuitBreaker"]] = {}
+    _registry_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, name: str, **settings) -> "CircuitBreaker":
+        """
+        The process-wide breaker called ``name``, created on first use.
+
+        The first settings a breaker is created with are kept; later ones
+        that differ are ignored with a warning.
+        """
+        with cls._registry_lock:
+            if name not in cls._registry:
+                cls._registry[name] = cls(name, **settings)
+            breaker = cls._registry[name]
+        conflicts = {
+            key: value
+            for key, value in settings.items()
+            if getattr(breaker, key) != value
+        }
+        if conflicts:
+            kept = {key: getattr(breaker, key) for key in conflicts}
+            logger.warning(
+                f"Circuit '{name}' already exists with {kept}; ignoring {conflicts}"
+            )
+        return breaker
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """
+        Raise CircuitOpenError unless a call may go through now.
+
+        Returns True if the call is the trial of a half-open breaker, which
+        must end with record_success(), record_failure() or release_trial().
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return False
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+        raise CircuitOpenError(f"Circuit '{self.name}' is open, not calling upstream")
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit '{self.name}' closed")
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release_trial(self) -> None:
+        """End a trial call without an outcome, so the next call is the trial."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial_running:
+                    logger.warning(
+                        f"Circuit '{self.name}' opened after {self.failures} failures"
+                    )
+                self.opened_at = time.monotonic()
+                self._trial_running = False
+
+
 class RetryPolicy:
     """Defines how retries should be handled for failed atoms."""
 
@@ -59,66 +205,456 @@ class RetryPolicy:
         delay: float = 1.0,
         backoff_factor: float = 2.0,
         retry_exceptions: tuple = (Exception,),
+        jitter: float = 0.5,
+        max_retry_time: float | None = None,
+        circuit_breaker: str | None = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
     ):
+        """
+        Args:
+            max_attempts: Attempts in total, including the first.
+            delay: Seconds to wait before the first retry.
+            backoff_factor: Multiplier applied to the delay after each retry.
+            retry_exceptions: Exception types worth retrying.
+            jitter: Fraction of each delay that is randomized, so clients
+                that failed together don't all retry at the same moment.
+            max_retry_time: Give up once this many seconds would have passed
+                since the first attempt, whatever max_attempts says.
+            circuit_breaker: Name of a CircuitBreaker shared by all atoms
+                and sessions using it, typically one per upstream service.
+            failure_threshold: Consecutive failures that open the breaker.
+            reset_timeout: Seconds the breaker stays open before a trial.
+        """
         self.max_attempts = max_attempts
         self.delay = delay
         self.backoff_factor = backoff_factor
         self.retry_exceptions = retry_exceptions
+        self.jitter = jitter
+        self.max_retry_time = max_retry_time
+        self.breaker = (
+            CircuitBreaker.get(
+                circuit_breaker,
+                failure_threshold=failure_threshold,
+                reset_timeout=reset_timeout,
+            )
+            if circuit_breaker
+            else None
+        )
+
+    def should_retry(self, attempt: int, error: Exception, elapsed: float = 0.0) -> bool:
+        """Determine if another retry attempt should be made.
 
-    def should_retry(self, attempt: int, error: Exception) -> bool:
-        """Determine if another retry attempt should be made."""
+        ``elapsed`` is the time since the first attempt, including the
+        upcoming delay.
+        """
+        if isinstance(error, CircuitOpenError):
+            return False
+        if self.max_retry_time is not None and elapsed > self.max_retry_time:
+            return False
         return attempt < self.max_attempts and isinstance(error, self.retry_exceptions)
 
     def get_delay(self, attempt: int) -> float:
         """Calculate the delay before the next retry attempt."""
-        return self.delay * (self.backoff_factor ** (attempt - 1))
+        delay = self.delay * (self.backoff_factor ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())
+
+
+@dataclass
+class AtomTrace:
+    """
+    What an atom touched while it ran, beyond its declared inputs. Kept next to
+    the cached result so a cache hit can be checked and replayed.
+    """
+
+    components: list[dict] = field(default_factory=list)  # in render order
+    widget_reads: dict[str, Any] = field(default_factory=dict)  # id -> value
+    source_reads: dict[str, int | None] = field(default_factory=dict)  # name -> version
+
+
+# Trace of the atom running in the current thread/task, if any
+_active_trace: ContextVar[AtomTrace | None] = ContextVar(
+    "preswald_active_trace", default=None
+)
+
+
+def record_component(component: dict) -> None:
+    """Note a component rendered by the running atom, for replay on cache hits."""
+    if (trace := _active_trace.get()) is not None:
+        trace.components.append(component)
+
+
+def record_widget_read(component_id: str, value: Any) -> None:
+    """Note a widget state read by the running atom."""
+    if (trace := _active_trace.get()) is not None:
+        trace.widget_reads.setdefault(component_id, value)
+
+
+class RunCancelledError(Exception):
+    """Raised when a workflow run is superseded by a newer one."""
+
+
+# Tells whether the run the current atom belongs to has been superseded
+_run_cancelled: ContextVar[Callable[[], bool] | None] = ContextVar(
+    "preswald_run_cancelled", default=None
+)
+
+
+# (loop, callback) told when a generator atom has shown a partial result
+_stream_listener: ContextVar[tuple[asyncio.AbstractEventLoop, Callable] | None] = (
+    ContextVar("preswald_stream_listener", default=None)
+)
+
+
+# Widget values of the combination a precomputation is running, by component
+# ID; read instead of the widget state shared by sessions
+_widget_overrides: ContextVar[dict[str, Any] | None] = ContextVar(
+    "preswald_widget_overrides", default=None
+)
+
+
+# Components the client a run is for shows, and those it was sent (None if
+# unknown), as passed to execute_async(); unset, set_visible_components() applies
+_client_view: ContextVar[tuple[set[str], set[str] | None] | None] = ContextVar(
+    "preswald_client_view", default=None
+)
+
+
+# Client session the current run is for, set by its ScriptRunner. Results of
+# shared=False atoms are cached per session; None is the standalone session.
+_active_session: ContextVar[str | None] = ContextVar(
+    "preswald_active_session", default=None
+)
+
+
+@contextmanager
+def active_session(session_id: str | None) -> Iterator[None]:
+    """Run the block's workflow executions for a client session."""
+    token = _active_session.set(session_id)
+    try:
+        yield
+    finally:
+        _active_session.reset(token)
+
+
+def widget_overrides() -> dict[str, Any]:
+    """Widget values overridden for the running atom, by component ID."""
+    return _widget_overrides.get() or {}
+
+
+def checkpoint() -> None:
+    """
+    Stop the running atom if a newer widget update superseded its run.
+
+    Long atoms can call this between steps, e.g. once per loop iteration,
+    to give up early instead of finishing work nobody will see. Raises
+    RunCancelledError if the run was superseded, and does nothing otherwise.
+    """
+    is_cancelled = _run_cancelled.get()
+    if is_cancelled is not None and is_cancelled():
+        raise RunCancelledError("Run superseded by a newer update")
+
+
+@dataclass
+class CacheEntry:
+    """A cached atom result with what the eviction policies need to rank it."""
+
+    result: AtomResult
+    trace: AtomTrace
+    size: int  # Estimated bytes held by the result value
+    cost: float  # Seconds it took to compute
+    hits: int = 0
+    priority: float = 0.0  # Eviction rank under the "cost" policy
+    expires: float | None = None  # time.monotonic() deadline of atoms with a ttl
+
+    def expired(self, now: float | None = None) -> bool:
+        if self.expires is None:
+            return False
+        return (time.monotonic() if now is None else now) >= self.expires
 
 
 class AtomCache:
-    """Manages caching of atom results and determines when recomputation is needed."""
+    """Caches atom results; a lookup that misses means the atom must run.
 
-    def __init__(self):
-        self.cache: dict[str, AtomResult] = {}
-        self.hash_cache: dict[str, str] = {}  # Stores input parameter hashes
+    Results are kept per atom and input hash, so going back to an earlier
+    widget value is a hit. With a memory budget, entries are evicted by the
+    configured policy; the latest result of each atom is always kept, since
+    the workflow context holds on to its value anyway.
+
+    Results stored with a ttl expire: they are dropped when looked up after
+    their deadline, and by a background sweeper so that results nobody asks
+    for again don't hold memory.
+    """
 
-    def compute_input_hash(self, atom_name: str, kwargs: dict[str, Any]) -> str:
+    POLICIES = ("lru", "lfu", "cost")
+
+    def __init__(self, max_bytes: int | None = None, policy: str = "lru"):
+        # (atom name, input hash) -> entry, least recently used first
+        self.entries: OrderedDict[tuple[str, str], CacheEntry] = OrderedDict()
+        self.latest: dict[str, tuple[str, str]] = {}  # atom name -> key of last store
+        self.fingerprinter = Fingerprinter()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # Inflation value of the "cost" policy (GreedyDual-Size-Frequency):
+        # raised to each evicted entry's priority, so entries that stop
+        # being hit age out even if they were expensive
+        self._inflation = 0.0
+        # (atom name, input hash) -> completed when that result is computed
+        self._in_flight: dict[tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self._sweeper: threading.Thread | None = None
+        self.configure(max_bytes, policy)
+
+    def configure(self, max_bytes: int | None = None, policy: str = "lru") -> None:
+        """Set the memory budget (None for unbounded) and eviction policy."""
+        if policy not in self.POLICIES:
+            raise ValueError(
+                f"Unsupported cache policy '{policy}', expected one of {self.POLICIES}"
+            )
+        self.max_bytes = max_bytes
+        self.policy = policy
+        with self._lock:
+            self._evict()
+
+    def compute_input_hash(
+        self,
+        atom_name: str,
+        kwargs: dict[str, Any],
+        code_hash: str = "",
+        environment: dict[str, Any] | None = None,
+        portable: bool = False,
+    ) -> str | None:
         """
         Compute a hash of the input parameters to determine if recomputation is needed.
         The hash includes:
         1. The atom name (since different atoms with same inputs should have different hashes)
         2. The input parameter values
         3. The hashes of any dependent atoms (to capture changes in the dependency chain)
+        4. The atom's code and the globals/closure values it references, so an
+           edited script invalidates the atoms it changed
+
+        With ``portable``, data source frames are hashed by content rather than
+        by their in-process version, so the hash holds across restarts.
+
+        Returns None if any value can't be fingerprinted; such atoms always
+        recompute.
         """
-        # Create a list of items to hash
-        hash_items = [
-            atom_name,
-            # Sort kwargs to ensure consistent ordering
-            sorted([(k, self._hash_value(v)) for k, v in kwargs.items()]),
-        ]
+        fingerprint = partial(self.fingerprinter.fingerprint, portable=portable)
+        values = {}
+        for prefix, items in (("arg", kwargs), ("env", environment or {})):
+            for name, value in items.items():
+                digest = fingerprint(value)
+                if digest is None:
+                    logger.debug(
+                        f"Input {name} of atom {atom_name} can't be fingerprinted, "
+                        "it will always recompute"
+                    )
+                    return None
+                values[f"{prefix}:{name}"] = digest
 
-        # Convert to bytes and hash
-        hash_str = str(hash_items).encode("utf-8")
-        return hashlib.sha256(hash_str).hexdigest()
+        # Sort inputs to ensure consistent ordering
+        hash_items = [atom_name, code_hash, sorted(values.items())]
+        return hashlib.sha256(str(hash_items).encode("utf-8")).hexdigest()
 
-    def _hash_value(self, value: Any) -> str:
+    def get(
+        self,
+        atom_name: str,
+        input_hash: str | None,
+        is_valid: Callable[[AtomTrace], bool] | None = None,
+    ) -> CacheEntry | None:
         """
-        Create a hash for a value, handling different types appropriately.
-        For complex objects, we use their memory address as a proxy for identity.
+        Look up the result cached for these inputs, counting a hit or miss.
+
+        Entries past their ttl, or whose trace fails ``is_valid`` (e.g. a
+        widget they read has changed), are dropped and count as a miss.
         """
+        key = (atom_name, input_hash)
+        with self._lock:
+            entry = self.entries.get(key) if input_hash is not None else None
+            if entry is not None and entry.expired():
+                logger.debug(f"Cached result {key} of atom {atom_name} expired")
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is not None and is_valid is not None and not is_valid(entry.trace):
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            entry.hits += 1
+            entry.priority = self._priority(entry)
+            self.entries.move_to_end(key)
+            self.latest[atom_name] = key
+            return entry
+
+    def store(
+        self,
+        atom_name: str,
+        result: AtomResult,
+        trace: AtomTrace,
+        ttl: float | None = None,
+    ) -> None:
+        """Cache a result, for at most ``ttl`` seconds if given."""
+        if result.input_hash is None:
+            return  # inputs can't be fingerprinted, so this can never be a hit
+        key = (atom_name, result.input_hash)
+        entry = CacheEntry(
+            result=result,
+            trace=trace,
+            size=estimate_size(result.value),
+            cost=result.execution_time or 0.0,
+            expires=None if ttl is None else time.monotonic() + ttl,
+        )
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            entry.priority = self._priority(entry)
+            self.entries[key] = entry
+            self.size += entry.size
+            self.latest[atom_name] = key
+            self._evict()
+        if ttl is not None:
+            self._start_sweeper()
+
+    def discard(self, atom_name: str, input_hash: str | None) -> None:
+        """Drop a result, even the latest of its atom, e.g. to free its value."""
+        with self._lock:
+            if (atom_name, input_hash) in self.entries:
+                self._remove((atom_name, input_hash))
+
+    def sweep(self) -> int:
+        """Drop every expired result now; returns how many were dropped."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, entry in self.entries.items() if entry.expired(now)]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        if expired:
+            logger.debug(f"Swept {len(expired)} expired results from the atom cache")
+        return len(expired)
+
+    def claim(self, atom_name: str, input_hash: str) -> Future | None:
+        """
+        Single-flight: claim computing a result, or find it already claimed.
+
+        Returns None if the caller should compute the result, and then call
+        release(). Otherwise returns a future that completes when the
+        computation in flight does; the result is in the cache by then,
+        unless it failed.
+        """
+        key = (atom_name, input_hash)
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                future = Future()
+                future.set_running_or_notify_cancel()  # waiters can't cancel it
+                self._in_flight[key] = future
+            return in_flight
+
+    def release(self, atom_name: str, input_hash: str) -> None:
+        """Finish a claimed computation, waking everyone waiting for it."""
+        with self._lock:
+            future = self._in_flight.pop((atom_name, input_hash), None)
+        if future is not None:
+            future.set_result(None)
+
+    def stats(self) -> dict[str, Any]:
+        """Counters and sizes for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "policy": self.policy,
+                "max_bytes": self.max_bytes,
+                "bytes": self.size,
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "in_flight": len(self._in_flight),
+            }
+
+    def _start_sweeper(self) -> None:
+        # Started with the first result that can expire. In the browser
+        # there are no threads; expired results are dropped on lookup only.
+        if self._sweeper is not None or IS_PYODIDE:
+            return
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(
+                target=_sweep_periodically,
+                args=(weakref.ref(self),),
+                name="preswald-cache-sweeper",
+                daemon=True,
+            )
+        self._sweeper.start()
+
+    def _priority(self, entry: CacheEntry) -> float:
+        # Bytes are floored at 1KB so tiny values don't get near-infinite rank
+        return self._inflation + (entry.hits + 1) * entry.cost / max(entry.size, 1024)
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        entry = self.entries.pop(key)
+        self.size -= entry.size
+        if self.latest.get(key[0]) == key:
+            del self.latest[key[0]]
+
+    def _evict(self) -> None:
+        """Drop entries until the cache fits its budget. Call with the lock held."""
+        if self.max_bytes is None:
+            return
+        pinned = set(self.latest.values())
+        while self.size > self.max_bytes:
+            candidates = [key for key in self.entries if key not in pinned]
+            if not candidates:
+                return
+            if self.policy == "lru":
+                victim = candidates[0]
+            elif self.policy == "lfu":
+                # Least hits; ties go to the least recently used
+                victim = min(candidates, key=lambda key: self.entries[key].hits)
+            else:
+                victim = min(candidates, key=lambda key: self.entries[key].priority)
+                self._inflation = self.entries[victim].priority
+            logger.debug(f"Evicting cached result {victim} from the atom cache")
+            self._remove(victim)
+            self.evictions += 1
+
+
+def _sweep_periodically(cache_ref: "weakref.ref[AtomCache]") -> None:
+    # Holds the cache weakly, so a dropped cache stops its sweeper
+    while True:
+        time.sleep(CACHE_SWEEP_INTERVAL)
+        cache = cache_ref()
+        if cache is None:
+            return
         try:
-            # Try to pickle the value first
-            return hashlib.sha256(pickle.dumps(value)).hexdigest()
-        except:
-            # If pickling fails, use the object's memory address
-            return str(id(value))
-
-    def should_recompute(self, atom_name: str, input_hash: str) -> bool:
-        """Determine if an atom needs to be recomputed based on its inputs."""
-        if atom_name not in self.cache:
-            return True
+            cache.sweep()
+        except Exception as e:
+            logger.warning(f"Error sweeping expired atom results: {e}")
+        del cache
 
-        cached_result = self.cache[atom_name]
-        return cached_result.input_hash != input_hash
+
+_shared_cache = AtomCache()
+
+
+def get_shared_cache() -> AtomCache:
+    """
+    The result cache shared by every workflow in the process.
+
+    Keys are atom names, code hashes and input fingerprints, so sessions
+    running the same app with the same inputs reuse each other's results.
+    """
+    return _shared_cache
 
 
 @dataclass
@@ -134,16 +670,76 @@ class Atom:
     retry_policy: RetryPolicy | None = None
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
     force_recompute: bool = False  # Flag to force recomputation regardless of cache
+    isolation: str | None = None  # "process" runs the atom in a worker process
+    persist: bool = False  # Keep results in the disk cache across restarts
+    shared: bool = True  # Reuse results across workflows through the shared cache
+    on: str = "final"  # "each" also runs on partial values of generator dependencies
+    throttle: float = 0.25  # Generator atoms: min seconds between partial updates
+    ttl: float | None = None  # Seconds a cached result stays valid
+    cache_key: Callable[..., Any] | None = None  # Replaces fingerprinting the inputs
+    cache: bool = True  # False: always recompute, never store results
 
     def __post_init__(self):
         # Extract function signature to understand inputs
         self.signature = inspect.signature(self.func)
+        # Fingerprint of the function body, part of the cache key
+        self.code_hash = _code_hash(self.func)
+        # Whether the function can be sent to a worker process. Workers import
+        # it by name, which fails for __main__ and the exec'd app script.
+        try:
+            pickle.dumps(self.func)
+            self.picklable = getattr(self.func, "__module__", None) not in (
+                None,
+                "__main__",
+            )
+        except Exception:
+            self.picklable = False
         # Set default retry policy if none provided
         if self.retry_policy is None:
             self.retry_policy = RetryPolicy()
 
         # Store the original function
         self.original_func = self.func
+        unwrapped = inspect.unwrap(self.original_func)
+        # Generator atoms yield partial values; the last one is the result
+        self.is_stream = inspect.isgeneratorfunction(
+            unwrapped
+        ) or inspect.isasyncgenfunction(unwrapped)
+        self.is_async = inspect.iscoroutinefunction(
+            unwrapped
+        ) or inspect.isasyncgenfunction(unwrapped)
+
+        if self.is_stream:
+            # Calling a generator function only creates the generator; the
+            # workflow logs and times its steps as it consumes them
+            return
+
+        if self.is_async:
+
+            @wraps(self.original_func)
+            async def wrapped_coroutine(*args, **kwargs):
+                logger.info(f"Executing atom: {self.name}")
+                start_time = time.time()
+                try:
+                    result = await self.original_func(*args, **kwargs)
+                    logger.info(f"Atom {self.name} completed successfully")
+                    return result
+                except RunCancelledError:
+                    logger.info(f"Atom {self.name} stopped at a checkpoint")
+                    raise
+                except Exception as e:
+                    logger.error(
+                        f"Atom {self.name} failed with error: {e!s}", exc_info=True
+                    )
+                    raise
+                finally:
+                    execution_time = time.time() - start_time
+                    logger.info(
+                        f"Atom {self.name} execution time: {execution_time:.2f}s"
+                    )
+
+            self.func = wrapped_coroutine
+            return
 
         # Create the wrapped function
         @wraps(self.original_func)
@@ -154,6 +750,9 @@ class Atom:
                 result = self.original_func(*args, **kwargs)
                 logger.info(f"Atom {self.name} completed successfully")
                 return result
+            except RunCancelledError:
+                logger.info(f"Atom {self.name} stopped at a checkpoint")
+                raise
             except Exception as e:
                 logger.error(
                     f"Atom {self.name} failed with error: {e!s}", exc_info=True
@@ -167,6 +766,71 @@ class Atom:
         # Replace the function with the wrapped version
         self.func = wrapped_func
 
+    def environment(self) -> dict[str, Any]:
+        """Closure and global values the function reads, by name.
+
+        Modules, functions and classes are left out: they are code, and the
+        atoms using them are not expected to change with them between reruns.
+        """
+        func = inspect.unwrap(self.original_func)
+        code = getattr(func, "__code__", None)
+        if code is None:
+            return {}
+
+        values = {}
+        for name, cell in zip(code.co_freevars, func.__closure__ or (), strict=False):
+            try:
+                values[f"closure:{name}"] = cell.cell_contents
+            except ValueError:  # empty cell
+                continue
+        func_globals = getattr(func, "__globals__", {})
+        for name in _referenced_names(code):
+            if name in func_globals:
+                values[f"global:{name}"] = func_globals[name]
+        return {
+            name: value
+            for name, value in values.items()
+            if not _is_code_like(value)
+        }
+
+
+def _referenced_names(code: types.CodeType) -> set[str]:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _referenced_names(const)
+    return names
+
+
+def _is_code_like(value: Any) -> bool:
+    return (
+        inspect.ismodule(value)
+        or inspect.isroutine(value)
+        or inspect.isclass(value)
+        or isinstance(value, Workflow)
+    )
+
+
+def _code_hash(func: Callable) -> str:
+    """Hash a function's bytecode, constants and names, ignoring line numbers."""
+    code = getattr(inspect.unwrap(func), "__code__", None)
+    if code is None:
+        return ""
+
+    digest = hashlib.sha256()
+
+    def feed(code: types.CodeType):
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names).encode("utf-8"))
+        for const in code.co_consts:
+            if isinstance(const, types.CodeType):
+                feed(const)
+            else:
+                digest.update(repr(const).encode("utf-8"))
+
+    feed(code)
+    return digest.hexdigest()
+
 
 class WorkflowContext:
     """
@@ -176,39 +840,229 @@ class WorkflowContext:
     def __init__(self):
         self.variables: dict[str, Any] = {}
         self.results: dict[str, AtomResult] = {}
+        # Atoms whose value was released to save memory; the workflow reloads
+        # or recomputes it when it's needed again
+        self.released: set[str] = set()
+        self.reload: Callable[[str], Any] | None = None
 
     def get_variable(self, name: str) -> Any:
+        if name in self.released and self.reload is not None:
+            return self.reload(name)
         return self.variables.get(name)
 
     def set_variable(self, name: str, value: Any):
         self.variables[name] = value
+        self.released.discard(name)
 
     def set_result(self, atom_name: str, result: AtomResult):
         self.results[atom_name] = result
-        if result.status == AtomStatus.COMPLETED:
+        if result.status in (AtomStatus.COMPLETED, AtomStatus.SKIPPED):
             self.variables[atom_name] = result.value
+            self.released.discard(atom_name)
             logger.info(f"[CONTEXT] Set result for {atom_name} = {result.value}")
 
+    def release(self, name: str) -> None:
+        """Drop a value, keeping its result's status, timing and input hash."""
+        self.variables.pop(name, None)
+        if (result := self.results.get(name)) is not None:
+            self.results[name] = dataclasses.replace(result, value=None)
+        self.released.add(name)
+
+
+def _latest_components(components: list) -> list:
+    """Keep the last version of each component ID, in first-rendered order."""
+    latest: dict[Any, Any] = {}
+    for index, component in enumerate(components):
+        data = getattr(component, "_preswald_component", component)
+        component_id = data.get("id") if isinstance(data, dict) else None
+        latest[component_id if component_id is not None else ("#", index)] = component
+    return list(latest.values())
+
+
+def _widget_domain(component: dict, limit: int) -> list | None:
+    """
+    Up to ``limit`` values a bounded widget can take, nearest to its current
+    value first, or None if the widget isn't bounded.
+    """
+    kind = component.get("type")
+    current = component.get("value")
+    if kind == "checkbox":
+        return [bool(current), not current]
+    if kind == "selectbox":
+        options = list(component.get("options") or [])
+        index = options.index(current) if current in options else 0
+        return [options[i] for i in _nearest_first(len(options), index, limit)]
+    if kind != "slider":
+        return None
+
+    low, high, step = component.get("min"), component.get("max"), component.get("step")
+    if low is None or high is None or not step or step <= 0 or high < low:
+        return None
+    count = math.floor((high - low) / step + 1e-9) + 1
+    index = round(((current if current is not None else low) - low) / step)
+    # Round like the browser does, and send integral values as ints, as
+    # they arrive from the page: the widget value is part of cache keys
+    decimals = max(0, -Decimal(str(step)).as_tuple().exponent)
+    values = []
+    for i in _nearest_first(count, min(max(index, 0), count - 1), limit):
+        value = round(low + i * step, decimals)
+        values.append(int(value) if float(value).is_integer() else value)
+    return values
+
+
+def _nearest_first(count: int, index: int, limit: int) -> list[int]:
+    """Indices of ``range(count)`` by distance from ``index``, at most ``limit``."""
+    indices = [index] if 0 <= index < count else []
+    distance = 1
+    while len(indices) < min(count, limit):
+        for i in (index + distance, index - distance):
+            if 0 <= i < count and len(indices) < limit:
+                indices.append(i)
+        distance += 1
+    return indices
+
+
+def _lower_thread_priority() -> None:
+    # On Linux, priorities apply per thread, so this only slows down the
+    # precomputation where the CPU is contended; elsewhere it would change
+    # the whole process, so it's skipped
+    if sys.platform != "linux":
+        return
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except OSError as e:
+        logger.debug(f"Could not lower the precomputation thread's priority: {e}")
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _view(
+    visible_components: set[str] | None, rendered_components: set[str] | None
+) -> tuple[set[str], set[str] | None] | None:
+    if visible_components is None:
+        return None
+    return set(visible_components), rendered_components
+
+
+async def _in_thread(func, *args):
+    """Run a blocking call on a worker thread; inline where threads don't exist."""
+    if IS_PYODIDE:
+        return func(*args)
+    return await asyncio.to_thread(func, *args)
+
+
 class Workflow:
     """
     Main workflow class that manages atoms and their execution.
     """
 
-    def __init__(self, service: Optional["BasePreswaldService"] = None, default_retry_policy: RetryPolicy | None = None):
+    EXECUTORS = ("serial", "threads", "processes")
+    ISOLATIONS = (None, "process")
+    STREAM_MODES = ("final", "each")
+    RELEASE_MODES = (None, "drop", "spill")
+    # Smaller values stay in memory; releasing them saves little
+    RELEASE_MIN_BYTES = 1 << 20
+
+    def __init__(
+        self,
+        service: Optional["BasePreswaldService"] = None,
+        default_retry_policy: RetryPolicy | None = None,
+        executor: str = "serial",
+        max_workers: int | None = None,
+        release_values: str | None = None,
+    ):
+        """
+        Args:
+            service: Service the workflow renders into, if any.
+            default_retry_policy: Retry policy for atoms that don't set one.
+            executor: How independent atoms run. "serial" runs one atom at a
+                time; "threads" runs every atom whose dependencies are done on
+                a thread pool; "processes" does the same but calls picklable
+                atom functions in worker processes, for CPU-bound work.
+            max_workers: Pool size for the "threads" and "processes" executors.
+            release_values: What to do with large intermediate values once
+                every atom reading them in a run has run. None keeps them;
+                "drop" frees them, along with their cached results, to be
+                recomputed when needed again; "spill" writes them to a temporary
+                directory first, to be loaded back from there.
+        """
+        if executor not in self.EXECUTORS:
+            raise ValueError(
+                f"Unsupported executor '{executor}', expected one of {self.EXECUTORS}"
+            )
+        self.executor = executor
+        self.max_workers = max_workers
         self.atoms: dict[str, Atom] = {}
+        # Reverse adjacency: dependency name -> names of atoms that depend on it.
+        # Kept in step with atom.dependencies by register_atom/add_dependency.
+        self._dependents: dict[str, set[str]] = {}
+        # Bumped on every change to the atoms or their edges; the execution
+        # order and levels are re-sorted only when it moves
+        self._graph_version = 0
+        self._order_version = -1
+        self._order: list[str] = []
+        self._levels: list[list[str]] = []
         self.context = WorkflowContext()
+        self.context.reload = self._reload
+        self.release_values: str | None = None
+        self._spill: DiskCache | None = None
+        self.configure_release(release_values)
+        # Atom name -> atoms still to run in the current run that read it
+        self._remaining_uses: dict[str, int] = {}
+        self._reload_lock = threading.RLock()
         self.default_retry_policy = default_retry_policy or RetryPolicy()
-        self.cache = AtomCache()
+        # Results are shared with every workflow in the process, except those
+        # of atoms declared with shared=False, which are kept per session
+        self.cache = get_shared_cache()
+        self.session_caches: dict[str | None, AtomCache] = {}
+        self._session_caches_lock = threading.Lock()
+        # Results of persist=True atoms; the service points it next to
+        # preswald.toml, standalone workflows use the working directory
+        self.disk_cache: DiskCache | None = None
         self._component_producers: dict[str, str] = {}  # component_id -> atom_name
-        self._current_atom: str | None = None  # currently executing atom
+        # Currently executing atom, context-local so parallel atoms don't mix
+        self._current_atom_var: ContextVar[str | None] = ContextVar(
+            f"preswald_workflow_atom_{id(self)}", default=None
+        )
+        # Atoms to recompute on their next execution regardless of the cache.
+        # Separate from Atom.force_recompute, which is the user's own setting.
+        self._pending_recompute: set[str] = set()
+        # Components on screen, for runs not made for a client; None evaluates
+        # every atom. Atoms nothing visible needs are deferred until it is,
+        # separately for each session since each shows its own components.
+        self._visible_components: set[str] | None = None
+        self._deferred_by_session: dict[str | None, set[str]] = {}
         self._service = service
         self._is_rerun = False
+        self._precompute_thread: threading.Thread | None = None
+
+    @property
+    def _current_atom(self) -> str | None:
+        return self._current_atom_var.get()
+
+    @_current_atom.setter
+    def _current_atom(self, atom_name: str | None):
+        self._current_atom_var.set(atom_name)
 
     def atom(
         self,
         dependencies: list[str] | None = None,
         retry_policy: RetryPolicy | None = None,
         force_recompute: bool = False,
+        isolation: str | None = None,
+        persist: bool = False,
+        shared: bool = True,
+        on: str = "final",
+        throttle: float = 0.25,
+        ttl: float | None = None,
+        cache_key: Callable[..., Any] | None = None,
+        cache: bool = True,
     ):
         """
         Decorator to create and register an atom in the workflow.
@@ -229,7 +1083,38 @@ class Workflow:
             dependencies: Optional list of atom names this atom depends on.
             retry_policy: Optional custom retry policy.
             force_recompute: If True, this atom will always recompute on execution.
+            isolation: "process" runs the atom in a pooled worker process, so
+                CPU-bound work doesn't hold the server's GIL. Functions that
+                can't be pickled run in-process instead.
+            persist: If True, results are also written to the disk cache and
+                reused after a restart, for the same code and inputs.
+            shared: If False, results are cached for this workflow only, not
+                shared with other sessions. For atoms whose result depends on
+                the session, e.g. on the logged-in user.
+            on: "final" runs the atom once a generator atom it depends on
+                has finished; "each" also runs it on every partial value the
+                generator yields, e.g. to redraw a chart as data arrives.
+            throttle: For generator atoms, the minimum number of seconds
+                between partial updates sent to the page.
+            ttl: Seconds a cached result is reused for, e.g. for atoms that
+                call external APIs. None keeps it until its inputs change.
+            cache_key: Called with the atom's inputs, returns a small value
+                identifying them, used in the cache key instead of
+                fingerprinting the inputs themselves (e.g. large frames).
+            cache: If False, the atom always recomputes and its results are
+                never cached.
         """
+        if isolation not in self.ISOLATIONS:
+            raise ValueError(
+                f"Unsupported isolation '{isolation}', expected one of {self.ISOLATIONS}"
+            )
+        if on not in self.STREAM_MODES:
+            raise ValueError(
+                f"Unsupported on='{on}', expected one of {self.STREAM_MODES}"
+            )
+        if ttl is not None and ttl <= 0:
+            raise ValueError(f"ttl must be a positive number of seconds, got {ttl}")
+
         def decorator(func):
             atom_name = func.__name__
 
@@ -248,8 +1133,18 @@ class Workflow:
                 dependencies=set(atom_deps),
                 retry_policy=retry_policy or self.default_retry_policy,
                 force_recompute=force_recompute,
+                isolation=isolation,
+                persist=persist,
+                shared=shared,
+                on=on,
+                throttle=throttle,
+                ttl=ttl,
+                cache_key=cache_key,
+                cache=cache,
             )
-            self.atoms[atom_name] = atom
+            self.register_atom(atom)
+            if isolation == "process" and atom.picklable and not IS_PYODIDE:
+                process_pool.prewarm(self.max_workers)
             return func
 
         return decorator
@@ -260,67 +1155,742 @@ class Workflow:
         """
         Executes atoms in the workflow, with selective recomputation.
 
+        Async atoms are run on an event loop, concurrently with each other.
+        Use execute_async() instead when already inside a coroutine.
+
         Args:
             recompute_atoms: Optional set of atom names to force recomputation,
-                           regardless of cache status
+                           regardless of cache status. Only these atoms and
+                           their dependents are executed.
         """
         self._is_rerun = True  # prevent duplicate re-registration
         try:
-            # Clear caches and component producers, but not atoms
-            self.cache.cache.clear()
-            self._component_producers.clear()
-
-            # Re-register atoms to ensure they're fresh and bound correctly
-            # Preserve original atoms before clearing
-            original_atoms = list(self.atoms.items())
-
-            # Clear atoms and repopulate cleanly
-            self.atoms.clear()
-            for atom_name, atom in original_atoms:
-                self.atoms[atom_name] = Atom(
-                    name=atom_name,
-                    original_func=atom.original_func,
-                    func=atom.original_func,
-                    dependencies=set(atom.dependencies),
-                    retry_policy=atom.retry_policy,
-                    force_recompute=atom.force_recompute,
-                )
+            pending = self._plan(recompute_atoms)
 
-            execution_order = self._get_execution_order()
+            if any(self.atoms[atom_name].is_async for atom_name in pending):
+                self._run_coroutine(self._execute_async(pending, self.max_workers))
+            elif self.executor == "serial":
+                self._execute_serial(pending)
+            else:
+                self._execute_parallel(pending)
 
-            # Determine which atoms need recomputation
-            atoms_to_recompute = set()
-            if recompute_atoms:
-                atoms_to_recompute = self._get_affected_atoms(recompute_atoms)
-                logger.debug(f"Atoms requiring recomputation: {atoms_to_recompute}")
+            self._release_unused()
+            return self.context.results
+        finally:
+            self._is_rerun = False  # reset after execution
 
-            for atom_name in execution_order:
-                if self._is_rerun and atoms_to_recompute and atom_name not in atoms_to_recompute:
-                    logger.debug(f"Skipping atom {atom_name} (not affected)")
-                    continue
-                atom = self.atoms[atom_name]
+    async def execute_async(
+        self,
+        recompute_atoms: set[str] | None = None,
+        max_concurrency: int | None = None,
+        is_cancelled: Callable[[], bool] | None = None,
+        on_update: Callable[[], Awaitable[None]] | None = None,
+        visible_components: set[str] | None = None,
+        rendered_components: set[str] | None = None,
+    ) -> dict[str, AtomResult]:
+        """
+        Awaitable variant of execute() that doesn't block the event loop.
 
-                # Force recomputation if needed
-                if atom_name in atoms_to_recompute:
-                    atom.force_recompute = True
+        Each atom starts once its dependencies are done. Async atoms run as
+        tasks on the current loop; sync atoms run on threads, one at a time
+        with the serial executor. At most ``max_concurrency`` atoms (default
+        ``max_workers``, else 10) run at once.
 
-                # Execute the atom using values from dependencies
-                result = self._execute_atom(atom)
+        Args:
+            recompute_atoms: Optional set of atom names to force recomputation,
+                           regardless of cache status. Only these atoms and
+                           their dependents are executed.
+            max_concurrency: Optional limit on atoms running at the same time
+            is_cancelled: Optional callable returning True once this run is
+                superseded. No further atoms are started after that, and
+                running atoms stop at their next checkpoint().
+            on_update: Optional coroutine function, awaited on this loop
+                whenever a generator atom has updated its components with a
+                partial value, e.g. to send the page to the client.
+            visible_components: Optional components the client this run is
+                for shows, in place of set_visible_components() for this run.
+            rendered_components: Optional components that client was sent.
+                Atoms rendering any other component always run: the client
+                can't report a component it doesn't have as visible.
+
+        Raises:
+            RunCancelledError: If the run was cancelled before it finished. Atoms
+                it didn't finish keep their previous results.
+        """
+        self._is_rerun = True  # prevent duplicate re-registration
+        token = _run_cancelled.set(is_cancelled)
+        listener_token = _stream_listener.set(
+            (asyncio.get_running_loop(), on_update) if on_update else None
+        )
+        view_token = _client_view.set(
+            _view(visible_components, rendered_components)
+        )
+        try:
+            pending = self._plan(recompute_atoms)
+            await self._execute_async(pending, max_concurrency or self.max_workers)
+            if is_cancelled is not None and is_cancelled():
+                raise RunCancelledError("Run superseded by a newer update")
+            self._release_unused()
+            return self.context.results
+        finally:
+            _client_view.reset(view_token)
+            _stream_listener.reset(listener_token)
+            _run_cancelled.reset(token)
+            self._is_rerun = False
 
-                # Store the result in the context
-                self.context.set_result(atom_name, result)
+    def configure_cache(
+        self, max_bytes: int | None = None, policy: str = "lru"
+    ) -> None:
+        """Set the memory budget and eviction policy of the atom caches.
 
-                # Reset force_recompute flag
-                atom.force_recompute = False
+        The shared cache and each session's cache get the budget separately.
+        """
+        self.cache.configure(max_bytes, policy)
+        with self._session_caches_lock:
+            for cache in self.session_caches.values():
+                cache.configure(max_bytes, policy)
 
-                # If this atom failed and has dependencies, we should stop execution
-                if result.status == AtomStatus.FAILED:
-                    logger.error(f"Workflow stopped due to failure in atom: {atom_name}")
-                    break
+    @property
+    def _deferred(self) -> set[str]:
+        """Atoms deferred for the active session."""
+        return self._deferred_by_session.setdefault(_active_session.get(), set())
+
+    @_deferred.setter
+    def _deferred(self, atom_names: set[str]) -> None:
+        self._deferred_by_session[_active_session.get()] = atom_names
+
+    @property
+    def session_cache(self) -> AtomCache:
+        """Cache of the shared=False atoms of the active session."""
+        session_id = _active_session.get()
+        with self._session_caches_lock:
+            cache = self.session_caches.get(session_id)
+            if cache is None:
+                cache = AtomCache(self.cache.max_bytes, self.cache.policy)
+                self.session_caches[session_id] = cache
+            return cache
+
+    def drop_session(self, session_id: str | None) -> None:
+        """Forget the shared=False results and deferred atoms of a session that ended."""
+        with self._session_caches_lock:
+            self.session_caches.pop(session_id, None)
+        self._deferred_by_session.pop(session_id, None)
+
+    def configure_release(self, release_values: str | None) -> None:
+        """Set what happens to intermediate values no longer needed in a run."""
+        if release_values not in self.RELEASE_MODES:
+            raise ValueError(
+                f"Unsupported release_values '{release_values}', "
+                f"expected one of {self.RELEASE_MODES}"
+            )
+        self.release_values = release_values
+        if release_values == "spill" and self._spill is None and not IS_PYODIDE:
+            spill_dir = tempfile.mkdtemp(prefix="preswald-spill-")
+            self._spill = DiskCache(spill_dir)
+            weakref.finalize(self, shutil.rmtree, spill_dir, ignore_errors=True)
+
+    def _count_uses(self, pending: list[str]) -> None:
+        """Count, for every atom, the atoms of this run that will read it."""
+        uses: dict[str, int] = {}
+        for atom_name in pending:
+            for dep in self.atoms[atom_name].dependencies:
+                uses[dep] = uses.get(dep, 0) + 1
+        self._remaining_uses = uses
+
+    def _consumed(self, atom_name: str) -> None:
+        """An atom has run: release inputs that no atom of this run still needs."""
+        if self.release_values is None:
+            return
+        for dep in self.atoms[atom_name].dependencies:
+            remaining = self._remaining_uses.get(dep, 0) - 1
+            self._remaining_uses[dep] = remaining
+            if remaining <= 0:
+                self._release(dep)
+
+    def _release_unused(self) -> None:
+        """After a run, release values that none of its remaining atoms needs."""
+        if self.release_values is None:
+            return
+        for atom_name in list(self.context.variables):
+            if self._remaining_uses.get(atom_name, 0) <= 0:
+                self._release(atom_name)
+
+    def _release(self, atom_name: str) -> None:
+        # Values shown on the page, and the results of sinks, stay in memory
+        if (
+            atom_name not in self.atoms
+            or atom_name in self.context.released
+            or atom_name not in self.context.variables
+            or not self._dependents.get(atom_name)
+            or atom_name in self._component_producers
+            or atom_name in self._component_producers.values()
+        ):
+            return
+        value = self.context.variables[atom_name]
+        size = estimate_size(value)
+        if size < self.RELEASE_MIN_BYTES:
+            return
+
+        if self._spill is not None and self.release_values == "spill":
+            try:
+                self._spill.clear(atom_name)
+                self._spill.store(atom_name, "latest", value, None, 0.0)
+            except Exception as e:
+                logger.warning(f"Could not spill value of atom {atom_name}: {e}")
+                return
+        # The cache keeps the latest result of every atom, which would hold on
+        # to the value all the same
+        result = self.context.results.get(atom_name)
+        if result is not None:
+            self._cache_for(self.atoms[atom_name]).discard(atom_name, result.input_hash)
+        logger.info(f"Released value of atom {atom_name} ({size / 2**20:.1f} MB)")
+        self.context.release(atom_name)
+
+    def _reload(self, atom_name: str) -> Any:
+        """Bring back a released value: from the spill, the cache, or by rerunning."""
+        with self._reload_lock:
+            if atom_name not in self.context.released:
+                return self.context.variables.get(atom_name)
+            atom = self.atoms[atom_name]
+            result = self.context.results.get(atom_name)
+
+            loaded = self._spill.load(atom_name, "latest") if self._spill else None
+            if loaded is not None:
+                value = loaded[0]
+                logger.info(f"Reloaded value of atom {atom_name} from the spill")
+            elif result is not None and (
+                entry := self._cache_for(atom).get(
+                    atom_name, result.input_hash, self._trace_is_current
+                )
+            ):
+                value = entry.result.value
+                logger.info(f"Reloaded value of atom {atom_name} from the cache")
+            else:
+                logger.info(f"Recomputing released value of atom {atom_name}")
+                # In a copied context, so the atom being run stays current
+                rerun = copy_context().run(self._execute_blocking, atom)
+                if rerun.status == AtomStatus.FAILED:
+                    raise rerun.error
+                value = rerun.value
+
+            self.context.variables[atom_name] = value
+            self.context.released.discard(atom_name)
+            if result is not None:
+                self.context.results[atom_name] = dataclasses.replace(
+                    result, value=value
+                )
+            return value
+
+    def _plan(self, recompute_atoms: set[str] | None) -> list[str]:
+        """Atoms to execute this run, in dependency order."""
+        # Cached results are kept across executions; each atom's input hash
+        # and trace decide whether its result can be reused
+        self.cache.fingerprinter.reset()
+        execution_order = self._get_execution_order()
+
+        # Determine which atoms need recomputation
+        atoms_to_recompute = set()
+        if recompute_atoms:
+            atoms_to_recompute = self._get_affected_atoms(recompute_atoms)
+            # Only the named atoms are forced; their dependents are checked
+            # against the cache and recompute if their inputs changed
+            self._pending_recompute |= set(recompute_atoms) & set(self.atoms)
+            logger.debug(f"Atoms requiring recomputation: {atoms_to_recompute}")
+
+        pending = [
+            atom_name
+            for atom_name in execution_order
+            if not atoms_to_recompute or atom_name in atoms_to_recompute
+        ]
+        logger.debug(
+            f"Skipping atoms (not affected): {set(execution_order) - set(pending)}"
+        )
+        pending = self._apply_visibility(pending)
+        self._count_uses(pending)
+        return pending
+
+    def set_visible_components(self, component_ids: set[str] | None) -> list[str]:
+        """
+        Evaluate only the atoms needed to render these components.
+
+        Atoms whose components are all hidden, and that no visible atom
+        depends on, are deferred instead of run. Pass None to evaluate every
+        atom again.
+
+        Returns:
+            Deferred atoms that are needed now, in execution order; run them
+            with execute_deferred() or execute_deferred_async().
+        """
+        self._visible_components = (
+            None if component_ids is None else set(component_ids)
+        )
+        return self.deferred_atoms()
+
+    def deferred_atoms(
+        self,
+        visible_components: set[str] | None = None,
+        rendered_components: set[str] | None = None,
+    ) -> list[str]:
+        """
+        Deferred atoms needed to render the visible components, in execution
+        order. Takes the same client view as execute_async().
+        """
+        token = _client_view.set(_view(visible_components, rendered_components))
+        try:
+            demanded = self._demanded_atoms()
+        finally:
+            _client_view.reset(token)
+        return [
+            atom_name
+            for atom_name in self._get_execution_order()
+            if atom_name in self._deferred
+            and (demanded is None or atom_name in demanded)
+        ]
+
+    def execute_deferred(self) -> dict[str, AtomResult]:
+        """Run deferred atoms that have become visible."""
+        return self._run_coroutine(self.execute_deferred_async())
 
+    async def execute_deferred_async(
+        self,
+        visible_components: set[str] | None = None,
+        rendered_components: set[str] | None = None,
+    ) -> dict[str, AtomResult]:
+        """
+        Awaitable variant of execute_deferred(), optionally for the client
+        view described in execute_async().
+        """
+        self._is_rerun = True
+        token = _client_view.set(_view(visible_components, rendered_components))
+        try:
+            self.cache.fingerprinter.reset()
+            pending = self._apply_visibility([])
+            self._count_uses(pending)
+            if pending:
+                await self._execute_async(pending, self.max_workers)
+            self._release_unused()
             return self.context.results
         finally:
-            self._is_rerun = False  # reset after execution
+            _client_view.reset(token)
+            self._is_rerun = False
+
+    def precompute(
+        self,
+        widgets: list[str] | None = None,
+        budget_seconds: float = 60.0,
+        max_combinations: int = 256,
+    ) -> threading.Thread | None:
+        """
+        Fill the cache for widget values users haven't picked yet.
+
+        Enumerates the values of bounded widgets on the page (selectbox
+        options, checkboxes and slider steps), nearest to their current values
+        first, and runs the atoms rendering those widgets and everything
+        downstream of them for each combination, in a low priority background
+        thread. The session state isn't touched: the results only land in the
+        cache, so picking a precomputed value later is a cache hit.
+
+        Call it after the page has rendered once, e.g. after execute().
+
+        Args:
+            widgets: Component IDs or labels of the widgets to sweep; None
+                for every bounded widget on the page.
+            budget_seconds: Stop after this many seconds.
+            max_combinations: Stop after this many combinations of values.
+
+        Returns the background thread, or None if there is nothing to do or
+        threads aren't available (in the browser).
+        """
+        if IS_PYODIDE:
+            return None
+        if self._precompute_thread is not None and self._precompute_thread.is_alive():
+            logger.info("A precomputation is already running")
+            return self._precompute_thread
+
+        domains = self._widget_domains(widgets, max_combinations)
+        if not domains:
+            logger.info("No bounded widgets to precompute")
+            return None
+
+        self._precompute_thread = threading.Thread(
+            target=self._precompute,
+            args=(domains, budget_seconds, max_combinations),
+            name="preswald-precompute",
+            daemon=True,
+        )
+        self._precompute_thread.start()
+        return self._precompute_thread
+
+    def _widget_domains(
+        self, widgets: list[str] | None, limit: int
+    ) -> dict[str, list]:
+        """Component ID -> values to precompute, for rendered bounded widgets."""
+        service = self._get_service()
+        if service is None:
+            return {}
+        domains = {}
+        for row in service.get_rendered_components().get("rows", []):
+            for component in row:
+                component = getattr(component, "_preswald_component", component)
+                if not isinstance(component, dict) or "id" not in component:
+                    continue
+                if widgets is not None and not (
+                    component["id"] in widgets or component.get("label") in widgets
+                ):
+                    continue
+                if self.get_component_producer(component["id"]) is None:
+                    continue
+                domain = _widget_domain(component, limit)
+                if domain:
+                    domains[component["id"]] = domain
+        if widgets is not None and len(domains) < len(widgets):
+            logger.warning(
+                f"Found only {list(domains)} of widgets {widgets} on the page "
+                "with a bounded set of values"
+            )
+        return domains
+
+    def _precompute(
+        self, domains: dict[str, list], budget_seconds: float, max_combinations: int
+    ) -> int:
+        """Run every combination of widget values, until the budget is spent."""
+        _lower_thread_priority()
+        deadline = time.monotonic() + budget_seconds
+        producers = {self.get_component_producer(cid) for cid in domains}
+        affected = self._get_affected_atoms(producers)
+        order = [name for name in self._get_execution_order() if name in affected]
+        total = math.prod(len(domain) for domain in domains.values())
+
+        done = 0
+        combinations = itertools.islice(
+            itertools.product(*domains.values()), max_combinations
+        )
+        for values in combinations:
+            overrides = dict(zip(domains, values, strict=True))
+            if not self._precompute_combination(overrides, order, deadline):
+                break
+            done += 1
+        logger.info(
+            f"Precomputed {done} of {total} combinations of widgets {list(domains)} "
+            f"in {budget_seconds - max(deadline - time.monotonic(), 0):.1f}s"
+        )
+        return done
+
+    def _precompute_combination(
+        self, overrides: dict[str, Any], order: list[str], deadline: float
+    ) -> bool:
+        """Run ``order`` with these widget values; False once out of time."""
+        service = self._get_service()
+        token = _widget_overrides.set(overrides)
+        values: dict[str, Any] = {}
+        failed: set[str] = set()
+        try:
+            with service.buffer_components() if service else nullcontext():
+                for atom_name in order:
+                    # Sessions come first: wait for their runs to finish
+                    while self._is_rerun and time.monotonic() < deadline:
+                        time.sleep(PRECOMPUTE_PAUSE)
+                    if time.monotonic() >= deadline:
+                        return False
+                    atom = self.atoms.get(atom_name)
+                    if atom is None or atom.dependencies & failed:
+                        failed.add(atom_name)
+                        continue
+
+                    dependency_values = {}
+                    for dep in atom.dependencies:
+                        if dep in values:
+                            dependency_values[dep] = values[dep]
+                        elif (
+                            dep in self.context.variables
+                            or dep in self.context.released
+                        ):
+                            dependency_values[dep] = self.context.get_variable(dep)
+                    result = self._execute_blocking(atom, dependency_values)
+                    if result.status == AtomStatus.FAILED:
+                        failed.add(atom_name)
+                    else:
+                        values[atom_name] = result.value
+            return True
+        except Exception as e:
+            logger.warning(f"Precomputing widget values {overrides} failed: {e}")
+            return True
+        finally:
+            _widget_overrides.reset(token)
+
+    def _apply_visibility(self, pending: list[str]) -> list[str]:
+        """Drop hidden atoms from ``pending``, adding deferred ones now visible."""
+        demanded = self._demanded_atoms()
+        if demanded is None:
+            ready = set(self._deferred)
+            self._deferred.clear()
+        else:
+            ready = self._deferred & demanded
+            hidden = {atom_name for atom_name in pending if atom_name not in demanded}
+            if hidden:
+                logger.info(f"Deferring atoms with no visible components: {hidden}")
+            self._deferred = (self._deferred - ready) | hidden
+        if not ready:
+            return [atom_name for atom_name in pending if atom_name not in self._deferred]
+
+        pending_set = set(pending) | ready
+        return [
+            atom_name
+            for atom_name in self._get_execution_order()
+            if atom_name in pending_set and atom_name not in self._deferred
+        ]
+
+    def _demanded_atoms(self) -> set[str] | None:
+        """Atoms needed for the visible components, or None if all are."""
+        view = _client_view.get()
+        if view is None and self._visible_components is not None:
+            view = (self._visible_components, None)
+        if view is None:
+            return None
+        visible, rendered = view
+
+        # Atoms are needed if they render a visible component, or if they
+        # render nothing and feed no other atom, so their effect is unknown
+        rendering = set(self._component_producers.values())
+        needed = [
+            self._component_producers.get(component_id, component_id)
+            for component_id in visible
+        ]
+        if rendered is not None:
+            needed.extend(
+                atom_name
+                for component_id, atom_name in self._component_producers.items()
+                if component_id not in rendered
+            )
+        needed.extend(
+            atom_name
+            for atom_name in self.atoms
+            if atom_name not in rendering and not self._dependents.get(atom_name)
+        )
+
+        demanded: set[str] = set()
+        while needed:
+            atom_name = needed.pop()
+            if atom_name in demanded or atom_name not in self.atoms:
+                continue
+            demanded.add(atom_name)
+            needed.extend(self.atoms[atom_name].dependencies)
+        return demanded
+
+    def _execute_serial(self, pending: list[str]) -> None:
+        for atom_name in pending:
+            atom = self.atoms[atom_name]
+
+            # Execute the atom using values from dependencies
+            result = self._execute_atom(atom)
+
+            # Store the result in the context
+            self.context.set_result(atom_name, result)
+            self._consumed(atom_name)
+
+            # If this atom failed and has dependencies, we should stop execution
+            if result.status == AtomStatus.FAILED:
+                logger.error(f"Workflow stopped due to failure in atom: {atom_name}")
+                break
+
+    def _execute_parallel(self, pending: list[str]) -> None:  # noqa: C901
+        """Run each atom as soon as its dependencies are done.
+
+        Results are applied, and buffered components added to the layout, on
+        the calling thread in execution order, so the page renders the same
+        as with the serial executor.
+        """
+        position = {atom_name: i for i, atom_name in enumerate(pending)}
+        waiting_on = {
+            atom_name: {
+                dep for dep in self.atoms[atom_name].dependencies if dep in position
+            }
+            for atom_name in pending
+        }
+        unblocks: dict[str, list[str]] = {atom_name: [] for atom_name in pending}
+        for atom_name, deps in waiting_on.items():
+            for dep in deps:
+                unblocks[dep].append(atom_name)
+
+        finished: dict[str, tuple[AtomResult, list]] = {}
+        next_to_apply = 0
+        failed = False
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="preswald-atom"
+        ) as pool:
+            running: dict[Future, str] = {}
+
+            def submit(atom_names):
+                for atom_name in sorted(atom_names, key=position.get):
+                    atom = self.atoms[atom_name]
+                    # Each atom gets a copy of the caller's context, so the
+                    # current atom and trace it sets stay on its own thread
+                    future = pool.submit(
+                        copy_context().run,
+                        self._execute_buffered,
+                        atom,
+                        self._dependency_values(atom),
+                    )
+                    running[future] = atom_name
+
+            submit(atom_name for atom_name, deps in waiting_on.items() if not deps)
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                ready = []
+                for future in done:
+                    atom_name = running.pop(future)
+                    finished[atom_name] = future.result()
+                    result = finished[atom_name][0]
+                    self.context.set_result(atom_name, result)
+                    self._consumed(atom_name)
+
+                    if result.status == AtomStatus.FAILED:
+                        logger.error(f"Workflow stopped due to failure in atom: {atom_name}")
+                        failed = True
+                        continue
+                    for dependent in unblocks[atom_name]:
+                        waiting_on[dependent].discard(atom_name)
+                        if not waiting_on[dependent]:
+                            ready.append(dependent)
+
+                while next_to_apply < len(pending) and pending[next_to_apply] in finished:
+                    atom_name = pending[next_to_apply]
+                    self._flush_components(atom_name, *finished[atom_name])
+                    next_to_apply += 1
+
+                if not failed:
+                    submit(ready)
+
+        # After a failure, atoms that did finish still render, in order
+        for atom_name in pending[next_to_apply:]:
+            if atom_name in finished:
+                self._flush_components(atom_name, *finished[atom_name])
+
+    def _execute_buffered(
+        self, atom: Atom, dependency_values: dict[str, Any]
+    ) -> tuple[AtomResult, list]:
+        """Execute an atom on a worker thread, holding back its components."""
+        service = self._get_service()
+        with service.buffer_components() if service else nullcontext([]) as components:
+            result = self._execute_atom(atom, dependency_values)
+        return result, components
+
+    def _flush_components(
+        self, atom_name: str, result: AtomResult, components: list
+    ) -> None:
+        if not components:
+            return
+        service = self._get_service()
+        self._current_atom = atom_name
+        try:
+            for component in components:
+                service.append_component(component)
+        finally:
+            self._current_atom = None
+        # Appending stores component values under the producing atom; the
+        # serial executor overwrites them with the atom's result, so do the same
+        self.context.set_result(atom_name, result)
+
+    async def _execute_async(
+        self, pending: list[str], max_concurrency: int | None
+    ) -> None:
+        """Run atoms as tasks that each wait for their dependencies' tasks.
+
+        Like _execute_parallel, results and components are applied in
+        execution order as atoms finish.
+        """
+        limit = asyncio.Semaphore(max_concurrency or 10)
+        # Sync atoms hold a thread; the serial executor runs them one at a time
+        sync_gate = (
+            asyncio.Semaphore(1) if self.executor == "serial" else nullcontext()
+        )
+        tasks: dict[str, asyncio.Task] = {}
+        finished: dict[str, tuple[AtomResult, list]] = {}
+        state = {"next_to_apply": 0, "failed": False}
+        is_cancelled = _run_cancelled.get() or (lambda: False)
+
+        def apply_finished():
+            while (
+                state["next_to_apply"] < len(pending)
+                and pending[state["next_to_apply"]] in finished
+            ):
+                atom_name = pending[state["next_to_apply"]]
+                self._flush_components(atom_name, *finished[atom_name])
+                state["next_to_apply"] += 1
+
+        async def run(atom_name: str):
+            atom = self.atoms[atom_name]
+            dependencies = [tasks[dep] for dep in atom.dependencies if dep in tasks]
+            if dependencies:
+                await asyncio.gather(*dependencies)
+
+            async with limit, (nullcontext() if atom.is_async else sync_gate):
+                if state["failed"] or is_cancelled():
+                    return
+                service = self._get_service()
+                with service.buffer_components() if service else nullcontext(
+                    []
+                ) as components:
+                    # Inputs may have been released and need reloading
+                    dependency_values = await _in_thread(
+                        self._dependency_values, atom
+                    )
+                    result = await self._execute_atom_async(atom, dependency_values)
+
+            if isinstance(result.error, RunCancelledError):
+                # Stopped at a checkpoint: keep the previous result and
+                # drop the components it rendered so far
+                logger.info(f"Atom {atom_name} stopped, its run was superseded")
+                state["failed"] = True
+                return
+            finished[atom_name] = (result, components)
+            self.context.set_result(atom_name, result)
+            self._consumed(atom_name)
+            if result.status == AtomStatus.FAILED:
+                logger.error(f"Workflow stopped due to failure in atom: {atom_name}")
+                state["failed"] = True
+            apply_finished()
+
+        # Tasks copy the current context, so each atom's current atom,
+        # trace and component buffer stay its own
+        for atom_name in pending:
+            tasks[atom_name] = asyncio.create_task(run(atom_name))
+        await asyncio.gather(*tasks.values())
+        if is_cancelled():
+            return  # the next run replays finished atoms from the cache
+
+        # After a failure, atoms that did finish still render, in order
+        for atom_name in pending[state["next_to_apply"] :]:
+            if atom_name in finished:
+                self._flush_components(atom_name, *finished[atom_name])
+
+    def _run_coroutine(self, coroutine) -> Any:
+        """Run a coroutine to completion from synchronous code."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            in_loop = False
+        else:
+            in_loop = True
+        if not in_loop:
+            return asyncio.run(coroutine)
+
+        if IS_PYODIDE:
+            coroutine.close()
+            raise RuntimeError(
+                "Workflows with async atoms must be run with "
+                "`await workflow.execute_async()` in the browser"
+            )
+        # Called from inside a running loop, e.g. by an app script executed
+        # by the ScriptRunner: run a private loop on a helper thread
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(copy_context().run, asyncio.run, coroutine).result()
+
+    def mark_for_recompute(self, atom_names: set[str]) -> None:
+        """Recompute these atoms on their next execution, bypassing the cache."""
+        self._pending_recompute |= {name for name in atom_names if name in self.atoms}
 
     def get_component_producer(self, component_id: str) -> str | None:
         """Retrieve the name of the atom that last produced the component."""
@@ -335,33 +1905,96 @@ class Workflow:
             logger.info(f"[DAG] Registering {component_id} as output of {self._current_atom}")
             self._component_producers[component_id] = self._current_atom
 
+    def register_atom(self, atom: Atom) -> None:
+        """Add or replace an atom, keeping the reverse dependency index in sync."""
+        previous = self.atoms.get(atom.name)
+        if previous is None or previous.dependencies != atom.dependencies:
+            self._graph_version += 1
+        if previous is not None:
+            for dep in previous.dependencies:
+                self._unlink(dep, atom.name)
+        self.atoms[atom.name] = atom
+        for dep in atom.dependencies:
+            self._dependents.setdefault(dep, set()).add(atom.name)
+
+    def unregister_atom(self, atom_name: str) -> None:
+        """Remove an atom and its results, e.g. after its code was deleted."""
+        atom = self.atoms.pop(atom_name, None)
+        if atom is None:
+            return
+        for dep in atom.dependencies:
+            self._unlink(dep, atom_name)
+        for dependent in self._dependents.pop(atom_name, ()):
+            self.atoms[dependent].dependencies.discard(atom_name)
+        self._graph_version += 1
+        self.context.results.pop(atom_name, None)
+        self.context.variables.pop(atom_name, None)
+        self.context.released.discard(atom_name)
+        self._component_producers = {
+            component_id: producer
+            for component_id, producer in self._component_producers.items()
+            if producer != atom_name
+        }
+
+    def add_dependency(self, atom_name: str, dependency: str) -> None:
+        """Record that an already registered atom depends on another atom."""
+        dependencies = self.atoms[atom_name].dependencies
+        if dependency not in dependencies:
+            dependencies.add(dependency)
+            self._graph_version += 1
+        self._dependents.setdefault(dependency, set()).add(atom_name)
+
+    def _unlink(self, dependency: str, atom_name: str) -> None:
+        dependents = self._dependents.get(dependency)
+        if dependents is not None:
+            dependents.discard(atom_name)
+            if not dependents:
+                del self._dependents[dependency]
+
     def _get_affected_atoms(self, changed_atoms: set[str]) -> set[str]:
         """
         Determine which atoms need to be recomputed based on changes.
         Returns a set of atom names that need recomputation.
         """
         affected = set(changed_atoms)
+        queue = deque(changed_atoms)
 
         logger.debug(f"[DAG] Starting traversal from: {changed_atoms}")
 
-        # Repeatedly find atoms that depend on affected atoms until no new ones are found
-        while True:
-            new_affected = set()
-            for atom_name, atom in self.atoms.items():
-                if atom_name not in affected:  # Skip already affected atoms
-                    if any(dep in affected for dep in atom.dependencies):
-                        logger.debug(f"[DAG] Visiting: {atom_name}")
-                        new_affected.add(atom_name)
-
-            if not new_affected:  # No new affected atoms found
-                break
-
-            affected.update(new_affected)
+        # Breadth-first walk over the reverse edges, visiting each atom once
+        while queue:
+            for dependent in self._dependents.get(queue.popleft(), ()):
+                if dependent not in affected:
+                    logger.debug(f"[DAG] Visiting: {dependent}")
+                    affected.add(dependent)
+                    queue.append(dependent)
 
         return affected
 
-    def _validate_dependencies(self):
-        """Validates that all dependencies exist and there are no cycles."""
+    def _get_execution_order(self) -> list[str]:
+        """Returns a valid execution order for atoms based on dependencies.
+
+        Sorted once per change to the graph, then served from a cache.
+        """
+        if self._order_version != self._graph_version:
+            self._order, self._levels = self._sort_atoms()
+            self._order_version = self._graph_version
+        return list(self._order)
+
+    def _get_execution_levels(self) -> list[list[str]]:
+        """Atoms grouped by generation; each depends only on earlier generations."""
+        self._get_execution_order()
+        return [list(level) for level in self._levels]
+
+    def _sort_atoms(self) -> tuple[list[str], list[list[str]]]:
+        """
+        Validate that all dependencies exist and there are no cycles, and
+        return the atoms in dependency order along with their generations.
+
+        A depth-first post-order walk, iterative so deep DAGs don't hit the
+        recursion limit. Atoms are visited in registration order, which keeps
+        the layout order of their components stable.
+        """
         for atom in self.atoms.values():
             for dep in atom.dependencies:
                 if dep not in self.atoms:
@@ -369,122 +2002,570 @@ class Workflow:
                         f"Atom '{atom.name}' depends on non-existent atom '{dep}'"
                     )
 
-        visited = set()
-        temp_visited = set()
-        stack = []
-
-        def has_cycle(atom_name: str) -> bool:
-            if atom_name in temp_visited:
-                logger.error(f"[CYCLE DETECTED] -> {' -> '.join(stack + [atom_name])}")
-                return True
-            if atom_name in visited:
-                return False
-
-            temp_visited.add(atom_name)
-            stack.append(atom_name)
-
-            for dep in self.atoms[atom_name].dependencies:
-                if has_cycle(dep):
-                    return True
-
-            temp_visited.remove(atom_name)
-            visited.add(atom_name)
-            stack.pop()
-            return False
-
-        for atom_name in self.atoms:
-            if has_cycle(atom_name):
-                raise ValueError("Circular dependency detected in workflow")
-
-    def _get_execution_order(self) -> list[str]:
-        """Returns a valid execution order for atoms based on dependencies."""
-        self._validate_dependencies()
-
-        visited = set()
         order = []
-
-        def visit(atom_name: str):
-            if atom_name in visited:
-                return
-
-            for dep in self.atoms[atom_name].dependencies:
-                visit(dep)
-
-            visited.add(atom_name)
-            order.append(atom_name)
-
-        for atom_name in self.atoms:
-            visit(atom_name)
-
-        return order
-
-    def _execute_atom(self, atom: Atom, **kwargs) -> AtomResult:
-        """Execute a single atom with retry logic and caching."""
-        # Compute input arguments from declared dependencies
-        dependency_values = {
-            dep: self.context.variables[dep]
+        generation: dict[str, int] = {}  # finished atoms -> longest path from a root
+        for root in self.atoms:
+            if root in generation:
+                continue
+            path = [root]
+            on_path = {root}
+            stack = [iter(self.atoms[root].dependencies)]
+            while stack:
+                for dep in stack[-1]:
+                    if dep in generation:
+                        continue
+                    if dep in on_path:
+                        cycle = path[path.index(dep) :] + [dep]
+                        logger.error(f"[CYCLE DETECTED] -> {' -> '.join(cycle)}")
+                        raise ValueError("Circular dependency detected in workflow")
+                    path.append(dep)
+                    on_path.add(dep)
+                    stack.append(iter(self.atoms[dep].dependencies))
+                    break
+                else:
+                    # All dependencies are done, so this atom is too
+                    stack.pop()
+                    atom_name = path.pop()
+                    on_path.discard(atom_name)
+                    generation[atom_name] = 1 + max(
+                        (generation[dep] for dep in self.atoms[atom_name].dependencies),
+                        default=-1,
+                    )
+                    order.append(atom_name)
+
+        levels: list[list[str]] = []
+        for atom_name in order:
+            while len(levels) <= generation[atom_name]:
+                levels.append([])
+            levels[generation[atom_name]].append(atom_name)
+        return order, levels
+
+    def _dependency_values(self, atom: Atom) -> dict[str, Any]:
+        """Compute input arguments from declared dependencies"""
+        return {
+            dep: self.context.get_variable(dep)
             for dep in atom.dependencies
-            if dep in self.context.variables
+            if dep in self.context.variables or dep in self.context.released
         }
 
-        input_hash = self.cache.compute_input_hash(atom.name, dependency_values)
-        if not atom.force_recompute and not self.cache.should_recompute(
-            atom.name, input_hash
-        ):
-            logger.info(f"Using cached result for atom: {atom.name}")
-            cached_result = self.cache.cache[atom.name]
-            cached_result.status = AtomStatus.SKIPPED
-            return cached_result
+    def _execute_blocking(
+        self, atom: Atom, dependency_values: dict[str, Any] | None = None
+    ) -> AtomResult:
+        """Execute an atom from synchronous code, outside of a run."""
+        if dependency_values is None:
+            dependency_values = self._dependency_values(atom)
+        if atom.is_async:
+            return self._run_coroutine(self._execute_atom_async(atom, dependency_values))
+        return self._execute_atom(atom, dependency_values)
+
+    def _execute_atom(
+        self, atom: Atom, dependency_values: dict[str, Any] | None = None
+    ) -> AtomResult:
+        """Execute a single atom with retry logic and caching."""
+        if dependency_values is None:
+            dependency_values = self._dependency_values(atom)
 
         self._current_atom = atom.name
 
         try:
-            if self._service:
-                with self._service.active_atom(atom.name):
+            with span(atom.name, "cache", atom=atom.name) as args:
+                input_hash, cached = self._lookup_cached(atom, dependency_values)
+                args["hit"] = cached is not None
+            if cached is not None:
+                return cached
+
+            # Blocking the event loop thread could stall the computation
+            # being waited for, so atoms run there don't wait
+            claimed = False
+            if input_hash is not None and not IS_PYODIDE and not _on_event_loop():
+                cache = self._cache_for(atom)
+                while (in_flight := cache.claim(atom.name, input_hash)) is not None:
+                    logger.info(f"Waiting for atom {atom.name} computed elsewhere")
+                    if wait([in_flight], timeout=SINGLE_FLIGHT_TIMEOUT).not_done:
+                        break
+                    cached = self._cached_result(atom, input_hash)
+                    if cached is not None:
+                        return cached
+                else:
+                    claimed = True
+
+            try:
+                if self._service:
+                    with self._service.active_atom(atom.name):
+                        return self._execute_atom_inner(
+                            atom, dependency_values, input_hash
+                        )
+                else:
                     return self._execute_atom_inner(atom, dependency_values, input_hash)
-            else:
-                return self._execute_atom_inner(atom, dependency_values, input_hash)
+            finally:
+                if claimed:
+                    self._cache_for(atom).release(atom.name, input_hash)
         finally:
             self._current_atom = None
 
+    def _lookup_cached(
+        self, atom: Atom, dependency_values: dict[str, Any]
+    ) -> tuple[str | None, AtomResult | None]:
+        """Return the atom's input hash and, on a cache hit, a SKIPPED result.
+
+        Components of a hit are rendered again, so call this with the atom set
+        as the current atom.
+        """
+        if not atom.cache:
+            return None, None
+        inputs = dependency_values
+        if atom.cache_key is not None:
+            try:
+                inputs = {"cache_key": atom.cache_key(**dependency_values)}
+            except Exception as e:
+                logger.warning(
+                    f"cache_key of atom {atom.name} failed, it will recompute: {e}"
+                )
+                return None, None
+        input_hash = self.cache.compute_input_hash(
+            atom.name,
+            inputs,
+            atom.code_hash,
+            atom.environment(),
+            portable=atom.persist,
+        )
+        forced = atom.force_recompute
+        if _widget_overrides.get() is None:
+            # Marks are for the sessions' next run, not for precomputations
+            forced = forced or atom.name in self._pending_recompute
+            self._pending_recompute.discard(atom.name)
+        if forced:
+            return input_hash, None
+        return input_hash, self._cached_result(atom, input_hash)
+
+    def _cached_result(self, atom: Atom, input_hash: str | None) -> AtomResult | None:
+        """A SKIPPED result from the memory or disk cache, replaying its components."""
+        entry = self._cache_for(atom).get(atom.name, input_hash, self._trace_is_current)
+        if entry is None and atom.persist and input_hash is not None:
+            entry = self._load_persisted(atom, input_hash)
+        if entry is None:
+            return None
+        logger.info(f"Using cached result for atom: {atom.name}")
+        self._replay_components(entry.trace)
+        return dataclasses.replace(entry.result, status=AtomStatus.SKIPPED)
+
+    def _cache_for(self, atom: Atom) -> AtomCache:
+        return self.cache if atom.shared else self.session_cache
+
+    def _store_result(self, atom: Atom, result: AtomResult, trace: AtomTrace) -> None:
+        self._cache_for(atom).store(atom.name, result, trace, ttl=atom.ttl)
+        if not atom.persist or result.input_hash is None or IS_PYODIDE:
+            return
+        if trace.source_reads:
+            # Source versions only mean something within this process
+            logger.info(
+                f"Not persisting atom {atom.name}: it reads data sources directly; "
+                "pass the frames in as dependencies to persist it"
+            )
+            return
+        try:
+            self._get_disk_cache().store(
+                atom.name,
+                result.input_hash,
+                result.value,
+                trace,
+                result.execution_time or 0.0,
+            )
+        except Exception as e:
+            logger.warning(f"Could not persist result of atom {atom.name}: {e}")
+
+    def _load_persisted(self, atom: Atom, input_hash: str) -> CacheEntry | None:
+        """Load a result from the disk cache into memory, if it's still valid."""
+        if IS_PYODIDE:
+            return None
+        loaded = self._get_disk_cache().load(atom.name, input_hash)
+        if loaded is None:
+            return None
+        value, trace, meta = loaded
+        if not self._trace_is_current(trace):
+            return None
+        ttl = atom.ttl
+        if ttl is not None:
+            # Stored results expire by the time they were computed at
+            ttl -= time.time() - meta.get("created", 0.0)
+            if ttl <= 0:
+                return None
+
+        logger.info(f"Loaded result of atom {atom.name} from the disk cache")
+        now = time.time()
+        result = AtomResult(
+            status=AtomStatus.COMPLETED,
+            value=value,
+            start_time=now - meta.get("cost", 0.0),
+            end_time=now,
+            input_hash=input_hash,
+        )
+        cache = self._cache_for(atom)
+        cache.store(atom.name, result, trace, ttl=ttl)
+        return cache.get(atom.name, input_hash)
+
+    def _get_disk_cache(self) -> DiskCache:
+        if self.disk_cache is None:
+            self.disk_cache = DiskCache(DEFAULT_DISK_CACHE_PATH)
+        return self.disk_cache
+
+    async def _execute_atom_async(
+        self, atom: Atom, dependency_values: dict[str, Any]
+    ) -> AtomResult:
+        """Async counterpart of _execute_atom.
+
+        Hashing inputs and calling sync atoms happen on threads, and retries
+        wait with asyncio.sleep, so the event loop is never blocked.
+        """
+        self._current_atom = atom.name
+        try:
+            with span(atom.name, "cache", atom=atom.name) as args:
+                input_hash, cached = await _in_thread(
+                    self._lookup_cached, atom, dependency_values
+                )
+                args["hit"] = cached is not None
+            if cached is not None:
+                return cached
+
+            claimed = False
+            if input_hash is not None and not IS_PYODIDE:
+                cache = self._cache_for(atom)
+                while (in_flight := cache.claim(atom.name, input_hash)) is not None:
+                    logger.info(f"Waiting for atom {atom.name} computed elsewhere")
+                    try:
+                        # Shielded: a timeout here must not cancel the shared future
+                        await asyncio.wait_for(
+                            asyncio.shield(asyncio.wrap_future(in_flight)),
+                            SINGLE_FLIGHT_TIMEOUT,
+                        )
+                    except TimeoutError:
+                        break
+                    cached = await _in_thread(self._cached_result, atom, input_hash)
+                    if cached is not None:
+                        return cached
+                else:
+                    claimed = True
+
+            try:
+                with self._service.active_atom(
+                    atom.name
+                ) if self._service else nullcontext():
+                    return await self._execute_atom_inner_async(
+                        atom, dependency_values, input_hash
+                    )
+            finally:
+                if claimed:
+                    self._cache_for(atom).release(atom.name, input_hash)
+        finally:
+            self._current_atom = None
+
+    async def _execute_atom_inner_async(self, atom, dependency_values, input_hash):
+        with span(atom.name, "atom", atom=atom.name) as args:
+            result = await self._attempt_with_retries_async(
+                atom, dependency_values, input_hash
+            )
+            args.update(status=result.status.value, attempts=result.attempts)
+            return result
+
+    async def _attempt_with_retries_async(self, atom, dependency_values, input_hash):
+        attempts = 0
+        start_time = time.time()
+
+        while True:
+            attempts += 1
+            trace = AtomTrace()
+            try:
+                checkpoint()
+                if atom.is_async:
+                    result = await self._attempt_async(atom, dependency_values, trace)
+                else:
+                    result = await _in_thread(
+                        self._attempt, atom, dependency_values, trace
+                    )
+            except Exception as e:
+                delay = self._retry_delay(atom, attempts, e, start_time)
+                if delay is None:
+                    return self._failed_result(e, attempts, start_time, input_hash)
+                await asyncio.sleep(delay)
+                continue
+            return self._completed_result(
+                atom, result, trace, attempts, start_time, input_hash
+            )
+
     def _execute_atom_inner(self, atom, dependency_values, input_hash):
+        with span(atom.name, "atom", atom=atom.name) as args:
+            result = self._attempt_with_retries(atom, dependency_values, input_hash)
+            args.update(status=result.status.value, attempts=result.attempts)
+            return result
+
+    def _attempt_with_retries(self, atom, dependency_values, input_hash):
         attempts = 0
         start_time = time.time()
 
         while True:
             attempts += 1
+            trace = AtomTrace()
             try:
-                result = atom.func(**dependency_values)
-                end_time = time.time()
-                atom_result = AtomResult(
-                    status=AtomStatus.COMPLETED,
-                    value=result,
-                    attempts=attempts,
-                    start_time=start_time,
-                    end_time=end_time,
-                    input_hash=input_hash,
-                )
-                # Cache the successful result
-                self.cache.cache[atom.name] = atom_result
-                return atom_result
+                result = self._attempt(atom, dependency_values, trace)
             except Exception as e:
-                current_time = time.time()
-                if atom.retry_policy.should_retry(attempts, e):
-                    logger.warning(
-                        f"Atom {atom.name} failed (attempt {attempts}). "
-                        f"Retrying after {atom.retry_policy.get_delay(attempts)}s"
+                delay = self._retry_delay(atom, attempts, e, start_time)
+                if delay is None:
+                    return self._failed_result(e, attempts, start_time, input_hash)
+                time.sleep(delay)
+                continue
+            return self._completed_result(
+                atom, result, trace, attempts, start_time, input_hash
+            )
+
+    def _attempt(self, atom: Atom, dependency_values: dict[str, Any], trace: AtomTrace):
+        """Call a sync atom once, recording what it touches into ``trace``."""
+        breaker = atom.retry_policy.breaker
+        trial = breaker.before_call() if breaker else False
+        token = _active_trace.set(trace)
+        try:
+            with record_source_reads(trace.source_reads):
+                result = self._call_atom(atom, dependency_values)
+                if atom.is_stream:
+                    result = self._consume_stream(atom, result)
+        except RunCancelledError:
+            raise
+        except Exception:
+            if breaker:
+                breaker.record_failure()
+                trial = False
+            raise
+        else:
+            if breaker:
+                breaker.record_success()
+                trial = False
+        finally:
+            _active_trace.reset(token)
+            if trial:
+                # Superseded or cancelled mid-trial, with no outcome
+                breaker.release_trial()
+        return result
+
+    async def _attempt_async(
+        self, atom: Atom, dependency_values: dict[str, Any], trace: AtomTrace
+    ):
+        """Await an async atom once, recording what it touches into ``trace``."""
+        breaker = atom.retry_policy.breaker
+        trial = breaker.before_call() if breaker else False
+        token = _active_trace.set(trace)
+        try:
+            with record_source_reads(trace.source_reads):
+                if atom.is_stream:
+                    result = await self._consume_stream_async(
+                        atom, atom.func(**dependency_values)
                     )
-                    time.sleep(atom.retry_policy.get_delay(attempts))
-                    continue
                 else:
-                    return AtomResult(
-                        status=AtomStatus.FAILED,
-                        error=e,
-                        attempts=attempts,
-                        start_time=start_time,
-                        end_time=current_time,
-                        input_hash=input_hash,
-                    )
+                    result = await atom.func(**dependency_values)
+        except RunCancelledError:
+            raise
+        except Exception:
+            if breaker:
+                breaker.record_failure()
+                trial = False
+            raise
+        else:
+            if breaker:
+                breaker.record_success()
+                trial = False
+        finally:
+            _active_trace.reset(token)
+            if trial:
+                # Superseded or cancelled mid-trial, with no outcome
+                breaker.release_trial()
+        return result
+
+    def _consume_stream(self, atom: Atom, generator) -> Any:
+        """Run a generator atom to the end, showing partial values on the way."""
+        logger.info(f"Streaming atom: {atom.name}")
+        value, last_shown = None, time.monotonic()
+        for value in generator:
+            checkpoint()
+            if time.monotonic() - last_shown >= atom.throttle:
+                self._show_partial(atom, value)
+                last_shown = time.monotonic()
+        self._compact_trace()
+        return value
+
+    async def _consume_stream_async(self, atom: Atom, generator) -> Any:
+        logger.info(f"Streaming atom: {atom.name}")
+        value, last_shown = None, time.monotonic()
+        async for value in generator:
+            checkpoint()
+            if time.monotonic() - last_shown >= atom.throttle:
+                await _in_thread(self._show_partial, atom, value)
+                last_shown = time.monotonic()
+        self._compact_trace()
+        return value
+
+    def _show_partial(self, atom: Atom, value: Any) -> None:
+        """Update the page with a generator atom's partial value.
+
+        Components the atom rendered that are already on the page are
+        replaced now; new ones wait for the atom to finish, to keep the page
+        order. Dependents declared with on="each" run on the partial value.
+        """
+        logger.debug(f"Partial result of atom {atom.name}")
+        service = self._get_service()
+        if service is not None:
+            buffer = service._component_buffer.get()
+            if buffer:
+                buffer[:] = [
+                    component
+                    for component in _latest_components(buffer)
+                    if not service.patch_component(component)
+                ]
+
+        for dependent_name in sorted(self._dependents.get(atom.name, ())):
+            dependent = self.atoms.get(dependent_name)
+            if dependent is None or dependent.on != "each":
+                continue
+            if dependent_name in self._deferred:
+                continue
+            values = self._dependency_values(dependent)
+            values[atom.name] = value
+            if not set(dependent.dependencies) <= values.keys():
+                continue  # other inputs not computed yet in this run
+            copy_context().run(self._show_dependent, dependent, values)
+
+        listener = _stream_listener.get()
+        if listener is not None:
+            loop, on_update = listener
+            asyncio.run_coroutine_threadsafe(on_update(), loop)
+
+    def _show_dependent(self, atom: Atom, dependency_values: dict[str, Any]) -> None:
+        """Run an on="each" atom on a partial value and show its components."""
+        service = self._get_service()
+        with service.buffer_components() if service else nullcontext([]) as components:
+            result = self._execute_blocking(atom, dependency_values)
+        if result.status == AtomStatus.FAILED or service is None:
+            return
+        for component in _latest_components(components):
+            if not service.patch_component(component):
+                logger.debug(
+                    f"Component of atom {atom.name} not on the page yet, "
+                    "it's shown once the run finishes"
+                )
+
+    @staticmethod
+    def _compact_trace() -> None:
+        # Every step re-renders its components; replaying the last is enough
+        if (trace := _active_trace.get()) is not None:
+            trace.components[:] = _latest_components(trace.components)
+
+    def _retry_delay(
+        self, atom: Atom, attempts: int, error: Exception, start_time: float
+    ) -> float | None:
+        """Seconds to wait before retrying, or None to give up."""
+        if isinstance(error, RunCancelledError):
+            return None
+        policy = atom.retry_policy
+        delay = policy.get_delay(attempts)
+        if not policy.should_retry(attempts, error, time.time() - start_time + delay):
+            return None
+        logger.warning(
+            f"Atom {atom.name} failed (attempt {attempts}). "
+            f"Retrying after {delay:.2f}s"
+        )
+        return delay
+
+    def _completed_result(
+        self, atom, value, trace, attempts, start_time, input_hash
+    ) -> AtomResult:
+        atom_result = AtomResult(
+            status=AtomStatus.COMPLETED,
+            value=value,
+            attempts=attempts,
+            start_time=start_time,
+            end_time=time.time(),
+            input_hash=input_hash,
+        )
+        # Cache the successful result
+        self._store_result(atom, atom_result, trace)
+        return atom_result
+
+    def _failed_result(self, error, attempts, start_time, input_hash) -> AtomResult:
+        return AtomResult(
+            status=AtomStatus.FAILED,
+            error=error,
+            attempts=attempts,
+            start_time=start_time,
+            end_time=time.time(),
+            input_hash=input_hash,
+        )
+
+    def _call_atom(self, atom: Atom, dependency_values: dict[str, Any]) -> Any:
+        in_process = self.executor == "processes" or atom.isolation == "process"
+        if in_process and (IS_PYODIDE or not atom.picklable or atom.is_stream):
+            logger.info(
+                f"Atom {atom.name} can't be sent to a worker process, running it in-process"
+            )
+        elif in_process:
+            logger.info(f"Executing atom in worker process: {atom.name}")
+            try:
+                return process_pool.run_in_process(
+                    atom.original_func, dependency_values, self.max_workers
+                )
+            except process_pool.HandoffError as e:
+                logger.info(
+                    f"Inputs of atom {atom.name} can't be sent to a worker process "
+                    f"({e}), running it in-process"
+                )
+        return atom.func(**dependency_values)
+
+    def _get_service(self) -> Optional["BasePreswaldService"]:
+        """The owning service, or the global one for standalone workflows."""
+        if self._service is not None:
+            return self._service
+        from preswald.engine.service import PreswaldService
+
+        try:
+            return PreswaldService.get_instance()
+        except RuntimeError:
+            return None
+
+    def _trace_is_current(self, trace: AtomTrace | None) -> bool:
+        """Check that the widgets and sources an atom read still hold the same values."""
+        if trace is None:
+            return False
+        if not trace.widget_reads and not trace.source_reads:
+            return True
+
+        service = self._get_service()
+        if service is None:
+            return False
+
+        for component_id, value in trace.widget_reads.items():
+            try:
+                if service.peek_component_state(component_id) != value:
+                    return False
+            except Exception:
+                # Values that can't be compared (e.g. arrays) count as changed
+                return False
+
+        data_manager = getattr(service, "data_manager", None)
+        for source_name, version in trace.source_reads.items():
+            if version is None or data_manager is None:
+                return False
+            if data_manager.get_version(source_name) != version:
+                return False
+        return True
+
+    def _replay_components(self, trace: AtomTrace) -> None:
+        """Render the components of a cached atom as if it had just run."""
+        if not trace.components:
+            return
+        service = self._get_service()
+        if service is None:
+            return
+
+        for component in trace.components:
+            with service.active_atom(self._current_atom):
+                if service.should_render(component["id"], component):
+                    service.append_component(component)
 
 
 class WorkflowAnalyzer:
@@ -529,6 +2610,12 @@ class WorkflowAnalyzer:
                     if result and result.execution_time
                     else "N/A"
                 ),
+                # Seconds used as the atom's weight; 1.0 if it hasn't run yet
+                "duration": (
+                    result.execution_time
+                    if result and result.execution_time
+                    else 1.0
+                ),
                 "attempts": result.attempts if result else 0,
                 "error": str(result.error) if result and result.error else None,
                 "dependencies": list(atom.dependencies),
@@ -549,37 +2636,64 @@ class WorkflowAnalyzer:
         Identifies the critical path through the workflow - the longest dependency chain
         that must be executed sequentially.
         """
+        try:
+            return self._schedule()[0]
+        except nx.NetworkXException as e:
+            print(f"Error finding critical path: {e}")
+            return []
+
+    def get_slack(self) -> dict[str, float]:
+        """
+        Seconds each atom could take longer without delaying the whole workflow.
+
+        Atoms on the critical path have zero slack: making them faster is what
+        shortens a run. Atoms with large slack are not worth optimizing.
+        """
+        try:
+            return self._schedule()[1]
+        except nx.NetworkXException as e:
+            logger.error(f"Error computing slack: {e}", exc_info=True)
+            return {}
+
+    def _schedule(self) -> tuple[list[str], dict[str, float]]:
+        """Longest weighted path and per-atom slack, in one pass each way."""
         if not self._is_graph_current():
             self.build_graph()
 
-        try:
-            # Find all paths and their total execution times
-            paths = []
-            for source in (n for n, d in self.graph.in_degree() if d == 0):
-                for target in (n for n, d in self.graph.out_degree() if d == 0):
-                    paths.extend(nx.all_simple_paths(self.graph, source, target))
-
-            if not paths:
-                return []
-
-            # Calculate path weights based on execution times
-            path_weights = []
-            for path in paths:
-                weight = sum(
-                    (
-                        float(self.graph.nodes[node]["execution_time"].rstrip("s"))
-                        if self.graph.nodes[node]["execution_time"] != "N/A"
-                        else 1.0
-                    )
-                    for node in path
-                )
-                path_weights.append((weight, path))
+        duration = nx.get_node_attributes(self.graph, "duration")
+        order = list(nx.topological_sort(self.graph))
+        if not order:
+            return [], {}
+
+        # Forward pass: earliest finish time, and the predecessor it waits on
+        finish: dict[str, float] = {}
+        waits_on: dict[str, str | None] = {}
+        for node in order:
+            start, waits_on[node] = 0.0, None
+            for pred in self.graph.predecessors(node):
+                if finish[pred] > start:
+                    start, waits_on[node] = finish[pred], pred
+            finish[node] = start + duration.get(node, 1.0)
+
+        # Backward pass: latest finish time that doesn't delay the end
+        total = max(finish.values())
+        latest: dict[str, float] = {}
+        for node in reversed(order):
+            latest[node] = min(
+                (
+                    latest[succ] - duration.get(succ, 1.0)
+                    for succ in self.graph.successors(node)
+                ),
+                default=total,
+            )
 
-            return max(path_weights, key=lambda x: x[0])[1]
+        path = [max(finish, key=finish.get)]
+        while (pred := waits_on[path[-1]]) is not None:
+            path.append(pred)
+        path.reverse()
 
-        except nx.NetworkXException as e:
-            print(f"Error finding critical path: {e}")
-            return []
+        slack = {node: max(latest[node] - finish[node], 0.0) for node in order}
+        return path, slack
 
     def get_parallel_groups(self) -> list[set[str]]:
         """
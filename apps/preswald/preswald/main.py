@@ -6,17 +6,27 @@ import signal
 from importlib.resources import files
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import (
+    FastAPI,
+    HTTPException,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 
 from preswald.engine.managers.branding import BrandingManager
 from preswald.engine.service import PreswaldService
+from preswald.engine.tracing import get_tracer
 
 
 logger = logging.getLogger(__name__)
 
+# Hosts allowed to read the monitoring endpoints
+LOOPBACK_HOSTS = frozenset({"127.0.0.1", "::1", "localhost"})
+
 
 def create_app(script_path: str | None = None) -> FastAPI:
     """Create and configure the FastAPI application"""
@@ -105,15 +115,50 @@ def _register_websocket_routes(app: FastAPI):
                 await websocket.close(code=1011, reason=str(e))
 
 
+def _register_api_routes(app: FastAPI):
+    """Register JSON endpoints for monitoring, served to local clients only"""
+
+    @app.get("/api/cache/stats")
+    async def cache_stats(request: Request):
+        """Hit rate, size and evictions of the workflow's atom cache"""
+        _require_local_client(request)
+        return app.state.service.get_workflow().cache.stats()
+
+    @app.get("/api/trace")
+    async def trace(request: Request, session_id: str | None = None):
+        """Recent spans as Chrome trace events, optionally of one session"""
+        _require_local_client(request)
+        tracer = get_tracer()
+        if not tracer.enabled:
+            raise HTTPException(status_code=404, detail="Tracing is not enabled")
+        return tracer.export(session_id=session_id, redact=True)
+
+
+def _require_local_client(request: Request):
+    """Reject requests that don't come from this machine"""
+    if request.client is None or request.client.host not in LOOPBACK_HOSTS:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
 def _register_routes(app: FastAPI):
     """Register all application routes"""
 
     _register_websocket_routes(app)
+    _register_api_routes(app)
     _register_static_routes(app)  # order matters for static routes
 
 
-def start_server(script: str | None = None, port: int = 8501):
-    """Start the FastAPI server"""
+def start_server(
+    script: str | None = None,
+    port: int = 8501,
+    trace_path: str | None = None,
+    trace: bool = False,
+):
+    """
+    Start the FastAPI server. With trace or trace_path, record a trace of the
+    server's activity, written to trace_path when it stops.
+    """
+    get_tracer().enabled = trace or trace_path is not None
     app = create_app(script)
 
     config = uvicorn.Config(app, host="0.0.0.0", port=port, loop="asyncio")
@@ -143,6 +188,9 @@ def start_server(script: str | None = None, port: int = 8501):
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         raise
+    finally:
+        if trace_path:
+            get_tracer().export(trace_path)
 
 
 def _setup_static_files(app: FastAPI) -> BrandingManager:
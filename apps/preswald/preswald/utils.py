@@ -12,6 +12,7 @@ import toml
 
 from preswald.engine.service import PreswaldService
 from preswald.interfaces.component_return import ComponentReturn
+from preswald.interfaces.workflow import record_component
 
 
 # Configure logging
@@ -255,6 +256,9 @@ def with_render_tracking(component_type: str):
                     result.value if isinstance(result, ComponentReturn) else result
                 )
 
+            # Remembered so a cached atom can render it again without running
+            record_component(component)
+
             with service.active_atom(service._workflow._current_atom):
                 if service.should_render(component_id, component):
                     logger.debug(f"[{component_type}] Created component: {component}")
@@ -0,0 +1,80 @@
+import copy
+import textwrap
+
+import pytest
+
+from preswald.engine.runner import ScriptRunner
+from preswald.engine.service import PreswaldService, ServiceImpl
+from preswald.interfaces.workflow import AtomCache
+
+
+class Session:
+    """A client connected to the service, keeping the messages it was sent."""
+
+    def __init__(self, service, client_id: str):
+        self.service = service
+        self.client_id = client_id
+        self.messages: list[dict] = []
+        self.runner = ScriptRunner(client_id, self._receive)
+        service.script_runners[client_id] = self.runner
+
+    async def _receive(self, message: dict) -> None:
+        # The server serializes messages as they are sent; later renders
+        # update the layout's components in place
+        self.messages.append(copy.deepcopy(message))
+
+    async def start(self) -> None:
+        await self.runner.start(self.service.script_path)
+
+    async def update(self, states: dict) -> None:
+        """Send widget changes and wait for the rerun they start."""
+        await self.service.handle_client_message(
+            self.client_id, {"type": "component_update", "states": states}
+        )
+        if self.runner._rerun_task is not None:
+            await self.runner._rerun_task
+
+    async def show(self, component_ids) -> None:
+        await self.service.handle_client_message(
+            self.client_id,
+            {"type": "visibility_update", "visible": list(component_ids)},
+        )
+
+    @property
+    def page(self) -> list:
+        """Values of the components on the page, as last sent."""
+        message = next(m for m in reversed(self.messages) if m["type"] == "components")
+        return [
+            component.get("value")
+            for row in message["components"]["rows"]
+            for component in row
+        ]
+
+
+class App:
+    """A fresh service running an app script."""
+
+    def __init__(self, root, source: str):
+        script = root / "app.py"
+        script.write_text(textwrap.dedent(source))
+        (root / "preswald.toml").write_text(
+            '[project]\ntitle = "test"\nentrypoint = "app.py"\n'
+        )
+        self.service = PreswaldService.initialize(str(script))
+        self.workflow = self.service.get_workflow()
+        self.workflow.cache = AtomCache()  # not the process-wide shared cache
+
+    def connect(self, client_id: str) -> Session:
+        return Session(self.service, client_id)
+
+    def components(self, *atoms: str) -> list[str]:
+        """IDs of the components rendered by the given atoms."""
+        producers = self.workflow._component_producers
+        return [cid for cid, atom in producers.items() if atom in atoms]
+
+
+@pytest.fixture
+def start_app(tmp_path):
+    """Start a fresh service for an app script given as source."""
+    yield lambda source: App(tmp_path, source)
+    ServiceImpl._instance = None
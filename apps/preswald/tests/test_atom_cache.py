@@ -0,0 +1,126 @@
+import time
+
+import numpy as np
+import pytest
+
+from preswald.engine.sizing import estimate_size
+from preswald.interfaces.workflow import (
+    AtomCache,
+    AtomResult,
+    AtomStatus,
+    AtomTrace,
+    Workflow,
+)
+
+
+VALUE = np.zeros(1000)
+SIZE = estimate_size(VALUE)
+
+
+def _store(cache, input_hash, cost=1.0, ttl=None):
+    result = AtomResult(
+        status=AtomStatus.COMPLETED,
+        value=VALUE.copy(),
+        start_time=1.0,
+        end_time=1.0 + cost,
+        input_hash=input_hash,
+    )
+    cache.store("atom", result, AtomTrace(), ttl=ttl)
+
+
+def _cached(cache):
+    return {input_hash for _, input_hash in cache.entries}
+
+
+@pytest.mark.parametrize(
+    ("policy", "victim"),
+    [
+        ("lru", "h1"),  # the least recently used
+        ("lfu", "h2"),  # the least often hit, the least recent of a tie
+        ("cost", "h3"),  # the cheapest to recompute
+    ],
+)
+def test_eviction_under_budget(policy, victim):
+    cache = AtomCache(max_bytes=3 * SIZE + SIZE // 2, policy=policy)
+    _store(cache, "h1", cost=10.0)
+    cache.get("atom", "h1")
+    cache.get("atom", "h1")
+    _store(cache, "h2", cost=1.0)
+    _store(cache, "h3", cost=0.01)
+    assert cache.evictions == 0
+
+    _store(cache, "h4", cost=1.0)
+
+    assert _cached(cache) == {"h1", "h2", "h3", "h4"} - {victim}
+    assert cache.evictions == 1
+    assert cache.size == 3 * SIZE <= cache.max_bytes
+
+
+@pytest.mark.parametrize("policy", AtomCache.POLICIES)
+def test_latest_result_is_kept_over_budget(policy):
+    cache = AtomCache(max_bytes=SIZE // 2, policy=policy)
+    _store(cache, "h1")
+    _store(cache, "h2")
+
+    assert _cached(cache) == {"h2"}
+    assert cache.get("atom", "h2") is not None
+
+
+def test_shrinking_the_budget_evicts():
+    cache = AtomCache()
+    for input_hash in ("h1", "h2", "h3"):
+        _store(cache, input_hash)
+
+    cache.configure(max_bytes=SIZE, policy="lru")
+
+    assert _cached(cache) == {"h3"}
+
+
+def test_expired_results_miss():
+    cache = AtomCache()
+    _store(cache, "h1", ttl=0.05)
+    _store(cache, "h2")
+
+    assert cache.get("atom", "h1") is not None
+    time.sleep(0.06)
+
+    assert cache.get("atom", "h1") is None
+    assert cache.get("atom", "h2") is not None
+    assert _cached(cache) == {"h2"}
+    assert cache.stats()["expirations"] == 1
+
+
+def test_sweep_drops_expired_results():
+    cache = AtomCache()
+    _store(cache, "h1", ttl=0.05)
+    _store(cache, "h2", ttl=60)
+
+    time.sleep(0.06)
+
+    assert cache.sweep() == 1
+    assert _cached(cache) == {"h2"}
+    assert cache.size == SIZE
+
+
+_runs: list[float] = []
+
+
+def _run():
+    """Count a run; a function, so it isn't part of the atom's cache key."""
+    _runs.append(time.monotonic())
+    return len(_runs)
+
+
+def test_atom_reruns_once_its_ttl_expires():
+    workflow = Workflow()
+    workflow.cache = AtomCache()
+    _runs.clear()
+
+    @workflow.atom(ttl=0.05)
+    def clock():
+        return _run()
+
+    assert workflow.execute()["clock"].value == 1
+    assert workflow.execute()["clock"].value == 1
+    time.sleep(0.06)
+    assert workflow.execute()["clock"].value == 2
@@ -0,0 +1,97 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from preswald.interfaces.workflow import (
+    AtomStatus,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    RunCancelledError,
+    Workflow,
+    checkpoint,
+)
+
+
+RESET_TIMEOUT = 0.05
+
+
+@pytest.fixture
+def breaker():
+    """A half-open breaker of its own, so tests don't share state."""
+    name = f"upstream-{uuid.uuid4().hex[:8]}"
+    breaker = CircuitBreaker.get(name, failure_threshold=1, reset_timeout=RESET_TIMEOUT)
+    breaker.record_failure()
+    time.sleep(RESET_TIMEOUT)
+    assert breaker.state == "half_open"
+    return breaker
+
+
+def _policy(breaker):
+    return RetryPolicy(
+        max_attempts=1,
+        circuit_breaker=breaker.name,
+        failure_threshold=1,
+        reset_timeout=RESET_TIMEOUT,
+    )
+
+
+def test_half_open_breaker_lets_one_trial_through(breaker):
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    time.sleep(RESET_TIMEOUT)
+    assert breaker.before_call() is True
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.before_call() is False
+
+
+def test_superseded_trial_is_released(breaker):
+    workflow = Workflow()
+
+    @workflow.atom(retry_policy=_policy(breaker), cache=False)
+    def upstream():
+        checkpoint()
+        return "ok"
+
+    with pytest.raises(RunCancelledError):
+        asyncio.run(workflow.execute_async(is_cancelled=lambda: True))
+
+    # No outcome: still half-open, and the next call may try again
+    assert breaker.state == "half_open"
+    assert not breaker._trial_running
+
+    results = asyncio.run(workflow.execute_async())
+    assert results["upstream"].status == AtomStatus.COMPLETED
+    assert breaker.state == "closed"
+
+
+def test_cancelled_async_trial_is_released(breaker):
+    workflow = Workflow()
+    started = asyncio.Event()
+
+    @workflow.atom(retry_policy=_policy(breaker), cache=False)
+    async def upstream():
+        started.set()
+        await asyncio.sleep(10)
+        return "ok"
+
+    async def scenario():
+        task = asyncio.create_task(workflow.execute_async())
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+    assert breaker.state == "half_open"
+    assert not breaker._trial_running
+    assert breaker.before_call() is True
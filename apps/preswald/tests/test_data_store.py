@@ -0,0 +1,98 @@
+import time
+
+import pandas as pd
+import pytest
+
+from preswald.engine.managers.data import DataManager, StoredTableSource
+
+
+def _write_sales(root, rows):
+    pd.DataFrame(rows, columns=["region", "sales_total", "channel"]).to_csv(
+        root / "sales.csv", index=False
+    )
+
+
+@pytest.fixture
+def app(tmp_path):
+    _write_sales(tmp_path, [("north", 10, "sales"), ("south", 20, "web")])
+    (tmp_path / "preswald.toml").write_text(
+        f"""
+[data_store]
+path = "store"
+
+[data.sales]
+type = "csv"
+path = "{(tmp_path / "sales.csv").as_posix()}"
+
+[data.sales.search]
+columns = ["region"]
+"""
+    )
+    return tmp_path
+
+
+def _build(app):
+    loader = DataManager(str(app / "preswald.toml"))
+    loader.connect()
+    generation = loader.build_store()
+    time.sleep(0.002)  # generation names have millisecond resolution
+    return generation
+
+
+def test_sources_are_served_from_the_store(app):
+    generation = _build(app)
+    worker = DataManager(str(app / "preswald.toml"))
+    worker.connect()
+
+    assert worker._store_generation == generation
+    assert isinstance(worker.sources["sales"], StoredTableSource)
+    assert list(worker.search("sales", "sou")["region"]) == ["south"]
+
+
+def test_query_keeps_the_source_name_in_columns_and_literals(app):
+    _build(app)
+    worker = DataManager(str(app / "preswald.toml"))
+    worker.connect()
+
+    df = worker.query(
+        "SELECT region, sales_total FROM sales WHERE channel = 'sales'", "sales"
+    )
+
+    assert df.to_dict("records") == [{"region": "north", "sales_total": "10"}]
+
+
+def test_refresh_switches_to_a_new_generation(app):
+    first = _build(app)
+    worker = DataManager(str(app / "preswald.toml"))
+    worker.connect()
+    version = worker.get_version("sales")
+
+    assert worker.refresh_store() is False
+
+    _write_sales(app, [("east", 30, "web")])
+    second = _build(app)
+
+    assert worker.refresh_store() is True
+    assert worker._store_generation == second != first
+    assert worker.get_version("sales") != version
+    assert list(worker.query("SELECT region FROM sales", "sales")["region"]) == ["east"]
+    assert list(worker.search("sales", "east")["region"]) == ["east"]
+    assert worker.refresh_store() is False
+
+
+def test_changed_config_is_loaded_in_memory(app):
+    _build(app)
+    worker = DataManager(str(app / "preswald.toml"))
+    worker.connect()
+
+    config = (app / "preswald.toml").read_text()
+    (app / "preswald.toml").write_text(config.replace('["region"]', '["channel"]'))
+    worker.connect()
+
+    assert not isinstance(worker.sources["sales"], StoredTableSource)
+    assert len(worker.query("SELECT * FROM sales", "sales")) == 2
+    # The view of the stored table is gone with it
+    views = worker.duckdb_conn.execute(
+        "SELECT view_name FROM duckdb_views() WHERE NOT internal"
+    ).fetchall()
+    assert views == []
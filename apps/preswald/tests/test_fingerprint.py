@@ -0,0 +1,146 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from preswald.engine.fingerprint import (
+    Fingerprinter,
+    UnhashableError,
+    register_fingerprint,
+)
+from preswald.engine.managers.data import data_version_key, tag_frame
+
+
+class Model:
+    def __init__(self, checksum, payload=None):
+        self.checksum = checksum
+        self.payload = payload
+
+
+class FineTunedModel(Model):
+    pass
+
+
+class Opaque:
+    pass
+
+
+@register_fingerprint(Model)
+def _(model, hasher):
+    hasher.update(model.checksum.encode())
+
+
+@register_fingerprint(Opaque)
+def _(value, hasher):
+    raise UnhashableError("opaque")
+
+
+@pytest.fixture
+def fingerprint():
+    return Fingerprinter().fingerprint
+
+
+def _frame():
+    return pd.DataFrame(
+        {
+            "x": np.arange(5),
+            "label": list("abcde"),
+            "when": pd.date_range("2024-01-01", periods=5),
+        }
+    )
+
+
+def test_equal_values_share_a_fingerprint(fingerprint):
+    assert fingerprint(_frame()) == fingerprint(_frame())
+    assert fingerprint(np.arange(3)) == fingerprint(np.arange(3))
+    assert fingerprint({"a": [1, 2.5, None]}) == fingerprint({"a": [1, 2.5, None]})
+    assert fingerprint({3, 1, 2}) == fingerprint({2, 3, 1})
+
+
+@pytest.mark.parametrize(
+    ("left", "right"),
+    [
+        (1, "1"),
+        (1, 1.0),
+        ([1, 2], (1, 2)),
+        (np.arange(3), np.arange(3, dtype=np.int32)),
+        (np.zeros((2, 3)), np.zeros((3, 2))),
+        (_frame(), _frame().assign(x=np.arange(1, 6))),
+        (_frame(), _frame().assign(label=list("abcdf"))),
+        (_frame(), _frame().rename(columns={"x": "y"})),
+        (_frame(), _frame().set_index("x")),
+        (pd.Series([1, 2], name="a"), pd.Series([1, 2], name="b")),
+    ],
+)
+def test_different_values_differ(fingerprint, left, right):
+    assert fingerprint(left) != fingerprint(right)
+
+
+def test_registered_types_use_their_function(fingerprint):
+    # Only the checksum is hashed, whatever else the object holds
+    assert fingerprint(Model("abc", threading.Lock())) == fingerprint(Model("abc"))
+    assert fingerprint(Model("abc")) != fingerprint(Model("abd"))
+    # Subclasses dispatch to it too, but keep their own type in nested values
+    assert fingerprint(FineTunedModel("abc")) is not None
+    assert fingerprint([Model("abc")]) != fingerprint([FineTunedModel("abc")])
+
+
+def test_unhashable_values_have_no_fingerprint(fingerprint):
+    assert fingerprint(Opaque()) is None
+    assert fingerprint({"model": Opaque()}) is None
+    assert fingerprint(threading.Lock()) is None
+
+
+def test_memo_is_cleared_by_reset():
+    fingerprinter = Fingerprinter()
+    array = np.arange(5)
+    before = fingerprinter.fingerprint(array)
+
+    array[0] = 10
+    assert fingerprinter.fingerprint(array) == before
+
+    fingerprinter.reset()
+    assert fingerprinter.fingerprint(array) != before
+
+
+def test_tagged_frames_are_keyed_by_source_version(fingerprint):
+    df = tag_frame(_frame(), "sales", 3, "SELECT * FROM sales")
+
+    assert data_version_key(df) == ("sales", 3, "SELECT * FROM sales")
+    assert fingerprint(df) == f"source:{data_version_key(df)!r}"
+    # Portable fingerprints hash the contents instead
+    assert fingerprint(df, portable=True) == fingerprint(_frame(), portable=True)
+    # A reload is a new version
+    reloaded = tag_frame(_frame(), "sales", 4, "SELECT * FROM sales")
+    assert fingerprint(reloaded) != fingerprint(df)
+
+
+def test_derived_frames_are_not_keyed_by_version():
+    df = tag_frame(_frame(), "sales", 3)
+
+    assert data_version_key(df[df["x"] > 1]) is None
+    assert data_version_key(df.copy()) is None
+    assert data_version_key(df.head()) is None
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda df: df.loc.__setitem__((0, "x"), 100),
+        lambda df: df.__setitem__("y", 1),
+        lambda df: df.__setitem__("x", df["x"] * 2),
+        lambda df: df.drop(columns="label", inplace=True),
+        lambda df: df.rename(columns={"x": "z"}, inplace=True),
+        lambda df: df.sort_values("x", ascending=False, inplace=True),
+        lambda df: df.reset_index(inplace=True),
+    ],
+)
+def test_changes_in_place_drop_the_version_key(fingerprint, change):
+    df = tag_frame(_frame(), "sales", 3)
+    assert data_version_key(df) is not None
+
+    change(df)
+
+    assert data_version_key(df) is None
+    assert fingerprint(df) == Fingerprinter().fingerprint(df.copy())
@@ -0,0 +1,109 @@
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from preswald.engine import process_pool
+from preswald.engine.process_pool import HandoffError, Packed
+from preswald.interfaces.workflow import AtomCache, Workflow
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _pool():
+    yield
+    process_pool.shutdown()
+
+
+def _describe(frame, weights):
+    return {
+        "pid": os.getpid(),
+        "total": float(frame["x"].sum()),
+        "scaled": weights * 2,
+    }
+
+
+def _worker_pid():
+    return os.getpid()
+
+
+def _segment_exists(name):
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    segment.close()
+    return True
+
+
+def test_small_values_are_pickled_inline():
+    packed = Packed.pack({"a": np.arange(10)})
+
+    assert packed.segment is None
+    np.testing.assert_array_equal(packed.unpack()["a"], np.arange(10))
+
+
+def test_large_buffers_go_through_shared_memory():
+    array = np.arange(2**18, dtype=np.float64)  # 2 MB
+    packed = Packed.pack({"array": array, "label": "x"})
+
+    assert packed.segment is not None
+    assert len(packed.data) < 1024
+    assert packed.spans == [(0, array.nbytes)]
+
+    value = packed.unpack()
+    np.testing.assert_array_equal(value["array"], array)
+    assert value["label"] == "x"
+
+    packed.release()
+    packed.release()
+    assert not _segment_exists(packed.segment)
+
+
+def test_run_in_process_hands_frames_and_arrays_over(monkeypatch):
+    segments = []
+    pack, unpack = Packed.pack.__func__, Packed.unpack
+
+    def recording_pack(cls, value):
+        packed = pack(cls, value)
+        segments.append(packed.segment)
+        return packed
+
+    def recording_unpack(self):
+        segments.append(self.segment)
+        return unpack(self)
+
+    monkeypatch.setattr(Packed, "pack", classmethod(recording_pack))
+    monkeypatch.setattr(Packed, "unpack", recording_unpack)
+    frame = pd.DataFrame({"x": np.ones(2**18)})
+    weights = np.arange(2**18, dtype=np.float64)
+
+    result = process_pool.run_in_process(
+        _describe, {"frame": frame, "weights": weights}
+    )
+
+    assert result["pid"] != os.getpid()
+    assert result["total"] == 2**18
+    np.testing.assert_array_equal(result["scaled"], weights * 2)
+    # The result owns its memory once the segment is gone
+    assert result["scaled"].flags.writeable
+    # Segments of both the arguments and the result were used and freed
+    assert len(segments) == 2
+    assert None not in segments
+    assert not any(_segment_exists(name) for name in segments)
+
+
+def test_unpicklable_arguments_raise_handoff_error():
+    with pytest.raises(HandoffError):
+        process_pool.run_in_process(_describe, {"frame": lambda: None, "weights": 1})
+
+
+def test_process_isolated_atom_runs_in_a_worker():
+    workflow = Workflow()
+    workflow.cache = AtomCache()
+    workflow.atom(isolation="process")(_worker_pid)
+
+    results = workflow.execute()
+
+    assert results["_worker_pid"].value != os.getpid()
@@ -0,0 +1,58 @@
+import gc
+import weakref
+
+import numpy as np
+import pytest
+
+from preswald.interfaces.workflow import AtomCache, Workflow
+
+
+_values: list[weakref.ref] = []
+
+
+def _tracked(value):
+    """Return ``value``, keeping a weak reference to it to check it's freed."""
+    _values.append(weakref.ref(value))
+    return value
+
+
+def _pipeline(release_values: str) -> Workflow:
+    workflow = Workflow(release_values=release_values)
+    workflow.cache = AtomCache()  # not the process-wide shared cache
+
+    @workflow.atom()
+    def raw():
+        return _tracked(np.ones(2**20))  # 8 MB
+
+    @workflow.atom()
+    def total(raw):
+        return float(raw.sum())
+
+    return workflow
+
+
+@pytest.mark.parametrize("release_values", ["drop", "spill"])
+def test_released_value_is_freed(release_values):
+    _values.clear()
+    workflow = _pipeline(release_values)
+
+    results = workflow.execute()
+    gc.collect()
+
+    assert results["total"].value == 2**20
+    assert "raw" in workflow.context.released
+    assert workflow.cache.stats()["bytes"] < 2**20
+    assert [ref() for ref in _values] == [None]
+
+
+def test_released_value_is_reloaded():
+    _values.clear()
+    workflow = _pipeline("spill")
+    workflow.execute()
+
+    raw = workflow.context.get_variable("raw")
+
+    assert raw.shape == (2**20,)
+    assert "raw" not in workflow.context.released
+    # Loaded back from the spill, not recomputed
+    assert len(_values) == 1
@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+
+from preswald.interfaces.workflow import AtomCache, Workflow, record_component
+
+
+class _Service:
+    """Records which atom is active when a component is rendered."""
+
+    def __init__(self):
+        self._current_atom = None
+        self._workflow = Workflow()  # the service's own, not the one running
+        self.rendered = []
+
+    @contextmanager
+    def active_atom(self, atom_name):
+        previous, self._current_atom = self._current_atom, atom_name
+        try:
+            yield
+        finally:
+            self._current_atom = previous
+
+    def should_render(self, component_id, component):
+        return True
+
+    def append_component(self, component):
+        self.rendered.append((self._current_atom, component["id"]))
+
+
+def test_cached_components_are_replayed_under_their_atom():
+    service = _Service()
+    workflow = Workflow(service=service)
+    workflow.cache = AtomCache()
+
+    @workflow.atom()
+    def chart():
+        record_component({"id": "chart-1", "type": "plot"})
+        return 1
+
+    workflow.execute()
+    workflow.execute()
+
+    assert service.rendered == [("chart", "chart-1")]
@@ -0,0 +1,177 @@
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from preswald.engine.script_graph import analyze_script
+
+
+GALLERY = Path(__file__).parent.parent / "community_gallery"
+
+
+def _graph(source: str):
+    return analyze_script(textwrap.dedent(source).lstrip(), "app.py")
+
+
+def _spans(graph) -> list[tuple[int, int]]:
+    """First line and number of statements of each group."""
+    return [(group.lineno, len(group.codes)) for group in graph.groups]
+
+
+def _dependencies(graph) -> list[set[int]]:
+    return [group.dependencies for group in graph.groups]
+
+
+def test_reassigned_names_tie_their_statements_together():
+    graph = _graph(
+        """
+        a = 1
+        text("between")
+        a = a + 1
+        b = 2
+        text(f"{a} {b}")
+        """
+    )
+
+    assert graph.splittable
+    assert _spans(graph) == [(1, 3), (4, 1), (5, 1)]
+    assert _dependencies(graph) == [set(), set(), {0, 1}]
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        'items["x"] = 1',
+        "items.size = 3",
+        "items.append(3)",
+        "items.values.sort()",
+        'items.sort_values("x", inplace=True)',
+        "items[0] += 1",
+    ],
+)
+def test_changes_in_place_bind_the_changed_name(change):
+    graph = _graph(
+        f"""
+        items = load()
+        n = 1
+        {change}
+        text(items)
+        """
+    )
+
+    assert _spans(graph) == [(1, 3), (4, 1)]
+    assert "items" in graph.groups[0].binds
+
+
+def test_module_calls_do_not_bind_the_module():
+    graph = _graph(
+        """
+        import math
+        x = 1.5
+        math.floor(x)
+        """
+    )
+
+    assert _spans(graph) == [(1, 1), (2, 1), (3, 1)]
+    assert _dependencies(graph) == [set(), set(), {0, 1}]
+
+
+def test_function_bodies_are_read_where_the_function_is_used():
+    graph = _graph(
+        """
+        scale = 2
+        def double(x):
+            return x * scale
+        offset = 1
+        def shift(x, by=offset):
+            return x + by
+        y = double(3)
+        """
+    )
+
+    assert [group.lineno for group in graph.groups] == [1, 2, 4, 5, 7]
+    # Defaults are evaluated at definition, bodies only when called
+    assert _dependencies(graph) == [set(), set(), set(), {2}, {0, 1}]
+
+
+def test_class_bodies_are_read_at_definition():
+    graph = _graph(
+        """
+        base = 1
+        factor = 2
+        class Config:
+            size = base
+            def scaled(self):
+                return self.size * factor
+        cfg = Config()
+        """
+    )
+
+    assert [group.lineno for group in graph.groups] == [1, 2, 3, 7]
+    # Class attributes aren't variables of the script
+    assert graph.groups[2].binds == {"Config"}
+    # Instances read what methods read; base only through the class
+    assert _dependencies(graph) == [set(), set(), {0}, {1, 2}]
+
+
+def test_unknown_names_depend_on_star_imports():
+    graph = _graph(
+        """
+        from helpers import *
+        x = 1
+        y = load(x)
+        z = x + 1
+        """
+    )
+
+    assert _dependencies(graph) == [set(), set(), {0, 1}, {1}]
+
+
+@pytest.mark.parametrize(
+    ("source", "reason"),
+    [
+        ('globals()["x"] = 1', "reads or writes variables dynamically"),
+        ('exec("x = 1")', "reads or writes variables dynamically"),
+        ("def f():\n    global x\n    x = 1", "reads or writes variables dynamically"),
+        ("from preswald import Workflow", "declares workflow atoms"),
+        ("workflow = service.get_workflow()", "declares workflow atoms"),
+        ("@workflow.atom()\ndef n():\n    return 1", "declares workflow atoms"),
+    ],
+)
+def test_scripts_that_cannot_be_split(source, reason):
+    graph = analyze_script(f"x = 0\n{source}\ntext(x)\n", "app.py")
+
+    assert graph.reason == reason
+    assert graph.groups == []
+    assert not graph.splittable
+
+
+def test_invalid_scripts_are_not_analyzed():
+    assert analyze_script("x = (\n", "app.py") is None
+    assert analyze_script("return 1\n", "app.py") is None
+
+
+def test_gallery_script_grouping():
+    path = GALLERY / "sf-salaries" / "hello.py"
+    graph = analyze_script(path.read_text(encoding="utf-8"), str(path))
+
+    assert graph.splittable
+    assert _spans(graph) == [
+        (1, 1),  # import pandas
+        (2, 1),  # import plotly
+        (4, 1),  # from preswald import ...
+        (7, 1),
+        (8, 1),
+        (13, 1),  # def preprocess_data
+        (48, 1),  # connect()
+        # df is changed in place until the last chart, tying in the slider
+        (49, 23),
+        (118, 1),
+        (124, 1),
+        (128, 1),
+        (129, 1),
+    ]
+    # preprocess_data reads pd when called, not when defined
+    assert graph.groups[5].dependencies == set()
+    assert graph.groups[7].dependencies == {0, 1, 2, 5}
+    assert graph.groups[8].dependencies == {1, 7}
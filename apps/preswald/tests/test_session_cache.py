@@ -0,0 +1,81 @@
+import asyncio
+
+from preswald.interfaces.workflow import AtomCache, Workflow, active_session
+
+
+APP = """
+from preswald import slider, text
+from preswald.engine.service import PreswaldService
+
+workflow = PreswaldService.get_instance().get_workflow()
+
+def log_call(atom_name):
+    with open(r"{log}", "a") as f:
+        f.write(atom_name + "\\n")
+
+@workflow.atom()
+def n():
+    return slider("n", default=1)
+
+@workflow.atom()
+def everyone(n):
+    log_call("everyone")
+    text(f"shared {{n}}")
+
+@workflow.atom(shared=False)
+def mine(n):
+    log_call("mine")
+    text(f"mine {{n}}")
+
+workflow.execute()
+"""
+
+
+def test_sessions_do_not_share_unshared_results(start_app, tmp_path):
+    log = tmp_path / "calls.log"
+    app = start_app(APP.format(log=log))
+
+    def calls(atom_name):
+        return log.read_text().split().count(atom_name)
+
+    async def scenario():
+        a, b = app.connect("a"), app.connect("b")
+        await a.start()
+        await b.start()
+        [slider_id] = app.components("n")
+
+        # B reuses A's shared result, but computes its own unshared one
+        assert a.page == b.page == [1, "shared 1", "mine 1"]
+        assert (calls("everyone"), calls("mine")) == (1, 2)
+
+        await a.update({slider_id: 2})
+        await b.update({slider_id: 2})
+        assert a.page == b.page == [2, "shared 2", "mine 2"]
+        assert (calls("everyone"), calls("mine")) == (2, 4)
+
+        # Back to an earlier value, each session has its own result cached
+        await a.update({slider_id: 1})
+        await b.update({slider_id: 1})
+        assert a.page == b.page == [1, "shared 1", "mine 1"]
+        assert (calls("everyone"), calls("mine")) == (2, 4)
+
+        await app.service.unregister_client("a")
+        assert "a" not in app.workflow.session_caches
+        assert "b" in app.workflow.session_caches
+
+    asyncio.run(scenario())
+
+
+def test_budget_applies_to_each_session_cache():
+    workflow = Workflow()
+    workflow.cache = AtomCache()
+    with active_session("a"):
+        first = workflow.session_cache
+
+    workflow.configure_cache(1024, "lfu")
+    with active_session("b"):
+        second = workflow.session_cache
+
+    assert first is not second
+    assert (first.max_bytes, first.policy) == (1024, "lfu")
+    assert (second.max_bytes, second.policy) == (1024, "lfu")
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from preswald.engine.managers.data import DataManager
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(0)
+    n = 2000
+    return pd.DataFrame(
+        {
+            "id": np.arange(n),
+            "lat": rng.uniform(-90, 90, n).round(4),
+            "lon": rng.uniform(-180, 180, n).round(4),
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def manager(points, tmp_path_factory):
+    root = tmp_path_factory.mktemp("spatial")
+    points.to_csv(root / "points.csv", index=False)
+    (root / "preswald.toml").write_text(
+        f"""
+[data.points]
+type = "csv"
+path = "{(root / "points.csv").as_posix()}"
+lat_column = "lat"
+lon_column = "lon"
+grid_size = 5.0
+"""
+    )
+    manager = DataManager(str(root / "preswald.toml"))
+    manager.connect()
+    return manager
+
+
+def _reference(points, west, south, east, north):
+    in_lat = points["lat"].between(south, north)
+    if west <= east:
+        in_lon = points["lon"].between(west, east)
+    else:
+        in_lon = (points["lon"] >= west) | (points["lon"] <= east)
+    return points[in_lat & in_lon]
+
+
+@pytest.mark.parametrize(
+    "bbox",
+    [
+        (-10.0, -10.0, 10.0, 10.0),
+        (-180.0, -90.0, 180.0, 90.0),
+        (2.5, 37.3, 27.1, 61.9),  # not aligned to the grid
+        (170.0, -30.0, -170.0, 30.0),  # crosses the antimeridian
+        (0.0, 89.0, 1.0, 95.0),  # clamped at the pole
+        (50.0, 20.0, 50.0, 20.0),  # empty
+    ],
+)
+def test_query_bbox_matches_pandas(manager, points, bbox):
+    result = manager.query_bbox("points", bbox, max_points=len(points))
+    expected = _reference(points, *bbox)
+
+    assert sorted(result["id"].astype(int)) == sorted(expected["id"])
+    assert "count" not in result.columns
+
+
+@pytest.mark.parametrize(
+    "bbox", [(-180.0, -90.0, 180.0, 90.0), (150.0, -60.0, -140.0, 60.0)]
+)
+def test_query_bbox_aggregates_over_budget(manager, points, bbox):
+    expected = _reference(points, *bbox)
+    max_points = 50
+
+    result = manager.query_bbox("points", bbox, max_points=max_points)
+
+    assert len(result) <= max_points
+    assert result["count"].sum() == len(expected)
+    # Every centroid lies inside the box it summarizes
+    west, south, east, north = bbox
+    assert result["lat"].between(south, north).all()
+    if west > east:
+        assert ((result["lon"] >= west) | (result["lon"] <= east)).all()
+
+
+def test_query_bbox_rejects_inverted_latitudes(manager):
+    with pytest.raises(ValueError, match="south is greater than north"):
+        manager.query_bbox("points", (0, 10, 10, 0))
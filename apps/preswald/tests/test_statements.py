@@ -0,0 +1,69 @@
+import asyncio
+
+
+APP = """
+from preswald import slider, text
+
+owner = widget_states.get("owner", "nobody")
+n = slider("n", default=1)
+text(f"{owner} sees {n}")
+"""
+
+
+def test_reruns_use_their_own_session_globals(start_app):
+    app = start_app(APP)
+
+    async def scenario():
+        a, b = app.connect("a"), app.connect("b")
+        a.runner.widget_states["owner"] = "a"
+        b.runner.widget_states["owner"] = "b"
+        await a.start()
+        statement_atoms = a.runner._statement_atoms
+        await b.start()
+        [slider_id] = [
+            cid for cid in app.components(*statement_atoms) if cid.startswith("slider")
+        ]
+
+        assert len(statement_atoms) == 4  # the import is a group of its own
+        assert b.runner._statement_atoms == statement_atoms
+        assert a.page == [1, "a sees 1"]
+        assert b.page == [1, "b sees 1"]
+
+        # Only the statements after the slider run again, each in the
+        # globals of the session whose widget changed
+        await a.update({slider_id: 2})
+        assert a.page == [2, "a sees 2"]
+        assert a.runner._script_globals["n"] == 2
+        await b.update({slider_id: 3})
+        assert b.page == [3, "b sees 3"]
+        assert a.runner._script_globals["n"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_edited_script_replaces_the_statement_atoms(start_app):
+    app = start_app(APP)
+    script = app.service.script_path
+
+    async def scenario():
+        a = app.connect("a")
+        await a.start()
+        before = a.runner._statement_atoms
+
+        with open(script, "a", encoding="utf-8") as f:
+            f.write('text("footer")\n')
+        await a.start()
+        after = a.runner._statement_atoms
+
+        assert len(after) == len(before) + 1
+        assert a.page[-1] == "footer"
+
+        # A script that can't be split drops them
+        with open(script, "w", encoding="utf-8") as f:
+            f.write("from preswald import text\nexec(\"text('whole')\")\n")
+        await a.start()
+
+        assert a.runner._statement_atoms == []
+        assert a.page == ["whole"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,99 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from preswald.engine.managers.data import DataManager
+from preswald.engine.managers.indexes import TextIndex
+
+
+@pytest.fixture(scope="module")
+def products():
+    rng = np.random.default_rng(0)
+    words = ["red", "green", "blue", "bluetooth", "lamp", "lambda", "chair", "cha"]
+    n = 500
+    titles = [" ".join(rng.choice(words, rng.integers(1, 4))) for _ in range(n)]
+    notes = [
+        None if i % 7 == 0 else f"Batch-{i % 13} {rng.choice(words).upper()}"
+        for i in range(n)
+    ]
+    return pd.DataFrame({"id": np.arange(n), "title": titles, "notes": notes})
+
+
+@pytest.fixture(scope="module")
+def manager(products, tmp_path_factory):
+    root = tmp_path_factory.mktemp("text")
+    products.to_csv(root / "products.csv", index=False)
+    (root / "preswald.toml").write_text(
+        f"""
+[data.products]
+type = "csv"
+path = "{(root / "products.csv").as_posix()}"
+
+[data.products.search]
+columns = ["title", "notes"]
+"""
+    )
+    manager = DataManager(str(root / "preswald.toml"))
+    manager.connect()
+    return manager
+
+
+def _reference(products, query):
+    *exact, prefix = re.findall(r"\w+", query.lower())
+
+    def matches(row):
+        text = " ".join(str(v) for v in row[["title", "notes"]].dropna())
+        tokens = set(re.findall(r"\w+", text.lower()))
+        return set(exact) <= tokens and any(t.startswith(prefix) for t in tokens)
+
+    return products[products.apply(matches, axis=1)]
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "lamp",
+        "la",  # prefix of lamp and lambda
+        "blue",  # exact and prefix of bluetooth
+        "Blue Lamp",
+        "red cha",
+        "batch 3",
+        "BATCH_",
+        "chair green blu",
+        "purple",
+    ],
+)
+def test_search_matches_pandas(manager, products, query):
+    result = manager.search("products", query, limit=None)
+    expected = _reference(products, query)
+
+    assert list(result["id"].astype(int)) == list(expected["id"])
+
+
+def test_search_limit_keeps_the_first_rows(manager, products):
+    expected = _reference(products, "la")
+
+    result = manager.search("products", "la", limit=5)
+    ids = manager.search("products", "la", limit=5, ids_only=True)
+
+    assert list(result["id"].astype(int)) == list(expected["id"][:5])
+    assert list(ids) == list(expected.index[:5])
+
+
+def test_search_without_tokens_is_empty(manager):
+    assert len(manager.search("products", " -- ")) == 0
+
+
+def test_saved_index_answers_the_same(manager, tmp_path):
+    index = manager.text_indexes["products"]
+    index.save(str(tmp_path / "products"))
+
+    loaded = TextIndex(manager.duckdb_conn, index.table_name, index.columns)
+    loaded.load(str(tmp_path / "products"))
+
+    for query in ("la", "blue lamp", "batch 1"):
+        assert list(loaded.search_ids(query, None)) == list(
+            index.search_ids(query, None)
+        )
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from preswald.engine.managers.data import DataManager
+
+
+_PERIODS = {"hour": "h", "day": "D", "week": "W", "month": "M"}
+
+
+@pytest.fixture(scope="module")
+def events():
+    rng = np.random.default_rng(0)
+    n = 3000
+    start = pd.Timestamp("2024-01-29 05:17:00")
+    offsets = np.sort(rng.integers(0, 60 * 24 * 45, n))  # minutes over 45 days
+    return pd.DataFrame(
+        {
+            "ts": start + pd.to_timedelta(offsets, unit="min"),
+            "value": rng.normal(10, 3, n).round(3),
+            "label": rng.choice(["a", "b", "c"], n),
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def manager(events, tmp_path_factory):
+    root = tmp_path_factory.mktemp("time")
+    events.to_csv(root / "events.csv", index=False)
+    (root / "preswald.toml").write_text(
+        f"""
+[data.events]
+type = "csv"
+path = "{(root / "events.csv").as_posix()}"
+time_column = "ts"
+"""
+    )
+    manager = DataManager(str(root / "preswald.toml"))
+    manager.connect()
+    return manager
+
+
+def _window(events, start, end):
+    mask = pd.Series(True, index=events.index)
+    if start is not None:
+        mask &= events["ts"] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= events["ts"] < pd.Timestamp(end)
+    return events[mask]
+
+
+def _reference(events, start, end, bucket):
+    window = _window(events, start, end)
+    buckets = window["ts"].dt.to_period(_PERIODS[bucket]).dt.start_time
+    grouped = window.groupby(buckets.rename("bucket"))["value"]
+    return pd.DataFrame(
+        {
+            "count": grouped.size(),
+            "value_sum": grouped.sum(),
+            "value_min": grouped.min(),
+            "value_max": grouped.max(),
+            "value_mean": grouped.mean(),
+        }
+    ).reset_index()
+
+
+def test_detects_numeric_value_columns(manager):
+    assert manager.time_indexes["events"].value_columns == ["value"]
+
+
+@pytest.mark.parametrize(
+    ("start", "end"),
+    [
+        (None, None),
+        ("2024-02-03", "2024-02-10"),
+        ("2024-02-03 07:41:13", None),
+        (None, "2024-02-20 23:59:30"),
+    ],
+)
+def test_time_range_rows_match_pandas(manager, events, start, end):
+    result = manager.time_range("events", start, end)
+    expected = _window(events, start, end)
+
+    assert list(pd.to_datetime(result["ts"])) == list(expected["ts"])
+    assert list(result["value"].astype(float)) == list(expected["value"])
+
+
+@pytest.mark.parametrize(
+    ("start", "end", "bucket"),
+    [
+        # Aligned bounds, answered from the rollups
+        ("2024-02-01", "2024-03-01", "day"),
+        ("2024-02-01", "2024-02-08", "hour"),
+        ("2024-02-05", "2024-03-04", "week"),
+        (None, None, "month"),
+        # Bounds inside a bucket, answered from the rows
+        ("2024-02-01 06:30:00", "2024-02-09 17:45:00", "day"),
+        ("2024-02-02 12:00:30", "2024-02-03 03:10:00", "hour"),
+        ("2024-02-07 13:00:00", None, "week"),
+    ],
+)
+def test_time_range_buckets_match_pandas(manager, events, start, end, bucket):
+    result = manager.time_range("events", start, end, bucket=bucket)
+    expected = _reference(events, start, end, bucket)
+
+    assert list(pd.to_datetime(result["bucket"])) == list(expected["bucket"])
+    assert list(result["count"]) == list(expected["count"])
+    for column in ("value_sum", "value_min", "value_max", "value_mean"):
+        np.testing.assert_allclose(result[column], expected[column], rtol=1e-9)
+
+
+def test_unaligned_bounds_skip_the_rollups(manager):
+    index = manager.time_indexes["events"]
+    start, end = pd.Timestamp("2024-02-01"), pd.Timestamp("2024-02-02 06:30")
+
+    assert index._pick_rollup("day", start, pd.Timestamp("2024-02-03")) == "day"
+    assert index._pick_rollup("day", start, end) == "minute"
+    assert index._pick_rollup("day", start + pd.Timedelta(seconds=1), end) is None
+
+
+def test_time_range_rejects_unknown_bucket(manager):
+    with pytest.raises(ValueError, match="Unsupported bucket"):
+        manager.time_range("events", bucket="fortnight")
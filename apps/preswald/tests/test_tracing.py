@@ -0,0 +1,103 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from preswald.engine.service import ServiceImpl
+from preswald.engine.tracing import Tracer, get_tracer, trace_session
+from preswald.main import create_app
+
+
+SQL = "SELECT * FROM patients WHERE name = 'Ada'"
+
+
+def _record(tracer):
+    with trace_session("client-a"), tracer.span("query", "data", sql=SQL):
+        pass
+    with trace_session("client-b"), tracer.span("atom", "atom", atom="total"):
+        pass
+
+
+def _args(trace):
+    return [event["args"] for event in trace["traceEvents"] if event["ph"] == "X"]
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    with tracer.span("query", "data") as args:
+        args["rows"] = 3
+
+    assert args == {"rows": 3}
+    assert tracer.events() == []
+
+
+def test_trace_keeps_session_and_query(tmp_path):
+    tracer = Tracer(enabled=True)
+    _record(tracer)
+
+    path = tmp_path / "trace.json"
+    trace = tracer.export(str(path))
+
+    assert _args(trace) == [
+        {"sql": SQL, "session_id": "client-a"},
+        {"atom": "total", "session_id": "client-b"},
+    ]
+    assert json.loads(path.read_text()) == trace
+    assert _args(tracer.export(session_id="client-b")) == [
+        {"atom": "total", "session_id": "client-b"}
+    ]
+
+
+def test_redacted_trace_hides_session_and_query():
+    tracer = Tracer(enabled=True)
+    _record(tracer)
+    _record(tracer)
+
+    first, second, third, _ = _args(tracer.export(redact=True))
+
+    assert first["sql"].startswith("sha256:")
+    assert first["session_id"].startswith("sha256:")
+    assert SQL not in json.dumps(first)
+    assert "client-a" not in json.dumps(first)
+    # The same query and session keep the same digest
+    assert third == first
+    assert second["session_id"] != first["session_id"]
+    assert second["atom"] == "total"
+    # Filtering by session still uses the session's own ID
+    spans = [e for e in tracer.events("client-a", redact=True) if e["ph"] == "X"]
+    assert [span["args"] for span in spans] == [first, third]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Client of the monitoring endpoints, tracing off and calling from localhost."""
+    monkeypatch.setattr(get_tracer(), "enabled", False)
+    get_tracer().clear()
+    script = tmp_path / "app.py"
+    script.write_text("")
+    app = create_app(str(script))
+    yield lambda host="127.0.0.1": TestClient(app, client=(host, 50000))
+    get_tracer().clear()
+    ServiceImpl._instance = None
+
+
+def test_trace_is_served_only_when_enabled(client):
+    assert client().get("/api/trace").status_code == 404
+
+    get_tracer().enabled = True
+    _record(get_tracer())
+    response = client().get("/api/trace", params={"session_id": "client-a"})
+
+    assert response.status_code == 200
+    [args] = _args(response.json())
+    assert args["sql"].startswith("sha256:")
+    assert args["session_id"].startswith("sha256:")
+
+
+@pytest.mark.parametrize("path", ["/api/trace", "/api/cache/stats"])
+def test_monitoring_endpoints_are_local_only(client, path):
+    get_tracer().enabled = True
+
+    assert client().get(path).status_code == 200
+    assert client("::1").get(path).status_code == 200
+    assert client("203.0.113.7").get(path).status_code == 403
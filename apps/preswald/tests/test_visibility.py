@@ -0,0 +1,50 @@
+import asyncio
+
+
+APP = """
+from preswald import slider, text
+from preswald.engine.service import PreswaldService
+
+workflow = PreswaldService.get_instance().get_workflow()
+
+@workflow.atom()
+def n():
+    return slider("n", default=1)
+
+@workflow.atom()
+def top(n):
+    text(f"top {n}")
+
+@workflow.atom()
+def bottom(n):
+    text(f"bottom {n}")
+
+workflow.execute()
+"""
+
+
+def test_each_session_renders_what_it_shows(start_app):
+    app = start_app(APP)
+
+    async def scenario():
+        a, b = app.connect("a"), app.connect("b")
+        await a.start()
+        await b.start()
+        [slider_id] = app.components("n")
+        assert a.page == b.page == [1, "top 1", "bottom 1"]
+
+        # B scrolled to the bottom, A still shows only the top
+        await a.show(app.components("n", "top"))
+        await b.show(app.components("n", "top", "bottom"))
+
+        await a.update({slider_id: 5})
+        assert a.page == [5, "top 5", "bottom 1"]
+
+        await b.update({slider_id: 7})
+        assert b.page == [7, "top 7", "bottom 7"]
+
+        # Scrolling down renders what A skipped
+        await a.show(app.components("n", "top", "bottom"))
+        assert a.page[-1] == "bottom 7"
+
+    asyncio.run(scenario())